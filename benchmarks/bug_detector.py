@@ -0,0 +1,112 @@
+"""Single-request vs windowed (map-reduce) bug detection on long synthetic calls.
+
+A fake chat client stands in for gpt-4-turbo: its latency grows with the
+prompt and the reply, like the real model's, and it reports an issue for
+every assistant turn containing a planted marker. The benchmark shows how
+latency and the largest prompt grow with call length in each mode. It also
+shows that merging the windows keeps every planted issue exactly once.
+
+Run with: python -m benchmarks.bug_detector [--turns 25,50,100,200] [--scale 0.1]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from .content_matcher import make_transcripts
+
+MARKER = "sorry sorry"
+
+
+class FakeChatClient:
+    """OpenAI-shaped client whose latency follows prompt and completion size."""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.requests = 0
+        self.max_prompt_tokens = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        prompt = "".join(message["content"] for message in messages)
+        prompt_tokens = len(prompt) // 4
+        content = messages[-1]["content"]
+        if "Turns:\n" in content:
+            turns = [
+                (int(number), role, text)
+                for number, role, text in re.findall(r"^\[(\d+)\] (\w+): (.*)$", content, re.M)
+            ]
+        else:
+            transcript = json.loads(content.split("Transcript: ", 1)[1])
+            turns = [(i, t["role"], t["content"]) for i, t in enumerate(transcript) if t["role"] != "system"]
+        window = f"{turns[0][0]}" if turns else "0"
+        issues = [
+            {"type": "repetitiveness", "turn": number, "severity": "medium",
+             "description": f"Assistant apologises twice in a row (noticed in window starting at {window})"}
+            for number, role, text in turns if role == "assistant" and MARKER in text
+        ]
+        reply = json.dumps({"success": True, "quality_score": 7, "issues": issues, "summary": "Synthetic call."})
+        completion_tokens = len(reply) // 4
+        # Roughly gpt-4-turbo: time to first token plus prefill and ~50 tokens/s of output
+        time.sleep(self.scale * (0.5 + prompt_tokens / 20000 + completion_tokens / 50))
+        with self._lock:
+            self.requests += 1
+            self.max_prompt_tokens = max(self.max_prompt_tokens, prompt_tokens)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply))],
+            usage=SimpleNamespace(total_tokens=prompt_tokens + completion_tokens)
+        )
+
+
+def planted_transcript(turns: int, every: int, seed: int):
+    """A synthetic call with the marker in every ``every``-th assistant turn."""
+    transcript = make_transcripts(1, turns, seed=seed)[0]
+    planted = 0
+    for index, turn in enumerate(transcript[1:], 1):
+        if turn["role"] == "assistant" and (index // 2) % every == 0:
+            turn["content"] = f"{MARKER} {turn['content']}"
+            planted += 1
+    return transcript, planted
+
+
+def run(detector, transcript, windowed: bool, scale: float):
+    client = FakeChatClient(scale)
+    detector._client = client
+    detector.window_turns = int(os.environ["BUG_WINDOW_TURNS"]) if windowed else 0
+    start = time.perf_counter()
+    report = detector.analyze_transcript("bench", transcript)
+    elapsed = time.perf_counter() - start
+    return elapsed, client, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Windowed bug detection benchmark")
+    parser.add_argument("--turns", default="25,50,100,200", help="Comma-separated call lengths")
+    parser.add_argument("--every", type=int, default=7, help="Plant an issue in every Nth assistant turn")
+    parser.add_argument("--scale", type=float, default=0.1, help="Multiplier on the fake model's latency")
+    args = parser.parse_args()
+
+    os.environ.setdefault("BUG_WINDOW_TURNS", "24")
+    # Let the limiter run every window at once; the fake model never rate limits
+    os.environ.update({"OPENAI_RPM": "100000", "OPENAI_TPM": "100000000", "OPENAI_MAX_CONCURRENCY": "64"})
+    from evaluation.bug_detector import BugDetector
+
+    detector = BugDetector()
+    random.seed(3)
+    print(f"{'turns':>5}  {'mode':<8}  {'latency':>8}  {'requests':>8}  {'max prompt':>10}  issues/planted")
+    for turns in (int(n) for n in args.turns.split(",")):
+        transcript, planted = planted_transcript(turns, args.every, seed=turns)
+        for windowed in (False, True):
+            elapsed, client, report = run(detector, transcript, windowed, args.scale)
+            found = len(report["issues"]) if report else 0
+            print(f"{turns:>5}  {'windowed' if windowed else 'single':<8}  {elapsed:7.2f}s  {client.requests:>8}  "
+                  f"{client.max_prompt_tokens:>10}  {found}/{planted}")
+
+
+if __name__ == "__main__":
+    main()
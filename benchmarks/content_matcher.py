@@ -0,0 +1,119 @@
+"""Benchmark compiled phrase/regex matching against per-pattern scanning.
+
+Run with: python -m benchmarks.content_matcher [--transcripts N] [--phrases P]
+"""
+import argparse
+import random
+import re
+import time
+
+from evaluation.checks.content import ContentCheck
+
+WORDS = (
+    "appointment schedule doctor pain back week tuesday monday insurance blue cross "
+    "refill pharmacy prescription dosage daily name birth date please thank you sorry "
+    "office hours available morning afternoon confirm patient new visit call again soon "
+    "medication lisinopril cvs main street weekend running low check calendar opening"
+).split()
+
+# Words that only appear in rules, like most entries of a real phrase list
+RULE_WORDS = (
+    "guarantee promise diagnosis cure lawsuit refund emergency overdose cancel "
+    "specialist referral copay deductible billing transfer voicemail callback "
+    "allergy symptoms fever urgent portal password account balance"
+).split()
+
+
+def make_transcripts(count: int, turns: int, seed: int = 7):
+    """Generate synthetic transcripts with random sentences."""
+    rng = random.Random(seed)
+    transcripts = []
+    for _ in range(count):
+        transcript = [{"role": "system", "content": "prompt"}]
+        for turn in range(turns):
+            role = "user" if turn % 2 == 0 else "assistant"
+            transcript.append({"role": role, "content": " ".join(rng.choices(WORDS, k=rng.randint(8, 20)))})
+        transcripts.append(transcript)
+    return transcripts
+
+
+def make_phrases(count: int, seed: int = 11):
+    """Generate distinct multi-word phrases, most of which rarely occur."""
+    rng = random.Random(seed)
+    phrases = set()
+    while len(phrases) < count:
+        words = rng.choices(WORDS, k=rng.randint(1, 2)) + rng.choices(RULE_WORDS, k=1)
+        rng.shuffle(words)
+        phrases.add(" ".join(words))
+    return sorted(phrases)
+
+
+def naive_phrases(check: ContentCheck, transcript):
+    """The previous algorithm: lowercase, then one substring scan per phrase."""
+    text = check._get_transcript_text(transcript).lower()
+    missing = [p for p in check.required_phrases if p.lower() not in text]
+    found = [p for p in check.prohibited_phrases if p.lower() in text]
+    return missing, found
+
+
+def naive_regex(check: ContentCheck, transcript):
+    """The previous algorithm: one re.search per pattern per transcript."""
+    text = check._get_transcript_text(transcript)
+    return [p for p in check.required_phrases + check.prohibited_phrases
+            if re.search(p, text, re.IGNORECASE)]
+
+
+def timed(func, transcripts):
+    start = time.perf_counter()
+    for transcript in transcripts:
+        func(transcript)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content matcher benchmark")
+    parser.add_argument("--transcripts", type=int, default=20000)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--phrases", type=int, default=400)
+    args = parser.parse_args()
+
+    transcripts = make_transcripts(args.transcripts, args.turns)
+    total_chars = sum(len(ContentCheck("x")._get_transcript_text(t)) for t in transcripts)
+    print(f"{len(transcripts)} transcripts, {total_chars / 1e6:.1f}M characters")
+
+    print(f"\n{'phrases':>8} {'naive s':>9} {'compiled s':>11} {'Mchar/s':>8}")
+    for count in (args.phrases // 4, args.phrases // 2, args.phrases):
+        phrases = make_phrases(count)
+        half = len(phrases) // 2
+        check = ContentCheck.from_config({
+            "name": "bench", "subtype": "phrases",
+            "required_phrases": phrases[:half], "prohibited_phrases": phrases[half:],
+        })
+        naive = timed(lambda t: naive_phrases(check, t), transcripts)
+        compiled = timed(check.evaluate, transcripts)
+        print(f"{count:>8} {naive:>9.2f} {compiled:>11.2f} {total_chars / compiled / 1e6:>8.1f}")
+
+    print(f"\n{'turns':>8} {'Mchars':>9} {'compiled s':>11}")
+    check = ContentCheck.from_config({
+        "name": "bench", "subtype": "phrases", "prohibited_phrases": make_phrases(args.phrases),
+    })
+    subset = transcripts[: max(1, len(transcripts) // 4)]
+    for turns in (args.turns // 2, args.turns, args.turns * 2):
+        sized = make_transcripts(len(subset), turns)
+        chars = sum(len(check._get_transcript_text(t)) for t in sized)
+        print(f"{turns:>8} {chars / 1e6:>9.1f} {timed(check.evaluate, sized):>11.2f}")
+
+    print(f"\n{'patterns':>8} {'naive s':>9} {'compiled s':>11}")
+    for count in (25, 100, 200):
+        patterns = [r"\b" + p.replace(" ", r"\s+") + r"\b" for p in make_phrases(count, seed=13)]
+        check = ContentCheck.from_config({
+            "name": "bench", "subtype": "regex", "required_phrases": patterns,
+        })
+        subset = transcripts[: max(1, len(transcripts) // 10)]
+        naive = timed(lambda t: naive_regex(check, t), subset)
+        compiled = timed(check.evaluate, subset)
+        print(f"{count:>8} {naive:>9.2f} {compiled:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
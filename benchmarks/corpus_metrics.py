@@ -0,0 +1,56 @@
+"""Benchmark columnar threshold metrics over a large synthetic corpus.
+
+Run with: python -m benchmarks.corpus_metrics [--calls N]
+"""
+import argparse
+import time
+
+from evaluation.check_runner import CheckRunner
+from evaluation.checks.threshold import ThresholdCheck
+from evaluation.corpus import TranscriptCorpus, evaluate_corpus_thresholds
+
+from .content_matcher import make_transcripts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus metric benchmark")
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--checks", default="checks/general.yaml")
+    args = parser.parse_args()
+
+    transcripts = make_transcripts(args.calls, args.turns)
+    call_ids = [f"CA{i:032x}" for i in range(len(transcripts))]
+    checks = [c for c in CheckRunner(args.checks).checks if isinstance(c, ThresholdCheck)]
+    checks += [
+        ThresholdCheck("Turns", "turn_count", 20),
+        ThresholdCheck("User Turns", "user_turn_count", 2, comparison=">="),
+    ]
+
+    start = time.perf_counter()
+    for transcript in transcripts:
+        for check in checks:
+            check.evaluate(transcript)
+    per_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    corpus = TranscriptCorpus(call_ids, transcripts)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    report = evaluate_corpus_thresholds(corpus, checks)
+    compute = time.perf_counter() - start
+    start = time.perf_counter()
+    results = report.check_results()
+    materialize = time.perf_counter() - start
+
+    print(f"{len(transcripts)} calls, {len(checks)} threshold checks")
+    print(f"  per-call loop:        {per_call:.2f}s")
+    print(f"  columnar build:       {build:.2f}s")
+    print(f"  vectorized metrics:   {compute:.3f}s")
+    print(f"  CheckResult objects:  {materialize:.2f}s ({sum(map(len, results.values()))} results)")
+    for name, summary in report.summaries().items():
+        print(f"  {name}: mean={summary['mean']:.1f} p90={summary['p90']:.1f} pass_rate={summary['pass_rate']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Single-sample vs voting LLM judges on a mix of clear and borderline cases.
+
+A fake judge stands in for gpt-4-turbo. Each synthetic transcript has a
+hidden probability that the judge answers "yes". Most cases are clear, with
+a probability near 0 or 1. A minority are borderline, with a probability in
+the middle. The judge's confidence is roughly how often it gives the answer
+it just gave, so a rare answer, or any answer to a borderline case, comes
+with low confidence. Every case is judged ``--runs`` times in each mode.
+The benchmark reports how often a case's verdict changes between runs, how
+many judge requests an evaluation costs on average, and its wall time.
+
+Run with: python -m benchmarks.judge_voting [--cases 200] [--borderline 0.2] [--runs 5]
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeVotingJudge:
+    """OpenAI-shaped client that answers "yes" with each case's hidden probability."""
+
+    def __init__(self, probabilities, latency: float, seed: int):
+        self.probabilities = probabilities
+        self.latency = latency
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        case = int(re.search(r"case (\d+)", messages[-1]["content"]).group(1))
+        p = self.probabilities[case]
+        with self._lock:
+            self.requests += 1
+            answer = self._random.random() < p
+            noise = self._random.uniform(-0.05, 0.05)
+        time.sleep(self.latency)
+        # Calibrated: confidence is roughly how often the judge gives this answer
+        confidence = min(1.0, max(0.0, (p if answer else 1 - p) + noise))
+        content = json.dumps({"answer": "yes" if answer else "no", "confidence": round(confidence, 2),
+                              "evidence": f"case {case}"})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=400, completion_tokens=30, total_tokens=430)
+        )
+
+
+def make_cases(count: int, borderline: float, seed: int):
+    rng = random.Random(seed)
+    probabilities = []
+    for _ in range(count):
+        if rng.random() < borderline:
+            probabilities.append(rng.uniform(0.25, 0.75))
+        else:
+            probabilities.append(rng.choice((rng.uniform(0.0, 0.08), rng.uniform(0.92, 1.0))))
+    return probabilities
+
+
+def run(check, probabilities, runs: int, latency: float, seed: int):
+    client = FakeVotingJudge(probabilities, latency, seed)
+    check._client = client
+    flips = 0
+    start = time.perf_counter()
+    for case in range(len(probabilities)):
+        transcript = [{"role": "assistant", "content": f"This is case {case}."}]
+        verdicts = {check.evaluate(transcript).passed for _ in range(runs)}
+        flips += len(verdicts) > 1
+    elapsed = time.perf_counter() - start
+    evaluations = len(probabilities) * runs
+    return flips / len(probabilities), client.requests / evaluations, elapsed / evaluations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive voting benchmark for LLM checks")
+    parser.add_argument("--cases", type=int, default=200, help="Number of synthetic transcripts")
+    parser.add_argument("--borderline", type=float, default=0.2, help="Fraction of borderline cases")
+    parser.add_argument("--runs", type=int, default=5, help="Times each case is judged per mode")
+    parser.add_argument("--max-samples", type=int, default=5, help="Voting budget per evaluation")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake judge latency in seconds")
+    args = parser.parse_args()
+
+    from evaluation.checks.boolean import BooleanCheck
+    from evaluation.checks.llm import VotingConfig
+
+    probabilities = make_cases(args.cases, args.borderline, seed=7)
+    modes = {
+        "single": None,
+        "vote-all": VotingConfig(confidence_threshold=1.01, max_samples=args.max_samples),
+        "adaptive": VotingConfig(max_samples=args.max_samples),
+    }
+    print(f"{args.cases} cases ({args.borderline:.0%} borderline), {args.runs} runs each, "
+          f"budget {args.max_samples} samples\n")
+    print(f"{'mode':<9}  {'flip rate':>9}  {'requests/eval':>13}  {'ms/eval':>8}")
+    for index, (mode, voting) in enumerate(modes.items()):
+        check = BooleanCheck("bench", "Did the receptionist avoid making up information?", voting=voting)
+        flip_rate, requests, latency = run(check, probabilities, args.runs, args.latency, seed=index)
+        print(f"{mode:<9}  {flip_rate:>9.1%}  {requests:>13.2f}  {latency * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""CLI startup time for evaluation commands, with a per-module import report.
+
+Times fresh interpreters running ``import main`` (everything an evaluation
+command loads before it starts working), lists the slowest imports from
+``python -X importtime`` and checks that no telephony or provider SDK was
+pulled in. Exits non-zero when the median is over budget or a forbidden
+module was imported, so it can gate CI.
+
+Run with: python -m benchmarks.startup [--runs N] [--budget-ms 200] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Only needed once a call is placed or an LLM is actually asked something
+FORBIDDEN = ("twilio", "pyngrok", "uvicorn", "fastapi", "openai", "core.server")
+
+PROBE = (
+    "import sys, json, main; "
+    f"print(json.dumps([m for m in {FORBIDDEN!r} if m in sys.modules]))"
+)
+
+
+def timed_import(runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import main"], check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def import_breakdown(top: int):
+    """(module, cumulative ms) for the slowest direct and second-level imports of main."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        check=True, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # importtime indents nested imports by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            rows.append((name.strip(), int(cumulative_us) / 1000))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=200.0)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    timings = timed_import(args.runs)
+    median = statistics.median(timings)
+    forbidden = json.loads(subprocess.run(
+        [sys.executable, "-c", PROBE], check=True, capture_output=True, text=True
+    ).stdout)
+    breakdown = import_breakdown(args.top)
+
+    print(f"import main: median {median:.0f}ms, min {min(timings):.0f}ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.0f}ms)")
+    print("Slowest imports (cumulative):")
+    for name, ms in breakdown:
+        print(f"  {ms:7.1f}ms  {name}")
+    print(f"Forbidden modules imported: {forbidden or 'none'}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump({
+                "startup_ms_median": round(median, 1),
+                "startup_ms_min": round(min(timings), 1),
+                "budget_ms": args.budget_ms,
+                "imports_ms": dict(breakdown),
+                "forbidden_imported": forbidden,
+            }, f, indent=2)
+
+    if median > args.budget_ms or forbidden:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Word error rate and latency of the STT engines on saved recordings.
+
+References come from the saved call transcripts: the receptionist's Nth reply
+is what Whisper heard in ``<call>_N_user.wav``.
+Each available engine transcribes every referenced clip one at a time, then
+all at once from parallel threads to show how the local engine batches turns
+that end together.
+
+``--smoke`` checks the local engine's batched decoding against the installed
+faster-whisper: the same clips are decoded one at a time through the public
+``transcribe`` API and as one batch, and the run fails if they disagree.
+Run it before adding a faster-whisper release to ``BATCHED_DECODE_VERSIONS``.
+
+Run with: python -m benchmarks.stt_engines [--engines api,local] [--dir recordings] [--smoke]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from evaluation.transcripts import iter_transcript_files, load_transcript
+
+
+def words(text: str):
+    return re.sub(r"[^a-z0-9' ]", " ", text.lower()).split()
+
+
+def word_errors(reference: str, hypothesis: str):
+    """(edits, reference words) by word-level Levenshtein distance."""
+    ref, hyp = words(reference), words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def referenced_clips(directory: str):
+    """(wav path, reference text) for every recording with a saved transcript turn."""
+    clips = []
+    for call_id, path in sorted(iter_transcript_files(directory)):
+        replies = [m["content"] for m in load_transcript(path) if m.get("role") == "user"]
+        for turn, reference in enumerate(replies):
+            wav = os.path.join(directory, f"{call_id}_{turn}_user.wav")
+            if os.path.exists(wav):
+                clips.append((wav, reference))
+    return clips
+
+
+def run_engine(name: str, clips):
+    from core.transcriber import Transcriber
+    transcriber = Transcriber(name)
+
+    latencies, edits, total = [], 0, 0
+    for path, reference in clips:
+        start = time.perf_counter()
+        text = transcriber.transcribe(path) or ""
+        latencies.append(time.perf_counter() - start)
+        errors, count = word_errors(reference, text)
+        edits, total = edits + errors, total + count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(clips)) as pool:
+        list(pool.map(transcriber.transcribe, [path for path, _ in clips]))
+    burst = time.perf_counter() - start
+
+    print(f"{transcriber.engine.name}")
+    print(f"  WER {edits / max(total, 1):.1%} over {total} words")
+    print(f"  latency per turn: median {statistics.median(latencies):.2f}s, max {max(latencies):.2f}s")
+    print(f"  {len(clips)} turns ending at once: {burst:.2f}s wall clock")
+    if hasattr(transcriber.engine, "stats"):
+        print(f"  engine stats: {transcriber.engine.stats}")
+    transcriber.engine.close()
+
+
+def smoke(clips, max_wer: float) -> bool:
+    """Batched vs one-at-a-time decoding of the same clips; True if they agree."""
+    from core.stt_engines import WINDOW_SECONDS, LocalWhisperEngine, model_input
+    from core.stt_preprocessing import TARGET_RATE, prepare_recording
+    import faster_whisper
+
+    engine = LocalWhisperEngine(workers=1)
+    audios = [model_input(prepare_recording(path, encode_audio=False)) for path, _ in clips]
+    audios = [audio for audio in audios if 0 < len(audio) <= WINDOW_SECONDS * TARGET_RATE]
+    singles = [engine._decode(audio) for audio in audios]
+    batched = engine._decode_batch(audios)
+    engine.close()
+
+    edits, total = 0, 0
+    for single, batch in zip(singles, batched):
+        errors, count = word_errors(single, batch)
+        edits, total = edits + errors, total + count
+        if errors:
+            print(f"  differs: {single!r} / batched {batch!r}")
+    wer = edits / max(total, 1)
+    print(f"faster-whisper {faster_whisper.__version__}: batched vs single WER {wer:.1%} "
+          f"over {len(audios)} clips, {total} words")
+    return len(batched) == len(audios) and wer <= max_wer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STT engine benchmark")
+    parser.add_argument("--dir", default="recordings", help="Directory with recordings and transcripts")
+    parser.add_argument("--engines", default="api,local", help="Comma-separated engines to compare")
+    parser.add_argument("--smoke", action="store_true", help="Check batched local decoding against single clips")
+    parser.add_argument("--max-wer", type=float, default=0.02, help="Allowed batched vs single WER in --smoke")
+    args = parser.parse_args()
+
+    clips = referenced_clips(args.dir)
+    if not clips:
+        print(f"No recordings with saved transcripts in {args.dir}")
+        return
+    if args.smoke:
+        sys.exit(0 if smoke(clips, args.max_wer) else 1)
+    print(f"{len(clips)} recordings with reference transcripts\n")
+    for name in args.engines.split(","):
+        try:
+            run_engine(name.strip(), clips)
+        except (ValueError, RuntimeError) as e:
+            print(f"{name}: skipped ({e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Upload size and Whisper latency with and without recording preprocessing.
+
+Runs every recording in a directory through ``prepare_recording`` and reports
+what would be uploaded: bytes, speech kept and clips skipped for having no
+speech. With ``--whisper`` (needs OPENAI_API_KEY) each clip is also
+transcribed both ways to compare end-to-end STT latency.
+
+Run with: python -m benchmarks.stt_preprocessing [--dir recordings] [--whisper]
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+
+from core.stt_preprocessing import prepare_recording, upload_format
+
+
+def whisper_latency(client, name: str, data: bytes):
+    start = time.perf_counter()
+    text = client.audio.transcriptions.create(model="whisper-1", file=(name, data)).text
+    return time.perf_counter() - start, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STT preprocessing benchmark")
+    parser.add_argument("--dir", default="recordings", help="Directory of *.wav recordings")
+    parser.add_argument("--format", default=None, help="opus, ulaw or wav (default: auto)")
+    parser.add_argument("--whisper", action="store_true", help="Also time Whisper on raw vs prepared audio")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.dir, "*.wav")))
+    if not paths:
+        print(f"No recordings found in {args.dir}")
+        return
+    fmt = args.format or upload_format()
+    client = None
+    if args.whisper:
+        from openai import OpenAI
+        client = OpenAI()
+
+    original = uploaded = 0
+    duration = speech = 0.0
+    prepare_times, raw_latency, prepared_latency = [], [], []
+    skipped = []
+    for path in paths:
+        start = time.perf_counter()
+        prepared = prepare_recording(path, fmt=fmt)
+        prepare_times.append(time.perf_counter() - start)
+        original += prepared.original_bytes
+        uploaded += prepared.uploaded_bytes
+        duration += prepared.duration_s
+        speech += prepared.speech_s
+        if not prepared.has_speech:
+            skipped.append(os.path.basename(path))
+        if client:
+            with open(path, "rb") as f:
+                latency, raw_text = whisper_latency(client, os.path.basename(path), f.read())
+            raw_latency.append(latency)
+            if prepared.has_speech:
+                latency, text = whisper_latency(client, prepared.filename, prepared.data)
+            else:
+                latency, text = 0.0, ""
+            prepared_latency.append(latency)
+            print(f"  {os.path.basename(path)}: raw={raw_text!r} prepared={text!r}")
+
+    print(f"{len(paths)} recordings, upload format {fmt}")
+    print(f"  audio kept:     {speech:.1f}s of {duration:.1f}s ({speech / duration:.0%})")
+    print(f"  upload bytes:   {uploaded:,} vs {original:,} as recorded ({original / max(uploaded, 1):.1f}x smaller)")
+    print(f"  no speech:      {len(skipped)} clip(s) answered without an API call {skipped}")
+    print(f"  preprocessing:  median {statistics.median(prepare_times) * 1000:.1f}ms per clip")
+    if client:
+        print(f"  Whisper median: {statistics.median(raw_latency):.2f}s as recorded, "
+              f"{statistics.median(prepared_latency):.2f}s prepared")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Offline benchmark suite for the call turn loop and the evaluation pipeline.
+
+Every provider is a local stand-in (see ``core/replay.py``), so results only
+move when our code does. It measures:
+
+- webhook throughput (turns/s) and per-turn latency percentiles with N calls
+  in flight at once, against the real server running under uvicorn
+- Python memory held per live call session
+- ``CheckRunner.evaluate`` time per transcript, and per check type
+- corpus evaluation throughput (``CorpusEvaluation`` over a directory)
+
+Results are written as JSON. ``--baseline`` compares against an earlier
+result and exits non-zero when any metric is worse by more than
+``--threshold`` percent (and by more than a small absolute noise floor).
+Metrics ending in ``_per_s`` are better when higher; all others are better
+when lower.
+
+Run with: python -m benchmarks.suite [--quick] [--output benchmarks/results/latest.json]
+                                     [--baseline benchmarks/results/main.json] [--threshold 15]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from .content_matcher import make_transcripts
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Smallest absolute change worth flagging, by metric suffix
+NOISE_FLOOR = {"_ms": 0.05, "_bytes": 512}
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class FakeJudgeClient:
+    """OpenAI-shaped client answering every LLM check with a confident pass."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        time.sleep(self.latency)
+        content = json.dumps({"answer": "yes", "passed": True, "confidence": 0.95, "evidence": "stand-in"})
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=20, total_tokens=prompt_tokens + 20)
+        )
+
+
+def install_judges(runner, latency: float):
+    for check in runner.checks:
+        if check.uses_llm:
+            check._client = FakeJudgeClient(latency)
+
+
+def sample_recording(directory: str) -> str:
+    """A recorded user turn from recordings/, or a synthetic one if there are none."""
+    recordings = os.path.join(ROOT, "recordings")
+    if os.path.isdir(recordings):
+        for name in sorted(os.listdir(recordings)):
+            if name.endswith("_user.wav"):
+                return os.path.join(recordings, name)
+    path = os.path.join(directory, "sample_user.wav")
+    rng = np.random.default_rng(5)
+    t = np.arange(3 * 8000) / 8000
+    samples = (np.sin(2 * np.pi * 180 * t) * 6000 + rng.normal(0, 300, t.size)).astype("<i2")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(samples.tobytes())
+    return path
+
+
+def start_server(app):
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def run_call(base_url: str, sid: str, wav: str, turns: int):
+    """One call: /voice, then ``turns`` recordings; returns per-turn latencies in ms."""
+    import requests
+
+    latencies = []
+    with requests.Session() as session:
+        session.post(f"{base_url}/voice?scenario=scheduling", data={"CallSid": sid}).raise_for_status()
+        for _ in range(turns):
+            start = time.perf_counter()
+            session.post(f"{base_url}/record", data={
+                "CallSid": sid, "RecordingUrl": wav, "RecordingDuration": "3"
+            }).raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def bench_webhooks(args, wav: str, metrics: dict):
+    from core import server
+    from core.replay import ReferenceSTT, ReplayAudioManager, StandInChatClient, install_stand_ins
+
+    server._components["audio_manager"] = ReplayAudioManager(base_dir="calls")
+    install_stand_ins(ReferenceSTT(args.stt_latency), lambda: StandInChatClient(args.llm_latency), args.tts_latency)
+    uvicorn_server, base_url = start_server(server.create_app(init=False))
+    try:
+        for level in args.concurrency:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=level) as pool:
+                results = list(pool.map(
+                    lambda i: run_call(base_url, f"BENCH{level}x{i}", wav, args.turns_per_call), range(level)
+                ))
+            elapsed = time.perf_counter() - start
+            latencies = [ms for call in results for ms in call]
+            prefix = f"webhook.c{level}"
+            metrics[f"{prefix}.turns_per_s"] = round(len(latencies) / elapsed, 2)
+            metrics[f"{prefix}.turn_p50_ms"] = round(statistics.median(latencies), 1)
+            metrics[f"{prefix}.turn_p95_ms"] = round(percentile(latencies, 0.95), 1)
+            metrics[f"{prefix}.turn_p99_ms"] = round(percentile(latencies, 0.99), 1)
+            print(f"  {level:>3} concurrent calls: {metrics[f'{prefix}.turns_per_s']:7.1f} turns/s, "
+                  f"p50 {metrics[f'{prefix}.turn_p50_ms']:.0f}ms, p95 {metrics[f'{prefix}.turn_p95_ms']:.0f}ms, "
+                  f"p99 {metrics[f'{prefix}.turn_p99_ms']:.0f}ms")
+    finally:
+        uvicorn_server.should_exit = True
+
+
+def bench_session_memory(args, metrics: dict):
+    from fastapi.testclient import TestClient
+    from core import server
+    from core.replay import ReferenceSTT, StandInChatClient, install_stand_ins
+
+    install_stand_ins(ReferenceSTT(), lambda: StandInChatClient(), 0.0)
+    client = TestClient(server.create_app(init=False))
+    client.post("/voice?scenario=scheduling", data={"CallSid": "WARMUP"})
+    sids = [f"MEM{i}" for i in range(args.sessions)]
+    tracemalloc.start()
+    gc.collect()
+    before, _ = tracemalloc.get_traced_memory()
+    for sid in sids:
+        client.post("/voice?scenario=scheduling", data={"CallSid": sid})
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    metrics["session.memory_bytes"] = round((after - before) / len(sids))
+    print(f"  {metrics['session.memory_bytes'] / 1024:.1f} KiB per live session ({len(sids)} sessions)")
+    for sid in ["WARMUP"] + sids:
+        writer = server.call_transcripts.pop(sid, None)
+        if writer:
+            writer.close("benchmark")
+        server.call_sessions.pop(sid, None)
+
+
+def bench_checks(args, metrics: dict):
+    from evaluation.check_runner import CheckRunner
+    from evaluation.checks.transcript_view import TranscriptView
+
+    runner = CheckRunner(args.checks)
+    install_judges(runner, args.judge_latency)
+    transcripts = make_transcripts(args.transcripts, args.transcript_turns)
+    # Best of several rounds: sub-millisecond timings are otherwise mostly noise
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for transcript in transcripts:
+            runner.evaluate(transcript)
+        best = min(best, time.perf_counter() - start)
+    metrics["checks.evaluate_ms"] = round(best * 1000 / len(transcripts), 3)
+
+    views = [TranscriptView(transcript) for transcript in transcripts]
+    by_type = {}
+    for check in runner.checks:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for view in views:
+                check.evaluate(view)
+            best = min(best, time.perf_counter() - start)
+        by_type[check.check_type] = by_type.get(check.check_type, 0.0) + best
+    for check_type, seconds in sorted(by_type.items()):
+        metrics[f"checks.{check_type}_ms"] = round(seconds * 1000 / len(views), 3)
+    breakdown = ", ".join(f"{t} {seconds * 1000 / len(views):.2f}ms" for t, seconds in sorted(by_type.items()))
+    print(f"  CheckRunner.evaluate: {metrics['checks.evaluate_ms']:.2f}ms per transcript ({breakdown})")
+
+
+def bench_corpus(args, metrics: dict):
+    from evaluation.driver import CUSTOM_EVAL, CorpusEvaluation
+    from evaluation.reporter import Reporter
+
+    os.makedirs("corpus", exist_ok=True)
+    for i, transcript in enumerate(make_transcripts(args.corpus, args.transcript_turns, seed=13)):
+        with open(os.path.join("corpus", f"CORPUS{i:05d}_transcript.json"), "w") as f:
+            json.dump(transcript, f)
+    evaluation = CorpusEvaluation(CUSTOM_EVAL, Reporter(), args.checks, progress_interval=3600)
+    install_judges(evaluation.evaluator.runner, args.judge_latency)
+    rates = []
+    for _ in range(args.repeat):
+        totals = evaluation.run("corpus", force=True)
+        rates.append(totals["processed"] / max(totals["elapsed_s"], 1e-9))
+    metrics["corpus.transcripts_per_s"] = round(max(rates), 2)
+    print(f"  CorpusEvaluation: {metrics['corpus.transcripts_per_s']:.1f} transcripts/s "
+          f"({totals['processed']} transcripts, {totals['failed']} failed)")
+
+
+def compare(metrics: dict, baseline: dict, threshold: float):
+    """(name, old, new, change %) for every shared metric, and the regressions among them."""
+    rows, regressions = [], []
+    for name, new in metrics.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        change = (new - old) / old * 100
+        rows.append((name, old, new, change))
+        worse = -change if name.endswith("_per_s") else change
+        floor = next((value for suffix, value in NOISE_FLOOR.items() if name.endswith(suffix)), 0)
+        if worse > threshold and abs(new - old) >= floor:
+            regressions.append(name)
+    return rows, regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="Smaller workloads for a fast smoke run")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrent call counts")
+    parser.add_argument("--turns-per-call", type=int, default=6)
+    parser.add_argument("--stt-latency", type=float, default=0.02, help="Seconds added by the STT stand-in")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds added by the LLM stand-in")
+    parser.add_argument("--tts-latency", type=float, default=0.02, help="Seconds added by the TTS stand-in")
+    parser.add_argument("--judge-latency", type=float, default=0.0, help="Seconds added by each LLM check")
+    parser.add_argument("--sessions", type=int, default=200, help="Live sessions for the memory measurement")
+    parser.add_argument("--checks", default=os.path.join(ROOT, "checks", "scheduling.yaml"))
+    parser.add_argument("--transcripts", type=int, default=200, help="Transcripts for the CheckRunner timing")
+    parser.add_argument("--transcript-turns", type=int, default=30)
+    parser.add_argument("--corpus", type=int, default=500, help="Transcripts for corpus throughput")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds of each evaluation timing; the best counts")
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results", "latest.json"))
+    parser.add_argument("--baseline", help="Earlier result to compare against")
+    parser.add_argument("--threshold", type=float, default=15.0, help="Percent worse that counts as a regression")
+    args = parser.parse_args()
+    if args.quick:
+        args.concurrency, args.turns_per_call = "1,4", 3
+        args.sessions, args.transcripts, args.corpus = 50, 50, 100
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    args.checks = os.path.abspath(args.checks)
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    # Stand-ins never rate limit, so neither should the shared limiter
+    os.environ.update({"OPENAI_RPM": "1000000", "OPENAI_TPM": "1000000000", "OPENAI_MAX_CONCURRENCY": "256"})
+    metrics = {}
+    started = time.time()
+    # Servers, reports and transcripts write relative to the working directory
+    with tempfile.TemporaryDirectory(prefix="bench-") as work_dir:
+        os.chdir(work_dir)
+        if ROOT not in sys.path:
+            sys.path.insert(0, ROOT)
+        wav = sample_recording(work_dir)
+        print("Call turn loop:")
+        bench_webhooks(args, wav, metrics)
+        bench_session_memory(args, metrics)
+        print("Evaluation:")
+        bench_checks(args, metrics)
+        bench_corpus(args, metrics)
+        os.chdir(ROOT)
+
+    result = {
+        "created_at": started,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "metrics": metrics,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(metrics, baseline.get("metrics", {}), args.threshold)
+        print(f"\nAgainst {baseline_path} ({baseline.get('commit') or 'unknown commit'}):")
+        for name, old, new, change in rows:
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"  {name:<32} {old:>12g} -> {new:<12g} {change:+6.1f}%{flag}")
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:g}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Bytes served per TTS turn: provider-default MP3 vs the telephony profile.
+
+Synthesizes a speech-like test signal at OpenAI's PCM rate (24kHz), converts
+it the way the telephony profile does, and compares per-turn file sizes with
+the MP3 the provider would otherwise return. MP3 sizes are measured with
+ffmpeg when it is installed and computed from the bitrate otherwise.
+
+Run with: python -m benchmarks.telephony_audio [--seconds S]
+"""
+import argparse
+import io
+import shutil
+import time
+
+import numpy as np
+
+from core.telephony_audio import OPENAI_PCM_RATE, mulaw_wav, pcm16_to_mulaw_wav
+
+# ElevenLabs' default output format is mp3_44100_128
+DEFAULT_MP3_KBPS = 128
+
+
+def speech_like_pcm(seconds: float, rate: int = OPENAI_PCM_RATE) -> bytes:
+    """Amplitude-modulated harmonics with noise, roughly voice-shaped."""
+    t = np.arange(int(seconds * rate)) / rate
+    pitch = 140 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 3 * t)) ** 2
+    signal = voice * envelope + 0.02 * np.random.default_rng(0).standard_normal(len(t))
+    signal = signal / np.abs(signal).max() * 0.8
+    return (signal * 32767).astype("<i2").tobytes()
+
+
+def mp3_bytes(pcm: bytes, seconds: float):
+    if shutil.which("ffmpeg"):
+        from pydub import AudioSegment
+        buffer = io.BytesIO()
+        segment = AudioSegment(data=pcm, sample_width=2, frame_rate=OPENAI_PCM_RATE, channels=1)
+        segment.set_frame_rate(44100).export(buffer, format="mp3", bitrate=f"{DEFAULT_MP3_KBPS}k")
+        return len(buffer.getvalue()), "measured"
+    return int(seconds * DEFAULT_MP3_KBPS * 1000 / 8), "from bitrate"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telephony audio size benchmark")
+    parser.add_argument("--seconds", type=float, default=4.0, help="Length of a typical bot turn")
+    args = parser.parse_args()
+
+    pcm = speech_like_pcm(args.seconds)
+    mp3_size, mp3_source = mp3_bytes(pcm, args.seconds)
+
+    start = time.perf_counter()
+    telephony = pcm16_to_mulaw_wav(pcm)
+    transcode = time.perf_counter() - start
+    native = mulaw_wav(b"\xff" * int(args.seconds * 8000))
+
+    print(f"Bytes served per {args.seconds:.0f}s turn")
+    print(f"  MP3 128kbps (provider default, {mp3_source}): {mp3_size:>8,}")
+    print(f"  OpenAI pcm, before conversion:             {len(pcm):>8,}")
+    print(f"  μ-law 8kHz WAV from OpenAI pcm:            {len(telephony):>8,}  "
+          f"(converted in {transcode * 1000:.1f}ms, cached afterwards)")
+    print(f"  μ-law 8kHz WAV from ElevenLabs ulaw_8000:  {len(native):>8,}  (header only, no transcoding)")
+    print(f"  Reduction vs MP3: {mp3_size / len(telephony):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Exercise TTS hedging and circuit breaking against two local fake providers.
+
+Starts fake ElevenLabs and OpenAI speech servers with injected latency and
+errors, points the Synthesizer at them and reports per-turn latency for a few
+failure modes.
+
+Run with: python -m benchmarks.tts_hedging [--turns N]
+"""
+import argparse
+import os
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeProvider:
+    """Injected behaviour of one fake TTS server."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.base_latency = 0.05
+        self.slow_rate = 0.0
+        self.slow_latency = 0.0
+        self.error_rate = 0.0
+        self.requests = 0
+
+    def configure(self, base_latency=0.05, slow_rate=0.0, slow_latency=0.0, error_rate=0.0):
+        self.base_latency = base_latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+
+    def serve(self) -> ThreadingHTTPServer:
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                provider.requests += 1
+                latency = provider.base_latency
+                if random.random() < provider.slow_rate:
+                    latency = provider.slow_latency
+                time.sleep(latency)
+                if random.random() < provider.error_rate:
+                    self.send_response(500)
+                    self.end_headers()
+                    self.wfile.write(b"injected failure")
+                    return
+                body = f"{provider.name}-audio".encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "audio/mpeg")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def run_turns(synthesizer, turns: int):
+    latencies, winners = [], {}
+    for i in range(turns):
+        start = time.perf_counter()
+        audio = synthesizer.synthesize_bytes(f"Turn {i}: I'd like to book an appointment.")
+        latencies.append(time.perf_counter() - start)
+        winner = audio.decode().split("-")[0] if audio else "none"
+        winners[winner] = winners.get(winner, 0) + 1
+    return latencies, winners
+
+
+def report(label, latencies, winners, synthesizer):
+    ordered = sorted(latencies)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    print(f"{label}")
+    print(f"  p50={statistics.median(latencies)*1000:.0f}ms p95={p95*1000:.0f}ms max={max(latencies)*1000:.0f}ms "
+          f"served_by={winners}")
+    breakers = {name: b.state for name, b in synthesizer.breakers.items()}
+    print(f"  stats={synthesizer.stats} breakers={breakers}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS hedging benchmark")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--slo", type=float, default=1.0)
+    args = parser.parse_args()
+
+    primary, secondary = FakeProvider("elevenlabs"), FakeProvider("openai")
+    primary_server, secondary_server = primary.serve(), secondary.serve()
+    os.environ.update({
+        "ELEVENLABS_API_KEY": "fake",
+        "OPENAI_API_KEY": "fake",
+        "ELEVENLABS_BASE_URL": f"http://127.0.0.1:{primary_server.server_port}",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{secondary_server.server_port}/v1",
+        "TTS_LATENCY_SLO": str(args.slo),
+        "TTS_HEDGE_DELAY": "0.3",
+        "TTS_BREAKER_RESET": "2",
+        # Fake audio is passed through untouched and never cached
+        "TTS_AUDIO_PROFILE": "mp3",
+        "TTS_CACHE": "0",
+    })
+    from core.synthesizer import Synthesizer
+
+    scenarios = [
+        ("Healthy primary (50ms)", dict(base_latency=0.05), dict(base_latency=0.08)),
+        ("Primary tail: 10% of requests take 3s", dict(base_latency=0.05, slow_rate=0.1, slow_latency=3.0),
+         dict(base_latency=0.08)),
+        ("Primary down: every request fails after 200ms", dict(base_latency=0.2, error_rate=1.0),
+         dict(base_latency=0.08)),
+        ("Primary slow: every request takes 2s (over the SLO)", dict(base_latency=2.0),
+         dict(base_latency=0.08)),
+    ]
+    for label, primary_config, secondary_config in scenarios:
+        primary.configure(**primary_config)
+        secondary.configure(**secondary_config)
+        synthesizer = Synthesizer()
+        latencies, winners = run_turns(synthesizer, args.turns)
+        report(label, latencies, winners, synthesizer)
+
+    print("\nWithout hedging (primary only), 10% tail:")
+    primary.configure(base_latency=0.05, slow_rate=0.1, slow_latency=3.0)
+    synthesizer = Synthesizer()
+    synthesizer.providers = ["elevenlabs"]
+    latencies, winners = run_turns(synthesizer, min(args.turns, 60))
+    report("  primary only", latencies, winners, synthesizer)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ class AudioManager:
         self.base_dir = base_dir
         self.twilio_account_sid = twilio_account_sid
         self.twilio_auth_token = twilio_auth_token
+        self.transcript_listeners = []
         if not os.path.exists(self.base_dir):
             os.makedirs(self.base_dir)
 
@@ -47,9 +48,47 @@ class AudioManager:
         filename = f"{call_sid}_transcript.json"
         file_path = os.path.join(self.base_dir, filename)
         try:
-            with open(file_path, "w") as f:
+            # Write then rename so watchers never see a partial file
+            tmp_path = file_path + ".tmp"
+            with open(tmp_path, "w") as f:
                 json.dump(history, f, indent=2)
-            return file_path
+            os.replace(tmp_path, file_path)
         except Exception as e:
             print(f"Error saving transcript: {e}")
             return None
+        
+        self._notify(call_sid, file_path)
+        return file_path
+
+    def open_transcript(self, call_sid: str, scenario: str, model: str = None):
+        """
+        Starts the call's incremental transcript (see core/transcript_log.py).
+        """
+        from .transcript_log import TranscriptWriter
+        return TranscriptWriter(self.base_dir, call_sid, scenario, model=model)
+
+    def finish_transcript(self, writer, reason: str = "hangup"):
+        """
+        Closes an incremental transcript and notifies the transcript listeners.
+        """
+        try:
+            file_path = writer.close(reason)
+        except Exception as e:
+            print(f"Error finishing transcript: {e}")
+            return None
+        self._notify(writer.call_id, file_path)
+        return file_path
+
+    def _notify(self, call_sid: str, file_path: str):
+        for listener in self.transcript_listeners:
+            try:
+                listener(call_sid, file_path)
+            except Exception as e:
+                print(f"Error in transcript listener: {e}")
+
+    def add_transcript_listener(self, listener):
+        """
+        Registers a callback(call_sid, file_path) run after each transcript is saved.
+        Listeners run on the request path, so they must return quickly.
+        """
+        self.transcript_listeners.append(listener)
@@ -0,0 +1,328 @@
+"""Single-file archive of one call's audio, with an index for random access.
+
+Layout of ``{call_sid}.calla``::
+
+    b"CALLAUD1"            magic and format version
+    uint32 little-endian   length of the JSON index that follows
+    JSON index             {"version", "call_id", "turns": [entry, ...]}
+    turn data              every turn's payload, back to back, in call order
+
+Each index entry records the turn number, speaker ("bot" or "user"), codec,
+compression, sample rate, duration and the payload's offset (from the start
+of the turn data) and length. User turns are stored as 8kHz μ-law, which is
+what the phone line carried, compressed with LZMA, or as Opus when ffmpeg is
+available. Bot turns are kept in the encoding they were served in.
+
+``CallArchive`` memory-maps a file to read any turn without touching the
+rest; ``iter_archive`` and ``iter_corpus`` stream turns in file order for
+corpus-wide analysis.
+"""
+import io
+import json
+import lzma
+import mmap
+import os
+import re
+import struct
+import wave
+import zipfile
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .telephony_audio import TELEPHONY_RATE, WAVE_FORMAT_MULAW, mulaw_wav
+
+try:
+    import audioop
+except ImportError:  # Python 3.13+: pydub ships a pure-Python fallback
+    from pydub import pyaudioop as audioop
+
+MAGIC = b"CALLAUD1"
+ARCHIVE_SUFFIX = ".calla"
+TURN_FILE = re.compile(r"^(?P<call_id>.+)_(?P<turn>\d+)_(?P<speaker>user|bot)\.(?P<ext>\w+)$")
+
+# MPEG-1 Layer III bitrates (kbps) by header index, for bot audio durations
+MP3_BITRATES = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0]
+
+
+@dataclass
+class TurnEntry:
+    turn: int
+    speaker: str
+    codec: str
+    compression: str
+    sample_rate: int
+    duration_s: float
+    offset: int
+    length: int
+    name: str
+
+
+def mp3_duration(data: bytes) -> float:
+    """Duration of constant-bitrate MP3 audio, estimated from its first frame."""
+    start = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = data[6] << 21 | data[7] << 14 | data[8] << 7 | data[9]
+        start = 10 + size
+    for i in range(start, min(len(data) - 4, start + 4096)):
+        if data[i] == 0xFF and data[i + 1] & 0xE0 == 0xE0:
+            kbps = MP3_BITRATES[data[i + 2] >> 4]
+            if kbps:
+                return (len(data) - i) * 8 / (kbps * 1000)
+    return 0.0
+
+
+def read_wav(data: bytes) -> Tuple[bytes, int, str]:
+    """(samples, sample rate, "ulaw" or "pcm16") from a mono or stereo WAV file."""
+    if data[20:22] == struct.pack("<H", WAVE_FORMAT_MULAW):
+        # Our own μ-law files (see telephony_audio.mulaw_wav); wave can't read them
+        rate = struct.unpack("<I", data[24:28])[0]
+        index = data.find(b"data", 36)
+        size = struct.unpack("<I", data[index + 4:index + 8])[0]
+        return data[index + 8:index + 8 + size], rate, "ulaw"
+    with wave.open(io.BytesIO(data)) as w:
+        pcm = w.readframes(w.getnframes())
+        if w.getsampwidth() != 2:
+            pcm = audioop.lin2lin(pcm, w.getsampwidth(), 2)
+        if w.getnchannels() == 2:
+            pcm = audioop.tomono(pcm, 2, 0.5, 0.5)
+        return pcm, w.getframerate(), "pcm16"
+
+
+def encode_user_turn(data: bytes, codec: str = "ulaw") -> Tuple[bytes, str, str, int, float]:
+    """(payload, codec, compression, sample rate, duration) for a user recording."""
+    samples, rate, fmt = read_wav(data)
+    if fmt == "ulaw":
+        samples = audioop.ulaw2lin(samples, 2)
+    if codec == "opus":
+        from pydub import AudioSegment
+        buffer = io.BytesIO()
+        AudioSegment(data=samples, sample_width=2, frame_rate=rate, channels=1).export(
+            buffer, format="ogg", codec="libopus", bitrate="16k"
+        )
+        return buffer.getvalue(), "opus", "none", rate, len(samples) / 2 / rate
+    if rate != TELEPHONY_RATE:
+        samples, _ = audioop.ratecv(samples, 2, 1, rate, TELEPHONY_RATE, None)
+    ulaw = audioop.lin2ulaw(samples, 2)
+    return lzma.compress(ulaw), "ulaw", "lzma", TELEPHONY_RATE, len(ulaw) / TELEPHONY_RATE
+
+
+def encode_bot_turn(data: bytes, ext: str) -> Tuple[bytes, str, str, int, float]:
+    if ext == "wav":
+        samples, rate, fmt = read_wav(data)
+        if fmt == "ulaw":
+            return lzma.compress(samples), "ulaw", "lzma", rate, len(samples) / rate
+        return encode_user_turn(data)
+    return data, ext, "none", 0, mp3_duration(data) if ext == "mp3" else 0.0
+
+
+def pack_turn(turn: int, speaker: str, name: str, data: bytes, codec: str = "ulaw") -> Tuple[TurnEntry, bytes]:
+    """Encode one turn's file for the archive; offsets are set by write_archive."""
+    if speaker == "user":
+        payload, turn_codec, compression, rate, duration = encode_user_turn(data, codec)
+    else:
+        payload, turn_codec, compression, rate, duration = encode_bot_turn(data, name.rsplit(".", 1)[-1])
+    return TurnEntry(turn, speaker, turn_codec, compression, rate, round(duration, 3), 0, len(payload), name), payload
+
+
+def write_archive(path: str, call_id: str, turns: List[Tuple[TurnEntry, bytes]]) -> List[TurnEntry]:
+    """Write packed turns to ``path`` in call order: the bot's prompt, then the user's reply."""
+    turns = sorted(turns, key=lambda t: (t[0].turn, 0 if t[0].speaker == "bot" else 1))
+    entries, offset = [], 0
+    for entry, payload in turns:
+        entries.append(replace(entry, offset=offset, length=len(payload)))
+        offset += len(payload)
+
+    index = json.dumps({"version": 1, "call_id": call_id, "turns": [asdict(e) for e in entries]}).encode()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(index)) + index)
+        for _, payload in turns:
+            f.write(payload)
+    os.replace(tmp_path, path)
+    return entries
+
+
+def _read_header(f) -> Tuple[Dict, int]:
+    head = f.read(len(MAGIC) + 4)
+    if head[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a call audio archive")
+    (size,) = struct.unpack("<I", head[len(MAGIC):])
+    return json.loads(f.read(size)), len(head) + size
+
+
+def decode_payload(entry: TurnEntry, payload: bytes) -> bytes:
+    """The turn's audio in its codec, with archive compression removed."""
+    return lzma.decompress(payload) if entry.compression == "lzma" else bytes(payload)
+
+
+def turn_pcm(entry: TurnEntry, audio: bytes) -> np.ndarray:
+    """16-bit PCM samples at ``entry.sample_rate`` for μ-law and Opus turns."""
+    if entry.codec == "ulaw":
+        return np.frombuffer(audioop.ulaw2lin(audio, 2), dtype="<i2")
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(io.BytesIO(audio), format="ogg" if entry.codec == "opus" else entry.codec)
+    segment = segment.set_channels(1).set_sample_width(2)
+    if entry.sample_rate:
+        segment = segment.set_frame_rate(entry.sample_rate)
+    return np.frombuffer(segment.raw_data, dtype="<i2")
+
+
+class CallArchive:
+    """Random access to the turns of one archived call via a memory map."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            header, self._data_start = _read_header(self._file)
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self.call_id = header["call_id"]
+        self.turns = [TurnEntry(**entry) for entry in header["turns"]]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def find(self, turn: int, speaker: str = "user") -> Optional[TurnEntry]:
+        for entry in self.turns:
+            if entry.turn == turn and entry.speaker == speaker:
+                return entry
+        return None
+
+    def payload(self, entry: TurnEntry) -> memoryview:
+        """The stored bytes of a turn, without copying."""
+        start = self._data_start + entry.offset
+        return memoryview(self._map)[start:start + entry.length]
+
+    def audio(self, entry: TurnEntry) -> bytes:
+        return decode_payload(entry, self.payload(entry))
+
+    def pcm(self, entry: TurnEntry) -> np.ndarray:
+        return turn_pcm(entry, self.audio(entry))
+
+    def playable(self, entry: TurnEntry) -> Tuple[str, bytes]:
+        """(file extension, bytes) that a player or Whisper can open."""
+        audio = self.audio(entry)
+        if entry.codec == "ulaw":
+            return "wav", mulaw_wav(audio, entry.sample_rate)
+        return ("ogg" if entry.codec == "opus" else entry.codec), audio
+
+
+def iter_archive(path: str) -> Iterator[Tuple[TurnEntry, bytes]]:
+    """Stream (entry, decoded audio) for each turn, reading the file once in order."""
+    with open(path, "rb") as f:
+        header, _ = _read_header(f)
+        for raw in header["turns"]:
+            entry = TurnEntry(**raw)
+            yield entry, decode_payload(entry, f.read(entry.length))
+
+
+def iter_corpus(directory: str) -> Iterator[Tuple[str, TurnEntry, bytes]]:
+    """Stream (call_id, entry, decoded audio) over every archive in a directory."""
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(ARCHIVE_SUFFIX):
+            call_id = name[:-len(ARCHIVE_SUFFIX)]
+            for entry, audio in iter_archive(os.path.join(directory, name)):
+                yield call_id, entry, audio
+
+
+def read_packed(path: str) -> List[Tuple[TurnEntry, bytes]]:
+    """Turns already in an archive, ready to be written again without re-encoding."""
+    with CallArchive(path) as archive:
+        return [(entry, bytes(archive.payload(entry))) for entry in archive.turns]
+
+
+def archived_names(path: str) -> Set[str]:
+    """File names of the turns in an archive, read from its index alone."""
+    with open(path, "rb") as f:
+        header, _ = _read_header(f)
+    return {entry["name"] for entry in header["turns"]}
+
+
+def collect_call_files(call_id: str, directories: List[str]) -> Dict[str, str]:
+    """Loose turn files for a call, keyed by file name, from the given directories."""
+    found = {}
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            match = TURN_FILE.match(entry.name) if entry.is_file() else None
+            if match and match["call_id"] == call_id:
+                found[entry.name] = entry.path
+    return found
+
+
+def convert_directories(
+    recordings_dir: str = "recordings",
+    static_dir: str = "static",
+    archive_dir: Optional[str] = None,
+    codec: str = "ulaw",
+    remove_sources: bool = True
+) -> Dict:
+    """Pack every call's loose turn files and zip bundles into archives.
+
+    Packed user recordings and zip bundles are removed when ``remove_sources``
+    is set; bot audio in ``static_dir`` is left to the storage manager.
+    """
+    archive_dir = archive_dir or os.path.join(recordings_dir, "archive")
+    os.makedirs(archive_dir, exist_ok=True)
+    call_ids = set()
+    for directory in (recordings_dir, static_dir):
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                match = TURN_FILE.match(name)
+                if match:
+                    call_ids.add(match["call_id"])
+    for name in os.listdir(archive_dir):
+        if name.endswith(".zip"):
+            call_ids.add(name[:-len(".zip")])
+
+    totals = {"calls": 0, "turns": 0, "source_bytes": 0, "archive_bytes": 0}
+    for call_id in sorted(call_ids):
+        turns: Dict[str, Tuple[TurnEntry, bytes]] = {}
+        sources = []
+        archive_path = os.path.join(archive_dir, f"{call_id}{ARCHIVE_SUFFIX}")
+        if os.path.exists(archive_path):
+            for entry, payload in read_packed(archive_path):
+                turns[entry.name] = (entry, payload)
+            totals["source_bytes"] += os.path.getsize(archive_path)
+        bundle = os.path.join(archive_dir, f"{call_id}.zip")
+        if os.path.exists(bundle):
+            with zipfile.ZipFile(bundle) as archive:
+                for name in archive.namelist():
+                    match = TURN_FILE.match(name)
+                    if match:
+                        turns[name] = pack_turn(int(match["turn"]), match["speaker"], name, archive.read(name), codec)
+            totals["source_bytes"] += os.path.getsize(bundle)
+            sources.append(bundle)
+        for name, path in collect_call_files(call_id, [recordings_dir, static_dir]).items():
+            match = TURN_FILE.match(name)
+            with open(path, "rb") as f:
+                turns[name] = pack_turn(int(match["turn"]), match["speaker"], name, f.read(), codec)
+            totals["source_bytes"] += os.path.getsize(path)
+            if match["speaker"] == "user":
+                sources.append(path)
+        if not turns:
+            continue
+        write_archive(archive_path, call_id, list(turns.values()))
+        totals["calls"] += 1
+        totals["turns"] += len(turns)
+        totals["archive_bytes"] += os.path.getsize(archive_path)
+        if remove_sources:
+            for path in sources:
+                os.remove(path)
+    return totals
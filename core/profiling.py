@@ -0,0 +1,177 @@
+"""Sampling profiler for the webhook and evaluation hot paths.
+
+A background thread snapshots every other thread's Python stack with
+``sys._current_frames()`` every few milliseconds. Nothing is instrumented,
+so code runs at full speed between samples and there is no cost at all
+while the profiler is stopped. Because samples are wall-clock, time spent
+waiting on a provider shows up under the socket read that is waiting, next
+to the Python, JSON/YAML and disk work of the same turn.
+
+Output is in the folded-stack format that ``flamegraph.pl``, speedscope and
+inferno read: one line per distinct stack, frames from the thread down to
+the leaf separated by ``;``, followed by the sample count:
+
+    MainThread;run (main.py:1);evaluate (evaluation/driver.py:210);... 42
+
+Threads parked in a lock, queue or selector wait are dropped unless
+``include_idle`` is set, so idle pool workers don't swamp the graph.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Leaf frames that mean "this thread is waiting for work", not "this thread is slow"
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+Stack = Tuple[str, ...]
+
+
+class SamplingProfiler:
+    """Samples all thread stacks on a fixed interval and folds them for flame graphs."""
+
+    def __init__(self, interval: float = 0.005, max_samples: int = 100_000, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self.samples = 0
+        self._counts: Dict[Stack, int] = collections.Counter()
+        # Recent (timestamp, stack) samples, so a slow request can pull out its own window
+        self._timeline: Deque[Tuple[float, Stack]] = collections.deque(maxlen=max_samples)
+        self._labels: Dict[int, Tuple[object, str]] = {}
+        self._threads: Dict[int, str] = {}
+        self._root = os.getcwd() + os.sep
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.stopped_at = time.time()
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._timeline.clear()
+            self.samples = 0
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own)
+
+    def _label(self, code) -> str:
+        filename = code.co_filename
+        if filename.startswith(self._root):
+            filename = filename[len(self._root):]
+        else:
+            # Library frames are named by module path, e.g. json/decoder.py
+            for marker in ("site-packages" + os.sep, "python3." + str(sys.version_info.minor) + os.sep):
+                if marker in filename:
+                    filename = filename.split(marker, 1)[1]
+                    break
+        return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+    def _sample(self, own: int):
+        now = time.perf_counter()
+        labels = self._labels
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            frames = []
+            while frame is not None:
+                # Keyed by id() because hashing a code object is slow; the entry keeps the code alive
+                entry = labels.get(id(frame.f_code))
+                if entry is None:
+                    entry = labels[id(frame.f_code)] = (frame.f_code, self._label(frame.f_code))
+                frames.append(entry[1])
+                frame = frame.f_back
+            name = self._threads.get(ident)
+            if name is None:
+                self._threads = {thread.ident: thread.name for thread in threading.enumerate()}
+                name = self._threads.get(ident, f"thread-{ident}")
+            frames.append(name)
+            frames.reverse()
+            stacks.append(tuple(frames))
+        with self._lock:
+            self.samples += 1
+            for stack in stacks:
+                self._counts[stack] += 1
+                self._timeline.append((now, stack))
+
+    def folded(self, since: Optional[float] = None, until: Optional[float] = None) -> List[str]:
+        """Folded stack lines for everything sampled, or for a ``perf_counter`` window."""
+        with self._lock:
+            if since is None and until is None:
+                counts = dict(self._counts)
+            else:
+                counts = collections.Counter(
+                    stack for at, stack in self._timeline
+                    if (since is None or at >= since) and (until is None or at <= until)
+                )
+        return [f"{';'.join(stack)} {count}" for stack, count in sorted(counts.items(), key=lambda item: -item[1])]
+
+    def write(self, path: str, since: Optional[float] = None, until: Optional[float] = None) -> int:
+        """Write folded stacks to a file; returns the number of distinct stacks."""
+        lines = self.folded(since, until)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + ("\n" if lines else ""))
+        return len(lines)
+
+    def top(self, limit: int = 20) -> List[Dict]:
+        """Functions with the most samples, by self time (leaf frame) and total time."""
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values()) or 1
+        own: Dict[str, int] = collections.Counter()
+        inclusive: Dict[str, int] = collections.Counter()
+        for stack, count in counts.items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                inclusive[label] += count
+        return [
+            {"frame": label, "self": round(count / total, 4), "total": round(inclusive[label] / total, 4)}
+            for label, count in sorted(own.items(), key=lambda item: -item[1])[:limit]
+        ]
+
+    def status(self) -> Dict:
+        end = self.stopped_at or time.time()
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "stacks": len(self._counts),
+            "duration_s": round(end - self.started_at, 3) if self.started_at else 0.0,
+        }
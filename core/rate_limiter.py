@@ -0,0 +1,336 @@
+"""Shared rate limiting and adaptive concurrency for provider API calls.
+
+Every OpenAI and ElevenLabs request goes through a ``ProviderLimiter`` for its
+(provider, model). A limiter enforces requests-per-minute and tokens-per-minute
+budgets with token buckets, and caps concurrency with an AIMD limit: each
+success raises the limit by about one per round trip, while a 429 or a latency
+spike halves it. A 429 also pauses the whole limiter for the server's
+Retry-After (or an exponential backoff) before the request is retried.
+
+Live call traffic (``LIVE``) always goes ahead of waiting background
+evaluation traffic (``BACKGROUND``), and background work leaves one
+concurrency slot free for live calls.
+
+Limits default to ``DEFAULT_LIMITS`` and can be overridden per provider with
+environment variables, e.g. ``OPENAI_RPM``, ``OPENAI_TPM`` and
+``OPENAI_MAX_CONCURRENCY``. They apply per process.
+"""
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+LIVE = 0
+BACKGROUND = 1
+
+DEFAULT_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 200000, "max_concurrency": 32},
+    "elevenlabs": {"rpm": 120, "tpm": None, "max_concurrency": 5},
+}
+
+
+class RateLimited(Exception):
+    """Raised inside a limited call when the provider answered 429."""
+
+    def __init__(self, message: str = "rate limited", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return isinstance(error, RateLimited) or getattr(error, "status_code", None) == 429
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait according to Retry-After(-ms) headers, if present."""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_from(error: Exception) -> Optional[float]:
+    if isinstance(error, RateLimited):
+        return error.retry_after
+    response = getattr(error, "response", None)
+    return parse_retry_after(getattr(response, "headers", None))
+
+
+def estimate_tokens(*texts: str, completion: int = 0) -> int:
+    """Rough token count (~4 characters per token) for budgeting."""
+    return sum(len(text or "") for text in texts) // 4 + completion
+
+
+def openai_usage(response) -> Optional[int]:
+    """Total tokens reported by an OpenAI response, if any."""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+class TokenBucket:
+    """Continuously refilled budget of ``per_minute`` units."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        """Consume units; negative amounts refund. The level may go into debt."""
+        self.level = min(self.capacity, self.level - amount)
+
+
+class ProviderLimiter:
+    """Budgets and AIMD concurrency for one provider model."""
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        latency_tolerance: float = 2.5
+    ):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.latency_tolerance = latency_tolerance
+
+        # Start low and let additive increase find the provider's capacity
+        self.limit = float(min(self.max_concurrency, max(self.min_concurrency, 4)))
+        self.active = 0
+        self.waiting = {LIVE: 0, BACKGROUND: 0}
+        self.paused_until = 0.0
+        self.stats = {"calls": 0, "throttled": 0, "retries": 0, "decreases": 0}
+        self._ewma: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._samples = 0
+        self._last_decrease = 0.0
+        # Guards the counters, budgets and stats; _cond waits on the same lock
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+
+    def _slots(self, priority: int) -> int:
+        slots = int(self.limit)
+        if priority == BACKGROUND and slots > 1:
+            slots -= 1
+        return slots
+
+    def acquire(self, priority: int = BACKGROUND, tokens: int = 0):
+        """Block until a slot and budget are available for one request."""
+        with self._cond:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    timeout = self.paused_until - now
+                    if timeout <= 0:
+                        timeout = None
+                        yield_to_live = priority == BACKGROUND and self.waiting[LIVE] > 0
+                        if not yield_to_live and self.active < self._slots(priority):
+                            timeout = max(
+                                self.requests.wait_time(1, now) if self.requests else 0.0,
+                                self.tokens.wait_time(tokens, now) if self.tokens and tokens else 0.0,
+                            )
+                            if timeout <= 0:
+                                if self.requests:
+                                    self.requests.take(1)
+                                if self.tokens and tokens:
+                                    self.tokens.take(tokens)
+                                self.active += 1
+                                self.stats["calls"] += 1
+                                return
+                    self._cond.wait(timeout)
+            finally:
+                self.waiting[priority] -= 1
+                if priority == LIVE:
+                    # BACKGROUND waiters yielding to this one may be able to proceed now
+                    self._cond.notify_all()
+
+    def release(
+        self,
+        latency: float,
+        estimated_tokens: int = 0,
+        used_tokens: Optional[int] = None,
+        throttled: bool = False,
+        retry_after: Optional[float] = None
+    ):
+        """Return a slot and feed the outcome into the AIMD controller."""
+        with self._cond:
+            now = time.monotonic()
+            self.active -= 1
+            if self.tokens and used_tokens is not None:
+                self.tokens.take(used_tokens - estimated_tokens)
+            if throttled:
+                self.stats["throttled"] += 1
+                self.paused_until = max(self.paused_until, now + (retry_after or 0.0))
+                self._decrease(now)
+            else:
+                self._observe_latency(latency, now)
+            self._cond.notify_all()
+
+    def _observe_latency(self, latency: float, now: float):
+        self._samples += 1
+        self._ewma = latency if self._ewma is None else 0.8 * self._ewma + 0.2 * latency
+        # Baseline is the best smoothed latency seen, drifting up slowly so a
+        # permanently slower model is eventually accepted as normal.
+        self._baseline = self._ewma if self._baseline is None else min(self._baseline * 1.001, self._ewma)
+        if self._samples >= 20 and self._ewma > self.latency_tolerance * self._baseline:
+            self._decrease(now)
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+
+    def _decrease(self, now: float):
+        # At most one cut per second, so a burst of 429s halves the limit once
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit / 2)
+        self.stats["decreases"] += 1
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def call(
+        self,
+        func: Callable[[], Any],
+        priority: int = BACKGROUND,
+        tokens: int = 0,
+        usage: Optional[Callable[[Any], Optional[int]]] = None,
+        max_retries: Optional[int] = None
+    ) -> Any:
+        """Run ``func`` under this limiter, retrying on 429 responses."""
+        retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            self.acquire(priority, tokens)
+            start = time.monotonic()
+            used = None
+            throttled = False
+            retry_after = None
+            try:
+                result = func()
+                if usage:
+                    used = usage(result)
+                return result
+            except Exception as e:
+                if not is_rate_limited(e):
+                    raise
+                throttled = True
+                retry_after = retry_after_from(e) or self.backoff(attempt)
+                if attempt >= retries:
+                    raise
+            finally:
+                self.release(time.monotonic() - start, tokens, used, throttled, retry_after)
+            attempt += 1
+            with self._lock:
+                self.stats["retries"] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "active": self.active,
+                "waiting_live": self.waiting[LIVE],
+                "waiting_background": self.waiting[BACKGROUND],
+                "latency_ewma_s": round(self._ewma, 3) if self._ewma is not None else None,
+                **self.stats,
+            }
+
+
+_limiters: Dict[Tuple[str, str], ProviderLimiter] = {}
+_registry_lock = threading.Lock()
+_share = 1.0
+
+
+def provider_limits(provider: str) -> Dict:
+    """Configured limits for a provider, with environment overrides applied."""
+    limits = dict(DEFAULT_LIMITS.get(provider, {"rpm": None, "tpm": None, "max_concurrency": 8}))
+    for key in ("rpm", "tpm", "max_concurrency"):
+        value = os.getenv(f"{provider.upper()}_{key.upper()}")
+        if value:
+            limits[key] = float(value)
+    for key in ("rpm", "tpm"):
+        if limits.get(key):
+            limits[key] = limits[key] * _share
+    if limits.get("max_concurrency"):
+        limits["max_concurrency"] = max(1, int(limits["max_concurrency"] * _share))
+    return limits
+
+
+def get_limiter(provider: str, model: str = "default") -> ProviderLimiter:
+    """The process-wide limiter for a provider model."""
+    key = (provider, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _registry_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                limiter = ProviderLimiter(f"{provider}:{model}", **provider_limits(provider))
+                _limiters[key] = limiter
+    return limiter
+
+
+def set_share(fraction: float):
+    """Scale every limit by ``fraction``, e.g. 1/N in each of N worker processes."""
+    global _share
+    with _registry_lock:
+        _share = fraction
+        _limiters.clear()
+
+
+def limited_call(
+    provider: str,
+    model: str,
+    func: Callable[[], Any],
+    priority: int = BACKGROUND,
+    tokens: int = 0,
+    usage: Optional[Callable[[Any], Optional[int]]] = None,
+    max_retries: Optional[int] = None
+) -> Any:
+    """Run ``func`` under the limiter for ``provider``/``model``."""
+    return get_limiter(provider, model).call(func, priority, tokens, usage, max_retries)
+
+
+def limiter_stats() -> Dict[str, Dict]:
+    return {limiter.name: limiter.snapshot() for limiter in list(_limiters.values())}
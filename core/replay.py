@@ -0,0 +1,357 @@
+"""Replay recorded calls through the target-side pipeline, without a phone call.
+
+Each recorded call's user audio (loose ``*_user.wav`` files or a ``.calla``
+archive) is posted to the server's ``/voice`` and ``/record`` webhooks in
+process, so a replay runs exactly the code a live call does: download
+(stubbed to copy the local file), STT preprocessing and transcription, the
+ScenarioEngine and TTS. Turns can be paced in real time or faster, and the
+per-stage timings come from the transcripts the server writes.
+
+With ``providers="local"`` every provider is a deterministic stand-in:
+
+- STT returns what the receptionist said in the recorded transcript.
+- The LLM replays the patient's recorded replies.
+- TTS produces a tone as long as the spoken text would be and sends it
+  through the real Synthesizer, so caching, hedging and telephony encoding
+  still run.
+
+Each stand-in can add a fixed latency. With ``providers="live"`` the
+configured engines and APIs are used.
+"""
+import os
+import re
+import shutil
+import statistics
+import tempfile
+import time
+import wave
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .audio_manager import AudioManager
+from .call_archive import ARCHIVE_SUFFIX, CallArchive, mp3_duration, read_wav
+from .stt_engines import STTEngine
+from .stt_preprocessing import PreparedRecording
+from .telephony_audio import OPENAI_PCM_RATE
+
+USER_AUDIO = re.compile(r"^(?P<call_id>.+)_(?P<turn>\d+)_user\.wav$")
+REPLAY_SUFFIX = "-replay"
+STAGES = ("download_ms", "stt_ms", "llm_ms", "tts_ms", "webhook_ms")
+# The LLM stand-in ends a scripted call once its recorded replies run out,
+# and keeps a call without a saved transcript going until its audio does
+FALLBACK_REPLY = "Thank you, that's all I needed. Goodbye."
+FILLER_REPLY = "I see. Could you tell me a little more about that?"
+
+
+@dataclass
+class RecordedCall:
+    call_id: str
+    user_audio: List[str]
+    scenario: str = "scheduling"
+    # From the saved transcript, when there is one
+    user_texts: List[str] = field(default_factory=list)
+    bot_replies: List[str] = field(default_factory=list)
+
+
+def audio_duration(path: str) -> float:
+    """Playback length of a WAV (PCM or μ-law) or MP3 file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".mp3"):
+        return mp3_duration(data)
+    samples, rate, fmt = read_wav(data)
+    return len(samples) / rate / (1 if fmt == "ulaw" else 2)
+
+
+def _extract_archived_audio(path: str, work_dir: str) -> List[str]:
+    """Write an archive's user turns as 16-bit WAV files, like Twilio's; returns them in turn order."""
+    paths = []
+    with CallArchive(path) as archive:
+        for entry in archive.turns:
+            if entry.speaker != "user":
+                continue
+            target = os.path.join(work_dir, entry.name)
+            with wave.open(target, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(entry.sample_rate)
+                w.writeframes(archive.pcm(entry).astype("<i2").tobytes())
+            paths.append(target)
+    return paths
+
+
+def find_recorded_calls(directory: str = "recordings", call_ids: Optional[List[str]] = None,
+                        work_dir: Optional[str] = None) -> List[RecordedCall]:
+    """Calls with user audio in ``directory`` (or its archive), with their saved transcripts."""
+    from evaluation.transcripts import find_transcript, load_transcript_record
+
+    audio: Dict[str, Dict[int, str]] = {}
+    if os.path.isdir(directory):
+        for entry in os.scandir(directory):
+            match = USER_AUDIO.match(entry.name)
+            if match:
+                audio.setdefault(match["call_id"], {})[int(match["turn"])] = entry.path
+    archive_dir = os.path.join(directory, "archive")
+    if os.path.isdir(archive_dir):
+        for entry in os.scandir(archive_dir):
+            call_id = entry.name[: -len(ARCHIVE_SUFFIX)]
+            if not entry.name.endswith(ARCHIVE_SUFFIX) or call_id in audio:
+                continue
+            if call_ids and call_id not in call_ids:
+                continue
+            work_dir = work_dir or tempfile.mkdtemp(prefix="replay-")
+            for path in _extract_archived_audio(entry.path, work_dir):
+                audio.setdefault(call_id, {})[int(USER_AUDIO.match(os.path.basename(path))["turn"])] = path
+
+    calls = []
+    for call_id in sorted(audio):
+        if call_ids and call_id not in call_ids:
+            continue
+        call = RecordedCall(call_id, [audio[call_id][turn] for turn in sorted(audio[call_id])])
+        transcript = find_transcript(directory, call_id)
+        if transcript:
+            record = load_transcript_record(transcript)
+            call.scenario = record.scenario or call.scenario
+            call.user_texts = [turn.get("content", "") for turn in record.turns if turn.get("role") == "user"]
+            call.bot_replies = [turn.get("content", "") for turn in record.turns if turn.get("role") == "assistant"]
+        calls.append(call)
+    return calls
+
+
+class ReferenceSTT(STTEngine):
+    """Stand-in STT engine returning the text it was told to expect."""
+    name = "replay-reference"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.expected: Optional[str] = None
+
+    def transcribe(self, recording: PreparedRecording) -> str:
+        time.sleep(self.latency)
+        return self.expected if self.expected is not None else "Sorry, could you repeat that?"
+
+
+class StandInChatClient:
+    """OpenAI-shaped chat client that replays a list of replies."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.replies: List[str] = []
+        self.scripted = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, max_tokens=None, **kwargs):
+        time.sleep(self.latency)
+        if self.replies:
+            reply = self.replies.pop(0)
+        else:
+            reply = FALLBACK_REPLY if self.scripted else FILLER_REPLY
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        completion_tokens = len(reply) // 4
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            )
+        )
+
+
+class StandInSpeechClient:
+    """OpenAI-shaped speech client returning a tone as long as the text would take to say."""
+
+    def __init__(self, latency: float = 0.0, words_per_second: float = 2.5):
+        self.latency = latency
+        self.words_per_second = words_per_second
+        self.audio = SimpleNamespace(speech=SimpleNamespace(create=self.create))
+
+    def create(self, model, voice, input, response_format="pcm"):
+        time.sleep(self.latency)
+        seconds = max(0.5, len(input.split()) / self.words_per_second)
+        t = np.arange(int(seconds * OPENAI_PCM_RATE)) / OPENAI_PCM_RATE
+        pcm = (np.sin(2 * np.pi * 220 * t) * 8000).astype("<i2").tobytes()
+        return SimpleNamespace(content=pcm)
+
+
+class ReplayAudioManager(AudioManager):
+    """AudioManager whose downloads copy a local recording instead of fetching from Twilio."""
+
+    def download_audio(self, url: str, filename: str):
+        file_path = os.path.join(self.base_dir, filename)
+        try:
+            shutil.copyfile(url, file_path)
+        except OSError as e:
+            print(f"Error copying recording: {e}")
+            return None
+        return file_path
+
+
+def install_stand_ins(stt: STTEngine, chat_client: Callable[[], object], tts_latency: float = 0.0):
+    """Point the server's STT, TTS and scenario engines at local stand-ins.
+
+    ``chat_client`` is called once per call for the client its ScenarioEngine uses.
+    """
+    from logic.scenario_engine import ScenarioEngine
+    from . import server
+    from .synthesizer import Synthesizer
+    from .transcriber import Transcriber
+
+    # The stand-in speaks 24kHz PCM, which only the telephony profile asks for
+    os.environ["TTS_AUDIO_PROFILE"] = "telephony"
+    if not os.getenv("OPENAI_API_KEY"):
+        os.environ["OPENAI_API_KEY"] = "replay"
+    synthesizer = Synthesizer()
+    synthesizer.client = StandInSpeechClient(tts_latency)
+    synthesizer.providers = ["openai"]
+    server._components["synthesizer"] = synthesizer
+    server._components["transcriber"] = Transcriber(stt)
+    server.engine_factory = lambda scenario_name: ScenarioEngine(scenario_name, client=chat_client())
+
+
+@dataclass
+class CallReplay:
+    call_id: str
+    replay_sid: str
+    turns: List[Dict] = field(default_factory=list)
+    webhook_ms: List[float] = field(default_factory=list)
+    hung_up: bool = False
+    transcript_path: Optional[str] = None
+
+
+class ReplayHarness:
+    def __init__(
+        self,
+        providers: str = "local",
+        speed: float = 0.0,
+        out_dir: str = "replays",
+        stt_latency: float = 0.0,
+        llm_latency: float = 0.0,
+        tts_latency: float = 0.0,
+        keep_audio: bool = False
+    ):
+        if providers not in ("local", "live"):
+            raise ValueError(f"Unknown providers '{providers}' (expected 'local' or 'live')")
+        self.providers = providers
+        # 1 paces turns in real time, 0 replays back to back
+        self.speed = speed
+        self.out_dir = out_dir
+        self.keep_audio = keep_audio
+        self.stt = ReferenceSTT(stt_latency) if providers == "local" else None
+        self.chat = StandInChatClient(llm_latency) if providers == "local" else None
+        self.tts_latency = tts_latency
+        self._client = None
+
+    def _setup(self):
+        from fastapi.testclient import TestClient
+        from . import server
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        server._components["audio_manager"] = ReplayAudioManager(base_dir=self.out_dir)
+        if self.providers == "local":
+            install_stand_ins(self.stt, lambda: self.chat, self.tts_latency)
+        self._server = server
+        self._client = TestClient(server.create_app(init=False))
+
+    def _post(self, path: str, data: Dict) -> float:
+        start = time.perf_counter()
+        response = self._client.post(path, data=data)
+        elapsed = (time.perf_counter() - start) * 1000
+        response.raise_for_status()
+        return elapsed
+
+    def _bot_audio(self, sid: str, turn: int) -> Optional[str]:
+        extension = self._server.get_synthesizer().file_extension
+        path = os.path.join("static", f"{sid}_{turn}_bot.{extension}")
+        return path if os.path.exists(path) else None
+
+    def _pace(self, seconds: float):
+        if self.speed > 0 and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    def replay_call(self, call: RecordedCall) -> CallReplay:
+        from evaluation.transcripts import find_transcript, load_transcript_record
+
+        if self._client is None:
+            self._setup()
+        server = self._server
+        sid = f"{call.call_id}{REPLAY_SUFFIX}"
+        result = CallReplay(call.call_id, sid)
+        if self.chat:
+            self.chat.replies = list(call.bot_replies)
+            self.chat.scripted = bool(call.bot_replies)
+
+        result.webhook_ms.append(self._post(f"/voice?scenario={call.scenario}", {"CallSid": sid}))
+        for index, wav in enumerate(call.user_audio):
+            engine = server.call_sessions.get(sid)
+            if engine is None:
+                result.hung_up = True
+                break
+            # The bot's audio plays, then the receptionist answers
+            bot_audio = self._bot_audio(sid, engine.turn_count)
+            duration = audio_duration(wav)
+            self._pace((audio_duration(bot_audio) if bot_audio else 0.0) + duration)
+            if self.stt:
+                self.stt.expected = call.user_texts[index] if index < len(call.user_texts) else None
+            result.webhook_ms.append(self._post("/record", {
+                "CallSid": sid,
+                "RecordingUrl": wav,
+                "RecordingDuration": str(round(duration)),
+            }))
+        else:
+            result.hung_up = sid not in server.call_sessions
+
+        if not result.hung_up:
+            # Out of recorded audio before the bot hung up
+            writer = server.call_transcripts.pop(sid, None)
+            if writer:
+                server.get_audio_manager().finish_transcript(writer, reason="replay_ended")
+            server.call_sessions.pop(sid, None)
+
+        result.transcript_path = find_transcript(self.out_dir, sid)
+        if result.transcript_path:
+            result.turns = load_transcript_record(result.transcript_path).turns
+        if not self.keep_audio:
+            for name in os.listdir("static"):
+                if name.startswith(f"{sid}_"):
+                    os.remove(os.path.join("static", name))
+        return result
+
+    def run(self, calls: List[RecordedCall]) -> Dict:
+        """Replay calls one after another; returns per-stage timing statistics."""
+        start = time.perf_counter()
+        replays = [self.replay_call(call) for call in calls]
+        samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        for replay in replays:
+            samples["webhook_ms"].extend(replay.webhook_ms)
+            for turn in replay.turns:
+                for stage, ms in (turn.get("timing") or {}).items():
+                    samples.setdefault(stage, []).append(ms)
+        return {
+            "providers": self.providers,
+            "speed": self.speed,
+            "calls": len(replays),
+            "turns": sum(len(replay.turns) for replay in replays),
+            "hung_up": sum(replay.hung_up for replay in replays),
+            "wall_s": round(time.perf_counter() - start, 3),
+            "stages": {stage: summarize(values) for stage, values in samples.items() if values},
+            "per_call": [
+                {"call_id": replay.call_id, "turns": len(replay.turns), "hung_up": replay.hung_up,
+                 "transcript": replay.transcript_path}
+                for replay in replays
+            ],
+        }
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "median": round(statistics.median(ordered), 1),
+        "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 1),
+        "max": round(ordered[-1], 1),
+        "total": round(sum(ordered), 1),
+    }
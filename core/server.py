@@ -1,50 +1,212 @@
-from fastapi import FastAPI, Request, Form, BackgroundTasks
-from fastapi.responses import Response
-from fastapi.staticfiles import StaticFiles
-from pyngrok import ngrok
-import uvicorn
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 import os
 import logging
-from .voice_bot import VoiceBot
-from .transcriber import Transcriber
-from .synthesizer import Synthesizer
-from .audio_manager import AudioManager
+import threading
+import time
 from logic.scenario_engine import ScenarioEngine
-from twilio.twiml.voice_response import VoiceResponse
+from .usage import in_context, merge_usage, metered
 from pydantic import BaseModel
+from typing import Callable, Dict, List, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-
-# Mount static directory to serve generated audio files
-if not os.path.exists("static"):
-    os.makedirs("static")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Routes are collected here and mounted by create_app(); importing this
+# module builds nothing, so the CLI and tests only pay for what they use
+router = APIRouter()
+_app = None
 
 # Global state to store conversation engines per Call SID
 call_sessions = {}
+# Builds each call's engine; the replay harness swaps in one with a local LLM stand-in
+engine_factory: Callable[..., ScenarioEngine] = ScenarioEngine
+# Incremental transcript writer per Call SID (see core/transcript_log.py)
+call_transcripts = {}
 
-# Initialize components
-bot = VoiceBot()
-transcriber = Transcriber()
-synthesizer = Synthesizer()
-audio_manager = AudioManager(
-    base_dir="recordings",
-    twilio_account_sid=os.getenv("TWILIO_ACCOUNT_SID"),
-    twilio_auth_token=os.getenv("TWILIO_AUTH_TOKEN")
-)
+# Components are created on first use (or all at once by init_components)
+_components = {}
+_components_lock = threading.Lock()
 
 # Public URL (updated when ngrok starts)
 BASE_URL = ""
 
+# Background evaluator for finished calls (see enable_live_evaluation)
+live_evaluator = None
+live_requests = 0
+
+# Sampling profiler (see core/profiling.py); None until enabled by env or /admin/profile
+profiler = None
+# Webhooks slower than this get their own profile in PROFILE_DIR (0 = off)
+slow_request_ms = 0.0
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+def _component(name: str, factory: Callable):
+    component = _components.get(name)
+    if component is None:
+        with _components_lock:
+            component = _components.get(name)
+            if component is None:
+                component = factory()
+                _components[name] = component
+    return component
+
+def get_bot():
+    from .voice_bot import VoiceBot
+    return _component("bot", VoiceBot)
+
+def get_transcriber():
+    from .transcriber import Transcriber
+    return _component("transcriber", Transcriber)
+
+def get_synthesizer():
+    from .synthesizer import Synthesizer
+    return _component("synthesizer", Synthesizer)
+
+def get_audio_manager():
+    from .audio_manager import AudioManager
+    return _component("audio_manager", lambda: AudioManager(
+        base_dir="recordings",
+        twilio_account_sid=os.getenv("TWILIO_ACCOUNT_SID"),
+        twilio_auth_token=os.getenv("TWILIO_AUTH_TOKEN")
+    ))
+
+def get_storage():
+    from .storage import StorageManager
+    return _component("storage", lambda: StorageManager(
+        static_dir="static",
+        recordings_dir=get_audio_manager().base_dir
+    ))
+
+def get_report_store():
+    from evaluation.report_store import ReportStore
+    return _component("report_store", lambda: ReportStore(os.path.join("reports", "index.sqlite3")))
+
+def init_components():
+    """
+    Create every call component now, so missing credentials fail at startup
+    and a local STT model is loaded before the first call.
+    """
+    get_bot()
+    get_transcriber()
+    get_synthesizer()
+    get_audio_manager()
+    # Opt-in: collection moves and deletes audio that earlier versions kept
+    if os.getenv("STORAGE_GC", "").lower() in ("1", "true", "yes"):
+        get_storage().start()
+    if os.getenv("LIVE_EVALUATION", "").lower() in ("1", "true", "yes"):
+        enable_live_evaluation(os.getenv("LIVE_EVALUATION_CHECKS"))
+    if os.getenv("PROFILE_SLOW_REQUEST_MS"):
+        start_profiling(float(os.getenv("PROFILE_INTERVAL_MS", 5)), float(os.getenv("PROFILE_SLOW_REQUEST_MS")))
+
+def create_app(init: bool = True) -> FastAPI:
+    """
+    Build the FastAPI app; with init=False components are created on first request.
+    """
+    from fastapi.staticfiles import StaticFiles
+    
+    application = FastAPI()
+    # Mount static directory to serve generated audio files
+    os.makedirs("static", exist_ok=True)
+    application.mount("/static", StaticFiles(directory="static"), name="static")
+    application.middleware("http")(track_live_requests)
+    application.middleware("http")(profile_slow_requests)
+    application.include_router(router)
+    if init:
+        init_components()
+    return application
+
+def get_app() -> FastAPI:
+    """
+    The process-wide app, created on first use.
+    """
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+def __getattr__(name):
+    # Keeps `from core.server import app` and `uvicorn core.server:app` working
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+async def track_live_requests(request: Request, call_next):
+    """
+    Count in-flight webhook requests so background evaluation can yield to them.
+    """
+    global live_requests
+    if request.url.path.startswith("/static/"):
+        response = await call_next(request)
+        if response.status_code == 200 and "storage" in _components:
+            # Twilio has the audio now; the storage manager can drop it soon
+            get_storage().mark_served(os.path.basename(request.url.path))
+        return response
+    if request.url.path.startswith(("/static", "/evaluate")):
+        return await call_next(request)
+    live_requests += 1
+    try:
+        return await call_next(request)
+    finally:
+        live_requests -= 1
+
+async def profile_slow_requests(request: Request, call_next):
+    """
+    Save the samples taken during a webhook that ran over slow_request_ms.
+    """
+    if not slow_request_ms or profiler is None or not profiler.running:
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    end = time.perf_counter()
+    elapsed_ms = (end - start) * 1000
+    if elapsed_ms >= slow_request_ms and not request.url.path.startswith(("/static", "/admin")):
+        name = f"{int(time.time() * 1000)}_{request.url.path.strip('/').replace('/', '_') or 'root'}_{elapsed_ms:.0f}ms.folded"
+        path = os.path.join(PROFILE_DIR, name)
+        # Every thread is included: a request is often slow because of what else was running
+        if profiler.write(path, since=start, until=end):
+            logger.warning(f"Slow request {request.url.path} took {elapsed_ms:.0f}ms; profile saved to {path}")
+    return response
+
+def start_profiling(interval_ms: float = 5.0, slow_ms: Optional[float] = None):
+    """
+    Start (or retune) the sampling profiler; slow_ms also captures per-request profiles.
+    """
+    global profiler, slow_request_ms
+    from .profiling import SamplingProfiler
+    
+    if profiler is None or not profiler.running:
+        profiler = SamplingProfiler(interval=interval_ms / 1000)
+        profiler.start()
+        logger.info(f"Sampling profiler started ({interval_ms:g}ms interval)")
+    if slow_ms is not None:
+        slow_request_ms = slow_ms
+    return profiler
+
+def enable_live_evaluation(checks_config: str = None, fast_fail: bool = None, max_pending: int = 32):
+    """
+    Evaluate each call in the background as soon as its transcript is saved.
+    """
+    global live_evaluator
+    if live_evaluator is None:
+        from evaluation.live import LiveEvaluator
+        live_evaluator = LiveEvaluator(
+            checks_config=checks_config,
+            fast_fail=fast_fail,
+            max_pending=max_pending,
+            is_busy=lambda: live_requests > 0
+        )
+        get_audio_manager().add_transcript_listener(live_evaluator.submit)
+        logger.info("Live evaluation enabled")
+    return live_evaluator
+
 class CallRequest(BaseModel):
     to_number: str
     scenario: str = "scheduling"
 
-@app.post("/call")
+@router.post("/call")
 async def trigger_call(request: CallRequest):
     """
     Trigger an outbound call to the specified number.
@@ -55,14 +217,14 @@ async def trigger_call(request: CallRequest):
     # We use /voice as the webhook for the call
     callback_url = f"{BASE_URL}/voice?scenario={request.scenario}"
     
-    call_sid = bot.start_call(request.to_number, callback_url)
+    call_sid = get_bot().start_call(request.to_number, callback_url)
     
     if call_sid:
         return {"status": "initiated", "call_sid": call_sid}
     else:
         return {"status": "failed", "error": "Could not initiate call"}
 
-@app.post("/voice")
+@router.post("/voice")
 async def voice_webhook(request: Request):
     """
     Handle incoming Twilio voice webhook (Start of call).
@@ -74,20 +236,28 @@ async def voice_webhook(request: Request):
     logger.info(f"New call started: {call_sid} with scenario {scenario_param}")
     
     # Initialize new scenario engine for this call
-    engine = ScenarioEngine(scenario_name=scenario_param)
+    engine = engine_factory(scenario_name=scenario_param)
     call_sessions[call_sid] = engine
+    try:
+        call_transcripts[call_sid] = get_audio_manager().open_transcript(call_sid, engine.scenario_name, engine.model)
+    except OSError as e:
+        # The full history is still saved in the original format at hangup
+        logger.error(f"Could not start transcript for {call_sid}: {e}")
     
     # Get opening line
-    opening_text = engine.get_first_message()
+    with metered() as usage:
+        opening_text = await run_in_threadpool(in_context(engine.get_first_message))
     logger.info(f"Bot says: {opening_text}")
     
-    return generate_response_twiml(call_sid, opening_text, engine.turn_count)
+    return await respond_and_log(call_sid, engine, opening_text, usage=usage)
 
-@app.post("/record")
+@router.post("/record")
 async def record_webhook(request: Request):
     """
     Handle recording callback.
     """
+    from twilio.twiml.voice_response import VoiceResponse
+    
     form_data = await request.form()
     call_sid = form_data.get("CallSid")
     recording_url = form_data.get("RecordingUrl")
@@ -99,9 +269,15 @@ async def record_webhook(request: Request):
         logger.error("Error: No session found for this call.")
         return Response(content=str(VoiceResponse().hangup()), media_type="application/xml")
 
+    # Download, STT, the LLM and TTS block, so they run on the threadpool: the event
+    # loop keeps serving other calls' webhooks, and turns that end together
+    # reach the STT engine together (the local engine batches them)
+    
     # 1. Download recording
     audio_filename = f"{call_sid}_{engine.turn_count}_user.wav"
-    local_audio_path = audio_manager.download_audio(recording_url, audio_filename)
+    start = time.perf_counter()
+    local_audio_path = await run_in_threadpool(get_audio_manager().download_audio, recording_url, audio_filename)
+    download_ms = (time.perf_counter() - start) * 1000
     
     if not local_audio_path:
         logger.error("Failed to download audio")
@@ -110,39 +286,280 @@ async def record_webhook(request: Request):
         return Response(content=str(VoiceResponse().hangup()), media_type="application/xml")
 
     # 2. Transcribe
-    transcript_text = transcriber.transcribe(local_audio_path)
+    start = time.perf_counter()
+    with metered() as stt_usage:
+        transcript_text = await run_in_threadpool(in_context(get_transcriber().transcribe), local_audio_path)
+    stt_ms = (time.perf_counter() - start) * 1000
     logger.info(f"User said: {transcript_text}")
     
     if not transcript_text:
         # Fallback if transcription fails
         transcript_text = "..."
     
+    transcript = call_transcripts.get(call_sid)
+    if transcript:
+        duration = form_data.get("RecordingDuration")
+        transcript.add_turn(
+            "user", transcript_text,
+            audio=audio_filename,
+            audio_duration_s=float(duration) if duration else None,
+            timing={"download_ms": download_ms, "stt_ms": stt_ms},
+            usage=stt_usage.to_dict()
+        )
+    
     # 3. Generate response
-    bot_response_text = engine.generate_response(transcript_text)
+    with metered() as usage:
+        bot_response_text = await run_in_threadpool(in_context(engine.generate_response), transcript_text)
     logger.info(f"Bot says: {bot_response_text}")
     
     # 4. Check if conversation is over
     if engine.is_conversation_over():
         # Say goodbye and hang up
-        response = generate_response_twiml(call_sid, bot_response_text, engine.turn_count, hangup=True)
+        response = await respond_and_log(call_sid, engine, bot_response_text, hangup=True, usage=usage)
         
-        # Save transcript
-        audio_manager.save_transcript(call_sid, engine.get_transcript())
+        # Publish transcript
+        transcript = call_transcripts.pop(call_sid, None)
+        if transcript:
+            get_audio_manager().finish_transcript(transcript)
+        else:
+            get_audio_manager().save_transcript(call_sid, engine.get_transcript())
+        if "storage" in _components:
+            get_storage().call_finished(call_sid)
         
         # Clean up session
         del call_sessions[call_sid]
         return response
     else:
         # Continue conversation
-        return generate_response_twiml(call_sid, bot_response_text, engine.turn_count)
+        return await respond_and_log(call_sid, engine, bot_response_text, usage=usage)
 
-def generate_response_twiml(call_sid, text, turn_count, hangup=False):
+# The evaluation, usage and admin APIs spend provider money or expose spend and
+# internals on a server that is public through the tunnel: they are opt-in,
+# and only with the ADMIN_TOKEN shared secret in X-Admin-Token
+def admin_denied(request: Request) -> Optional[JSONResponse]:
+    """
+    A 403 response unless the request carries the admin token.
+    """
+    import hmac
+    
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        return JSONResponse(status_code=403, content={"error": "Admin endpoints are disabled; set ADMIN_TOKEN"})
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token):
+        return JSONResponse(status_code=403, content={"error": "Invalid admin token"})
+    return None
+
+# Evaluation API: a warm process that CI pipelines and dashboards submit to
+CHECKS_DIR = "checks"
+evaluation_scheduler = None
+runner_cache = None
+evaluation_reporter = None
+evaluation_detector = None
+
+class EvaluateRequest(BaseModel):
+    checks: str
+    transcript: Optional[List[Dict]] = None
+    call_sid: Optional[str] = None
+    bug_detection: bool = False
+    fast_fail: Optional[bool] = None
+    priority: int = 0
+
+def get_evaluation_scheduler():
+    """
+    Lazily start the job scheduler and the shared evaluation components.
+    """
+    global evaluation_scheduler, runner_cache, evaluation_reporter, evaluation_detector
+    if evaluation_scheduler is None:
+        from evaluation.bug_detector import BugDetector
+        from evaluation.check_runner import CheckRunnerCache
+        from evaluation.jobs import JobScheduler
+        from evaluation.reporter import Reporter
+        runner_cache = CheckRunnerCache()
+        evaluation_reporter = Reporter()
+        evaluation_detector = BugDetector()
+        evaluation_scheduler = JobScheduler(
+            workers=int(os.getenv("EVALUATION_WORKERS", 8)),
+            limits={"openai": int(os.getenv("EVALUATION_OPENAI_CONCURRENCY", 4))}
+        )
+    return evaluation_scheduler
+
+def resolve_checks_config(name: str):
+    """
+    Map a checks config name (e.g. "scheduling") to its YAML file in checks/.
+    """
+    filename = os.path.basename(name)
+    if not filename.endswith((".yaml", ".yml")):
+        filename += ".yaml"
+    path = os.path.join(CHECKS_DIR, filename)
+    return path if os.path.exists(path) else None
+
+@router.post("/evaluate")
+async def submit_evaluation(request: EvaluateRequest, http_request: Request):
+    """
+    Queue an evaluation of a transcript, or of a saved call by its Call SID.
+    """
+    from evaluation.transcripts import find_transcript, infer_scenario, load_transcript
+    
+    denied = admin_denied(http_request)
+    if denied:
+        return denied
+    scheduler = get_evaluation_scheduler()
+    config_path = resolve_checks_config(request.checks)
+    if not config_path:
+        return JSONResponse(status_code=404, content={"error": f"Unknown checks config: {request.checks}"})
+    
+    transcript_path = None
+    if request.transcript is None:
+        if not request.call_sid:
+            return JSONResponse(status_code=400, content={"error": "Provide a transcript or a call_sid"})
+        transcript_path = find_transcript(get_audio_manager().base_dir, os.path.basename(request.call_sid))
+        if not transcript_path:
+            return JSONResponse(status_code=404, content={"error": f"No transcript for call {request.call_sid}"})
+    
+    runner = runner_cache.get(config_path, request.fast_fail)
+    uses_llm = request.bug_detection or any(check.uses_llm for check in runner.checks)
+    call_id = request.call_sid
+    
+    def evaluate():
+        transcript = request.transcript if transcript_path is None else load_transcript(transcript_path)
+        report = runner.evaluate(transcript)
+        result = {"checks": request.checks, "custom_evaluation": report.to_dict()}
+        bug_report = None
+        if request.bug_detection:
+            bug_report = evaluation_detector.analyze_transcript(call_id or "adhoc", transcript)
+            result["bug_report"] = bug_report
+        # Only evaluations of real calls are indexed in the report store
+        if call_id:
+            scenario = infer_scenario(transcript)
+            with evaluation_reporter.store.transaction():
+                evaluation_reporter.save_custom_report(call_id, report, scenario=scenario)
+                if bug_report:
+                    evaluation_reporter.save_report(bug_report, scenario=scenario)
+        return result
+    
+    job = scheduler.submit(evaluate, priority=request.priority, providers=["openai" if uses_llm else "local"])
+    return {"job_id": job.job_id, "status": job.status}
+
+@router.get("/evaluate/{job_id}")
+async def get_evaluation(job_id: str, request: Request):
+    """
+    Status of an evaluation job, with its result once done.
+    """
+    denied = admin_denied(request)
+    if denied:
+        return denied
+    job = get_evaluation_scheduler().get(job_id)
+    if not job:
+        return JSONResponse(status_code=404, content={"error": f"Unknown job: {job_id}"})
+    return job.to_dict()
+
+@router.get("/usage")
+async def get_usage(request: Request, group_by: str = "scenario", kind: Optional[str] = None,
+                    since: Optional[str] = None, until: Optional[str] = None):
+    """
+    Provider usage and cost: this process's totals per model, and the report store's per group.
+    """
+    from evaluation.report_store import USAGE_GROUPS
+    from .usage import process_usage, usage_totals
+    
+    denied = admin_denied(request)
+    if denied:
+        return denied
+    if group_by not in USAGE_GROUPS:
+        return JSONResponse(status_code=400, content={"error": f"group_by must be one of {', '.join(USAGE_GROUPS)}"})
+    usage = process_usage.to_dict()
+    return {
+        "process": {"models": usage, "totals": usage_totals(usage)},
+        "group_by": group_by,
+        "groups": get_report_store().usage_summary(group_by, kind=kind, since=since, until=until),
+    }
+
+# Admin API
+class ProfileRequest(BaseModel):
+    interval_ms: float = 5.0
+    slow_request_ms: Optional[float] = None
+
+def profile_status():
+    status = profiler.status() if profiler else {"running": False}
+    status["slow_request_ms"] = slow_request_ms
+    return status
+
+@router.get("/admin/profile")
+async def get_profile(request: Request, format: str = "json", limit: int = 20):
+    """
+    Profiler status and hottest frames, or the folded stacks with format=folded.
+    """
+    denied = admin_denied(request)
+    if denied:
+        return denied
+    if format == "folded":
+        lines = profiler.folded() if profiler else []
+        return Response(content="\n".join(lines) + "\n", media_type="text/plain")
+    return {**profile_status(), "top": profiler.top(limit) if profiler else []}
+
+@router.post("/admin/profile/start")
+async def start_profile(request: Request, options: ProfileRequest = None):
+    """
+    Start sampling; slow_request_ms also saves a profile for each slower webhook.
+    """
+    denied = admin_denied(request)
+    if denied:
+        return denied
+    options = options or ProfileRequest()
+    start_profiling(options.interval_ms, options.slow_request_ms)
+    return profile_status()
+
+@router.post("/admin/profile/stop")
+async def stop_profile(request: Request):
+    """
+    Stop sampling and save everything collected to PROFILE_DIR.
+    """
+    global slow_request_ms
+    denied = admin_denied(request)
+    if denied:
+        return denied
+    if profiler is None or not profiler.running:
+        return JSONResponse(status_code=409, content={"error": "Profiler is not running"})
+    profiler.stop()
+    slow_request_ms = 0.0
+    path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}_server.folded")
+    profiler.write(path)
+    logger.info(f"Sampling profiler stopped; profile saved to {path}")
+    return {**profile_status(), "profile": path}
+
+async def respond_and_log(call_sid, engine, text, hangup=False, usage=None):
+    """
+    Synthesize the bot's reply and append it, with its timing and usage, to the call's transcript.
+    
+    ``usage`` is the meter that was open while the reply was generated.
+    """
+    start = time.perf_counter()
+    with metered() as tts_usage:
+        response = await generate_response_twiml(call_sid, text, engine.turn_count, hangup=hangup)
+    tts_ms = (time.perf_counter() - start) * 1000
+    transcript = call_transcripts.get(call_sid)
+    if transcript:
+        transcript.add_turn(
+            "assistant", text,
+            audio=f"{call_sid}_{engine.turn_count}_bot.{get_synthesizer().file_extension}",
+            timing={"llm_ms": engine.last_latency_ms, "tts_ms": tts_ms},
+            usage=merge_usage(usage.to_dict() if usage else {}, tts_usage.to_dict())
+        )
+    return response
+
+async def generate_response_twiml(call_sid, text, turn_count, hangup=False):
     """
     Helper to generate TwiML with synthesized speech.
+    
+    Synthesis runs on the threadpool, since a hedged request can block for a
+    whole hedging wait plus the backup provider's call.
     """
-    filename = f"{call_sid}_{turn_count}_bot.mp3"
+    from twilio.twiml.voice_response import VoiceResponse
+    
+    synthesizer = get_synthesizer()
+    filename = f"{call_sid}_{turn_count}_bot.{synthesizer.file_extension}"
     audio_path = f"static/{filename}"
-    synthesizer.synthesize(text, audio_path)
+    await run_in_threadpool(in_context(synthesizer.synthesize), text, audio_path)
     audio_url = f"{BASE_URL}/static/{filename}"
     
     response = VoiceResponse()
@@ -158,6 +575,9 @@ def generate_response_twiml(call_sid, text, turn_count, hangup=False):
 
 def start_server(port: int = 8000):
     global BASE_URL
+    from pyngrok import ngrok
+    import uvicorn
+    
     # Start ngrok
     ngrok_token = os.getenv("NGROK_AUTHTOKEN")
     if ngrok_token:
@@ -171,7 +591,7 @@ def start_server(port: int = 8000):
         print(f"Ngrok tunnel started: {BASE_URL}")
         
         # Start Uvicorn
-        uvicorn.run(app, host="0.0.0.0", port=port)
+        uvicorn.run(get_app(), host="0.0.0.0", port=port)
     except Exception as e:
         print(f"Error starting server: {e}")
 
@@ -0,0 +1,255 @@
+"""Lifecycle of the audio files a call leaves on disk.
+
+Every bot turn writes ``static/{call_sid}_{turn}_bot.*`` for Twilio to fetch,
+and every user turn writes ``recordings/{call_sid}_{turn}_user.wav``. The
+``StorageManager`` keeps both directories small:
+
+- Once a call is over, its user audio is moved into a single per-call
+  archive under ``recordings/archive/`` (see ``core/call_archive.py``),
+  together with a copy of the bot audio still on disk. Calls that never
+  finished are archived once they have been quiet for a while.
+- Bot audio is deleted only once it is in its call's archive: shortly
+  after Twilio has fetched it, or after a TTL if it never was. Until then
+  it stays, so a call in progress keeps every turn for its archive.
+- ``static/`` (bot audio plus the TTS phrase cache) is kept under a disk
+  budget by evicting the least recently used cache entries first, then bot
+  audio that has already been served and archived.
+
+Settings come from STORAGE_* environment variables. The server runs
+``collect()`` periodically in a background thread only when STORAGE_GC is
+set, since it deletes and moves files that earlier versions kept.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from .call_archive import ARCHIVE_SUFFIX, archived_names, collect_call_files, pack_turn, read_packed, write_archive
+
+logger = logging.getLogger(__name__)
+
+BOT_AUDIO = re.compile(r"^(?P<call_id>.+)_(?P<turn>\d+)_bot\.\w+$")
+USER_AUDIO = re.compile(r"^(?P<call_id>.+)_(?P<turn>\d+)_user\.wav$")
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+class StorageManager:
+    def __init__(
+        self,
+        static_dir: str = "static",
+        recordings_dir: str = "recordings",
+        archive_dir: Optional[str] = None,
+        served_grace: Optional[float] = None,
+        bot_audio_ttl: Optional[float] = None,
+        abandoned_after: Optional[float] = None,
+        budget_bytes: Optional[int] = None
+    ):
+        self.static_dir = static_dir
+        self.recordings_dir = recordings_dir
+        self.archive_dir = archive_dir or os.path.join(recordings_dir, "archive")
+        self.archive_codec = os.getenv("STORAGE_ARCHIVE_CODEC", "ulaw")
+        self.cache_dir = os.path.join(static_dir, "tts_cache")
+        # Twilio may retry a fetch, so served audio lingers briefly
+        self.served_grace = served_grace if served_grace is not None else _env_float("STORAGE_SERVED_GRACE", 60)
+        self.bot_audio_ttl = bot_audio_ttl if bot_audio_ttl is not None else _env_float("STORAGE_BOT_AUDIO_TTL", 3600)
+        self.abandoned_after = (
+            abandoned_after if abandoned_after is not None else _env_float("STORAGE_ABANDONED_AFTER", 3600)
+        )
+        self.budget_bytes = (
+            budget_bytes if budget_bytes is not None else int(_env_float("STORAGE_BUDGET_MB", 500) * 1024 * 1024)
+        )
+        self.stats = {
+            "bot_audio_deleted": 0, "cache_evicted": 0, "calls_archived": 0,
+            "files_archived": 0, "bytes_freed": 0, "passes": 0,
+        }
+        self._served: Dict[str, float] = {}
+        self._finished: Set[str] = set()
+        # Bot audio files known to be in their call's archive
+        self._archived: Set[str] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def mark_served(self, filename: str):
+        """Record that Twilio fetched a file from the static directory."""
+        if BOT_AUDIO.match(filename):
+            with self._lock:
+                self._served.setdefault(filename, time.time())
+
+    def call_finished(self, call_id: str):
+        """Queue a finished call's user audio for bundling on the next pass."""
+        with self._lock:
+            self._finished.add(call_id)
+        self._wake.set()
+
+    def archive_path(self, call_id: str) -> str:
+        return os.path.join(self.archive_dir, f"{call_id}{ARCHIVE_SUFFIX}")
+
+    def archive_call(self, call_id: str) -> Optional[str]:
+        """Move a call's user audio, and copy its bot audio, into its archive; returns the archive path."""
+        files = collect_call_files(call_id, [self.recordings_dir, self.static_dir])
+        if not files:
+            return None
+        paths = sorted(path for name, path in files.items() if USER_AUDIO.match(name))
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archive = self.archive_path(call_id)
+        # Merge with turns archived earlier (e.g. an abandoned call that resumed)
+        turns = {}
+        if os.path.exists(archive):
+            turns = {entry.name: (entry, payload) for entry, payload in read_packed(archive)}
+        for name, path in files.items():
+            user_match = USER_AUDIO.match(name)
+            match = user_match or BOT_AUDIO.match(name)
+            with open(path, "rb") as f:
+                data = f.read()
+            turns[name] = pack_turn(int(match["turn"]), "user" if user_match else "bot", name, data, self.archive_codec)
+        # Sources are removed only after the new archive has replaced the old
+        write_archive(archive, call_id, list(turns.values()))
+        freed = 0
+        for path in paths:
+            freed += os.path.getsize(path)
+            os.remove(path)
+        with self._lock:
+            # Bot audio can be reaped from static/ from now on
+            self._archived.update(name for name in files if BOT_AUDIO.match(name))
+            self.stats["calls_archived"] += 1
+            self.stats["files_archived"] += len(paths)
+            self.stats["bytes_freed"] += freed
+        return archive
+
+    def _delete(self, path: str, size: int, counter: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self.stats[counter] += 1
+            self.stats["bytes_freed"] += size
+
+    def _bot_audio(self) -> List[os.DirEntry]:
+        """Bot audio files in the static directory."""
+        if not os.path.isdir(self.static_dir):
+            return []
+        return [entry for entry in os.scandir(self.static_dir) if entry.is_file() and BOT_AUDIO.match(entry.name)]
+
+    def _load_archived(self, bot_audio: List[os.DirEntry]):
+        """Learn which bot audio earlier runs archived, from the archives' indexes."""
+        with self._lock:
+            unknown = {BOT_AUDIO.match(entry.name)["call_id"] for entry in bot_audio if entry.name not in self._archived}
+        for call_id in unknown:
+            path = self.archive_path(call_id)
+            if os.path.exists(path):
+                try:
+                    names = archived_names(path)
+                except Exception as e:
+                    logger.error(f"Could not read archive {path}: {e}")
+                    continue
+                with self._lock:
+                    self._archived.update(name for name in names if BOT_AUDIO.match(name))
+
+    def _collect_bot_audio(self, now: float, bot_audio: List[os.DirEntry]) -> List[os.DirEntry]:
+        """Delete archived bot audio that was served or has expired; returns the files kept."""
+        kept = []
+        for entry in bot_audio:
+            stat = entry.stat()
+            with self._lock:
+                archived = entry.name in self._archived
+                served_at = self._served.get(entry.name)
+            expired = (served_at is not None and now - served_at >= self.served_grace) or now - stat.st_mtime >= self.bot_audio_ttl
+            if archived and expired:
+                self._delete(entry.path, stat.st_size, "bot_audio_deleted")
+                with self._lock:
+                    self._served.pop(entry.name, None)
+                    self._archived.discard(entry.name)
+            else:
+                kept.append(entry)
+        return kept
+
+    def _collect_calls(self, now: float, bot_audio: List[os.DirEntry]):
+        """Archive finished calls, and calls whose audio has been quiet for ``abandoned_after``."""
+        with self._lock:
+            finished, self._finished = self._finished, set()
+            archived = set(self._archived)
+        newest: Dict[str, float] = {call_id: 0.0 for call_id in finished}
+        entries = [entry for entry in bot_audio if entry.name not in archived]
+        if os.path.isdir(self.recordings_dir):
+            entries += [entry for entry in os.scandir(self.recordings_dir) if entry.is_file() and USER_AUDIO.match(entry.name)]
+        for entry in entries:
+            call_id = (USER_AUDIO.match(entry.name) or BOT_AUDIO.match(entry.name))["call_id"]
+            newest[call_id] = max(newest.get(call_id, 0.0), entry.stat().st_mtime)
+        for call_id, mtime in newest.items():
+            if call_id in finished or now - mtime >= self.abandoned_after:
+                try:
+                    self.archive_call(call_id)
+                except Exception as e:
+                    logger.error(f"Could not archive audio for {call_id}: {e}")
+
+    def _enforce_budget(self, bot_audio: List[os.DirEntry]):
+        candidates = []
+        if os.path.isdir(self.cache_dir):
+            for entry in os.scandir(self.cache_dir):
+                # Skip files still being written by AudioCache.put
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    # Cache hits refresh the mtime, so this is least recently used first
+                    candidates.append((0, stat.st_mtime, entry.path, stat.st_size, "cache_evicted"))
+        with self._lock:
+            served = self._served.keys() & self._archived
+        for entry in bot_audio:
+            stat = entry.stat()
+            if entry.name in served:
+                candidates.append((1, stat.st_mtime, entry.path, stat.st_size, "bot_audio_deleted"))
+        total = sum(candidate[3] for candidate in candidates)
+        total += sum(entry.stat().st_size for entry in bot_audio if entry.name not in served)
+        if total <= self.budget_bytes:
+            return
+        # Audio Twilio has not fetched yet, or not yet archived, is never evicted
+        for _, _, path, size, counter in sorted(candidates):
+            if total <= self.budget_bytes:
+                break
+            self._delete(path, size, counter)
+            total -= size
+
+    def collect(self) -> Dict:
+        """Run one pass of every policy and return the running totals."""
+        now = time.time()
+        bot_audio = self._bot_audio()
+        self._load_archived(bot_audio)
+        # Archive first, so a finished call's bot audio can be reaped in the same pass
+        self._collect_calls(now, bot_audio)
+        kept = self._collect_bot_audio(now, bot_audio)
+        self._enforce_budget(kept)
+        with self._lock:
+            self.stats["passes"] += 1
+            return dict(self.stats)
+
+    def start(self, interval: Optional[float] = None):
+        """Collect in a daemon thread every ``interval`` seconds and when calls finish."""
+        if self._thread is not None:
+            return
+        interval = interval if interval is not None else _env_float("STORAGE_GC_INTERVAL", 60)
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.collect()
+                except Exception as e:
+                    logger.error(f"Storage collection failed: {e}")
+                self._wake.wait(interval)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=loop, name="storage-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
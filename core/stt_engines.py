@@ -0,0 +1,241 @@
+"""Speech-to-text engines used by the Transcriber.
+
+``STT_ENGINE`` selects one:
+
+- ``api`` (default): OpenAI ``whisper-1`` over the network.
+- ``local``: a quantized Whisper model on the CPU via faster-whisper
+  (``pip install "faster-whisper~=1.2"``). The model is loaded once, when the
+  Transcriber is created at server startup, and shared by a pool of worker
+  threads sized to the cores. A worker that becomes free takes every clip
+  queued at that moment (up to ``STT_LOCAL_BATCH``) and decodes them as one
+  batch, so turns that end together share a forward pass and a lone turn
+  never waits for company.
+
+Batched decoding drives faster-whisper's feature extractor, tokenizer and
+CTranslate2 model directly, because its public ``transcribe`` takes one clip
+at a time. Those internals are only relied on for the releases in
+``BATCHED_DECODE_VERSIONS``; with any other release every clip goes through
+the public API, and ``python -m benchmarks.stt_engines --smoke`` checks a new
+release before it is added.
+"""
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+from .rate_limiter import LIVE, limited_call
+from .usage import record_usage
+from .stt_preprocessing import TARGET_RATE, PreparedRecording
+
+try:
+    import audioop
+except ImportError:  # Python 3.13+: pydub ships a pure-Python fallback
+    from pydub import pyaudioop as audioop
+
+# Whisper's context window; batched decoding pads every clip to it
+WINDOW_SECONDS = 30
+# faster-whisper releases whose internals _decode_batch was checked against
+BATCHED_DECODE_VERSIONS = ("1.2.",)
+
+
+class STTEngine(ABC):
+    """Turns a prepared recording into text."""
+    name = "base"
+    # Whether the engine needs the encoded upload or only the samples
+    uploads = False
+
+    @abstractmethod
+    def transcribe(self, recording: PreparedRecording) -> str:
+        pass
+
+    def close(self):
+        pass
+
+
+class WhisperAPIEngine(STTEngine):
+    name = "whisper-api"
+    uploads = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def transcribe(self, recording: PreparedRecording) -> str:
+        start = time.perf_counter()
+        transcript = limited_call(
+            "openai", "whisper-1",
+            lambda: self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(recording.filename, recording.data)
+            ),
+            priority=LIVE,
+            max_retries=2
+        )
+        # Whisper bills the uploaded audio, i.e. after silence trimming
+        record_usage("whisper-1", audio_seconds=recording.speech_s, latency_s=time.perf_counter() - start)
+        return transcript.text
+
+
+def model_input(recording: PreparedRecording) -> np.ndarray:
+    """Float32 mono audio at 16kHz, as Whisper models expect."""
+    pcm = recording.samples.astype("<i2").tobytes()
+    if recording.rate != TARGET_RATE:
+        pcm, _ = audioop.ratecv(pcm, 2, 1, recording.rate, TARGET_RATE, None)
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768
+
+
+class LocalWhisperEngine(STTEngine):
+    """faster-whisper on the CPU, with a worker pool and opportunistic batching."""
+    name = "local-whisper"
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        compute_type: Optional[str] = None,
+        workers: Optional[int] = None,
+        cpu_threads: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        language: str = "en"
+    ):
+        try:
+            import faster_whisper
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError('STT_ENGINE=local needs faster-whisper: pip install "faster-whisper~=1.2"')
+
+        cores = os.cpu_count() or 1
+        self.model_name = model or os.getenv("STT_LOCAL_MODEL", "base.en")
+        self.cpu_threads = cpu_threads or int(os.getenv("STT_LOCAL_THREADS", min(4, cores)))
+        self.workers = workers or int(os.getenv("STT_LOCAL_WORKERS", max(1, cores // self.cpu_threads)))
+        self.batched = faster_whisper.__version__.startswith(BATCHED_DECODE_VERSIONS)
+        # Without batched decoding each worker takes one clip, and the pool decodes them in parallel
+        self.batch_size = (batch_size or int(os.getenv("STT_LOCAL_BATCH", 8))) if self.batched else 1
+        self.language = language
+        self.name = f"local-whisper:{self.model_name}"
+        self.model = WhisperModel(
+            self.model_name,
+            device="cpu",
+            compute_type=compute_type or os.getenv("STT_LOCAL_COMPUTE_TYPE", "int8"),
+            cpu_threads=self.cpu_threads,
+            num_workers=self.workers
+        )
+        self.stats = {"clips": 0, "batches": 0, "largest_batch": 0, "batch_fallbacks": 0}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"stt-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def transcribe(self, recording: PreparedRecording) -> str:
+        start = time.perf_counter()
+        future = Future()
+        self._queue.put((model_input(recording), future))
+        text = future.result()
+        # Free, but counted so audio volume shows up next to the API engine's
+        record_usage(self.name, audio_seconds=recording.speech_s, latency_s=time.perf_counter() - start)
+        return text
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Leave the shutdown marker for this worker's next loop
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._run(batch)
+
+    def _run(self, batch):
+        with self._lock:
+            self.stats["clips"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        audios = [audio for audio, _ in batch]
+        try:
+            if len(batch) > 1 and all(len(audio) <= WINDOW_SECONDS * TARGET_RATE for audio in audios):
+                try:
+                    texts = self._decode_batch(audios)
+                except Exception as e:
+                    print(f"Batched STT failed, decoding clips one at a time: {e}")
+                    with self._lock:
+                        self.stats["batch_fallbacks"] += 1
+                    texts = [self._decode(audio) for audio in audios]
+            else:
+                texts = [self._decode(audio) for audio in audios]
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), text in zip(batch, texts):
+            future.set_result(text)
+
+    def _decode(self, audio: np.ndarray) -> str:
+        segments, _ = self.model.transcribe(
+            audio,
+            language=self.language,
+            beam_size=1,
+            condition_on_previous_text=False
+        )
+        return "".join(segment.text for segment in segments).strip()
+
+    def _decode_batch(self, audios: List[np.ndarray]) -> List[str]:
+        """Greedy-decode several short clips in one encoder/decoder pass."""
+        from faster_whisper.tokenizer import Tokenizer
+
+        extractor = self.model.feature_extractor
+        window = WINDOW_SECONDS * TARGET_RATE
+        features = np.stack([
+            extractor(np.pad(audio, (0, window - len(audio))))[:, :extractor.nb_max_frames]
+            for audio in audios
+        ])
+        tokenizer = Tokenizer(
+            self.model.hf_tokenizer,
+            self.model.model.is_multilingual,
+            task="transcribe",
+            language=self.language
+        )
+        prompt = self.model.get_prompt(tokenizer, previous_tokens=[], without_timestamps=True)
+        results = self.model.model.generate(
+            self.model.encode(features),
+            [prompt] * len(audios),
+            beam_size=1,
+            # Half the decoder's 448-token context, ample for a 10s turn
+            max_length=224,
+            suppress_blank=True,
+            suppress_tokens=[-1]
+        )
+        return [
+            tokenizer.decode([token for token in result.sequences_ids[0] if token < tokenizer.eot]).strip()
+            for result in results
+        ]
+
+
+def create_engine(name: Optional[str] = None, client=None) -> STTEngine:
+    """The engine named by ``name`` or STT_ENGINE ("api" or "local")."""
+    name = name or os.getenv("STT_ENGINE", "api")
+    if name == "api":
+        if client is None:
+            raise ValueError("The Whisper API engine needs an OpenAI client.")
+        return WhisperAPIEngine(client)
+    if name == "local":
+        return LocalWhisperEngine()
+    raise ValueError(f"Unknown STT engine '{name}' (expected 'api' or 'local')")
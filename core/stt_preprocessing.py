@@ -0,0 +1,197 @@
+"""Prepare Twilio recordings for Whisper: trim silence, downmix, compress.
+
+Twilio records everything from the beep until ``max_length``, so a typical
+clip carries leading and trailing silence and long pauses.
+``prepare_recording`` cuts it down to the speech with a little padding,
+removes a leading beep, downmixes to mono at no more than 16kHz and encodes
+the result compactly. A clip without speech is reported as such so the caller
+can skip the API call.
+"""
+import io
+import os
+import shutil
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .telephony_audio import TELEPHONY_RATE, mulaw_wav
+
+try:
+    import audioop
+except ImportError:  # Python 3.13+: pydub ships a pure-Python fallback
+    from pydub import pyaudioop as audioop
+
+# Whisper resamples to 16kHz internally, so anything above it is wasted upload
+TARGET_RATE = 16000
+FRAME_MS = 20
+
+
+@dataclass
+class PreparedRecording:
+    """A recording ready for upload, or the verdict that it has no speech.
+
+    ``data`` is the encoded upload; ``samples`` holds the same audio as 16-bit
+    mono PCM at ``rate`` for engines that decode locally.
+    """
+    data: bytes
+    filename: str
+    duration_s: float
+    speech_s: float
+    original_bytes: int
+    has_speech: bool = True
+    samples: Optional[np.ndarray] = None
+    rate: int = 0
+
+    @property
+    def uploaded_bytes(self) -> int:
+        return len(self.data)
+
+
+def upload_format() -> str:
+    """"opus" (needs ffmpeg), "ulaw" or "wav"; STT_UPLOAD_FORMAT overrides."""
+    configured = os.getenv("STT_UPLOAD_FORMAT", "auto")
+    if configured != "auto":
+        return configured
+    return "opus" if shutil.which("ffmpeg") else "ulaw"
+
+
+def frame_levels(samples: np.ndarray, rate: int) -> np.ndarray:
+    """RMS level of each 20ms frame in dBFS, with DC offset removed."""
+    frame = max(1, rate * FRAME_MS // 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return np.zeros(0)
+    frames = samples[:count * frame].reshape(count, frame)
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    rms = np.sqrt((frames ** 2).mean(axis=1)) + 1e-9
+    return 20 * np.log10(rms)
+
+
+def beep_frames(samples: np.ndarray, rate: int, max_ms: int = 600) -> int:
+    """Number of leading frames that are a pure tone (the record beep)."""
+    frame = rate * FRAME_MS // 1000
+    window = np.hanning(frame)
+    count = 0
+    for i in range(min(len(samples) // frame, max_ms // FRAME_MS)):
+        spectrum = np.abs(np.fft.rfft(samples[i * frame:(i + 1) * frame] * window, 4 * frame)) ** 2
+        peak = int(spectrum.argmax())
+        frequency = peak * rate / (4 * frame)
+        concentration = spectrum[max(0, peak - 6):peak + 7].sum() / (spectrum.sum() + 1e-12)
+        # Voiced speech is tonal too, but its fundamental sits well below this
+        if frequency < 700 or concentration < 0.85:
+            break
+        count += 1
+    return count if count * FRAME_MS >= 60 else 0
+
+
+def speech_segments(
+    levels: np.ndarray,
+    min_run_ms: int = 100,
+    max_gap_ms: int = 600,
+    margin_db: float = 12.0,
+    floor_db: float = -50.0
+) -> List[Tuple[int, int]]:
+    """Speech as (first, last) frame ranges, inclusive; empty if there is none.
+
+    The threshold adapts to the line: a frame is loud when it is
+    ``margin_db`` above the clip's noise floor (its quietest 10% of frames),
+    or within ``margin_db`` of its peak for clips that are speech throughout,
+    and always above ``floor_db`` absolute. Loud runs shorter than
+    ``min_run_ms`` are clicks, not speech. Runs closer than ``max_gap_ms``
+    are merged, so only longer pauses are cut.
+    """
+    if len(levels) == 0:
+        return []
+    noise = float(np.percentile(levels, 10))
+    threshold = max(floor_db, min(noise + margin_db, float(levels.max()) - margin_db))
+    loud = np.concatenate(([False], levels > threshold, [False]))
+    edges = np.flatnonzero(np.diff(loud.astype(np.int8)))
+    segments = []
+    for first, end in zip(edges[::2], edges[1::2]):
+        if (end - first) * FRAME_MS < min_run_ms:
+            continue
+        if segments and (first - segments[-1][1]) * FRAME_MS <= max_gap_ms:
+            segments[-1] = (segments[-1][0], int(end) - 1)
+        else:
+            segments.append((int(first), int(end) - 1))
+    return segments
+
+
+def encode(samples: np.ndarray, rate: int, fmt: str) -> tuple:
+    """Encode mono 16-bit samples; returns (bytes, filename)."""
+    pcm = samples.astype("<i2").tobytes()
+    if fmt == "opus":
+        from pydub import AudioSegment
+        buffer = io.BytesIO()
+        segment = AudioSegment(data=pcm, sample_width=2, frame_rate=rate, channels=1)
+        segment.export(buffer, format="ogg", codec="libopus", bitrate="24k")
+        return buffer.getvalue(), "speech.ogg"
+    if fmt == "ulaw":
+        # Phone audio was μ-law on the wire, so this loses nothing at 8kHz
+        if rate != TELEPHONY_RATE:
+            pcm, _ = audioop.ratecv(pcm, 2, 1, rate, TELEPHONY_RATE, None)
+        return mulaw_wav(audioop.lin2ulaw(pcm, 2)), "speech.wav"
+    from pydub import AudioSegment
+    buffer = io.BytesIO()
+    AudioSegment(data=pcm, sample_width=2, frame_rate=rate, channels=1).export(buffer, format="wav")
+    return buffer.getvalue(), "speech.wav"
+
+
+def _load_samples(path: str) -> Tuple[np.ndarray, int]:
+    from pydub import AudioSegment
+    segment = AudioSegment.from_wav(path)
+    segment = segment.set_channels(1).set_sample_width(2)
+    if segment.frame_rate > TARGET_RATE:
+        segment = segment.set_frame_rate(TARGET_RATE)
+    return np.frombuffer(segment.raw_data, dtype="<i2"), segment.frame_rate
+
+
+def load_recording(path: str) -> PreparedRecording:
+    """A recording as-is: the original file for upload and, if it parses, its audio."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        samples, rate = _load_samples(path)
+    except Exception:
+        # Whisper may still cope with a file we could not parse
+        return PreparedRecording(data, os.path.basename(path), 0.0, 0.0, len(data))
+    duration = len(samples) / rate
+    return PreparedRecording(
+        data, os.path.basename(path), duration, duration, len(data), samples=samples, rate=rate
+    )
+
+
+def prepare_recording(
+    path: str,
+    padding_ms: int = 200,
+    fmt: Optional[str] = None,
+    encode_audio: bool = True
+) -> PreparedRecording:
+    """Load a recording and reduce it to the speech Whisper needs to hear.
+
+    With ``encode_audio=False`` only ``samples`` is filled in, for engines
+    that never upload.
+    """
+    original_bytes = os.path.getsize(path)
+    samples, rate = _load_samples(path)
+    duration = len(samples) / rate
+
+    frame = rate * FRAME_MS // 1000
+    skip = beep_frames(samples.astype(np.float64) / 32768, rate)
+    levels = frame_levels(samples[skip * frame:].astype(np.float64) / 32768, rate)
+    segments = speech_segments(levels)
+    if not segments:
+        return PreparedRecording(b"", "", duration, 0.0, original_bytes, has_speech=False, rate=rate)
+
+    # Keep each stretch of speech with some padding; longer pauses shrink to
+    # twice the padding
+    pad = padding_ms // FRAME_MS
+    speech = np.concatenate([
+        samples[(skip + max(0, first - pad)) * frame:(skip + min(len(levels) - 1, last + pad) + 1) * frame]
+        for first, last in segments
+    ])
+    data, filename = encode(speech, rate, fmt or upload_format()) if encode_audio else (b"", "")
+    return PreparedRecording(
+        data, filename, duration, len(speech) / rate, original_bytes, samples=speech, rate=rate
+    )
@@ -1,75 +1,252 @@
 from openai import OpenAI
+import logging
 import os
+import threading
+import time
 import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+from .rate_limiter import LIVE, RateLimited, limited_call, parse_retry_after
+from .resilience import CircuitBreaker, LatencyWindow
+from .telephony_audio import AudioCache, get_profile, to_profile
+from .usage import in_context, record_usage
+
+logger = logging.getLogger(__name__)
+
+# Default voice ("Rachel"); change to any voice ID from your ElevenLabs library
+ELEVENLABS_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+OPENAI_VOICE = "alloy"
+# Model used with each provider, for the request and for usage accounting
+TTS_MODELS = {"openai": "tts-1", "elevenlabs": "eleven_multilingual_v2"}
 
 class Synthesizer:
+    # Shared so a request that loses a hedge can finish in the background
+    # without holding up the turn that started it
+    _executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="tts")
+
     def __init__(self):
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
-        
+
         if not self.openai_api_key and not self.elevenlabs_api_key:
             raise ValueError("Neither OPENAI_API_KEY nor ELEVENLABS_API_KEY found.")
-            
+
+        self.elevenlabs_base_url = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io").rstrip("/")
+        # Per-turn latency SLO: the most we wait on the primary before hedging,
+        # and responses slower than this count as failures for its breaker
+        self.latency_slo = float(os.getenv("TTS_LATENCY_SLO", 2.0))
+        # Hedge delay until enough latencies are recorded to estimate a p95
+        self.default_hedge_delay = float(os.getenv("TTS_HEDGE_DELAY", 1.0))
+        self.request_timeout = float(os.getenv("TTS_REQUEST_TIMEOUT", 10.0))
+        # "telephony" (8kHz μ-law WAV, the default) or "mp3"
+        self.profile = get_profile()
+        self.file_extension = self.profile.extension
+        self.cache = AudioCache() if os.getenv("TTS_CACHE", "1") != "0" else None
+
         if self.openai_api_key:
-            self.client = OpenAI(api_key=self.openai_api_key)
+            # Retries are handled by the shared rate limiter; the base URL can
+            # be redirected with OPENAI_BASE_URL
+            self.client = OpenAI(api_key=self.openai_api_key, max_retries=0, timeout=self.request_timeout)
+
+        # ElevenLabs is preferred when configured, OpenAI is the fallback
+        self.providers = []
+        if self.elevenlabs_api_key:
+            self.providers.append("elevenlabs")
+        if self.openai_api_key:
+            self.providers.append("openai")
+        self.fetchers = {"elevenlabs": self._fetch_elevenlabs, "openai": self._fetch_openai}
+        self.latency = {name: LatencyWindow() for name in self.providers}
+        self.breakers = {
+            name: CircuitBreaker(
+                failure_threshold=int(os.getenv("TTS_BREAKER_FAILURES", 3)),
+                reset_timeout=float(os.getenv("TTS_BREAKER_RESET", 30.0))
+            )
+            for name in self.providers
+        }
+        self.stats = {
+            "turns": 0, "hedged": 0, "won_by_backup": 0, "breaker_skips": 0, "failed": 0,
+            "cache_hits": 0, "bytes_served": 0,
+        }
+        # Turns from concurrent calls, and their hedge threads, update stats together
+        self._stats_lock = threading.Lock()
 
     def synthesize(self, text: str, output_path: str):
         """
-        Converts text to speech using ElevenLabs (preferred) or OpenAI TTS.
+        Converts text to speech, writing the audio to output_path.
+
+        The preferred provider is asked first. If it has not answered within its
+        p95 latency (capped at the SLO) the same request is sent to the next
+        provider and whichever succeeds first is used. Providers whose circuit
+        breaker is open are skipped.
         """
-        if self.elevenlabs_api_key:
-            return self.synthesize_elevenlabs(text, output_path)
-        else:
-            return self.synthesize_openai(text, output_path)
+        audio = self.synthesize_bytes(text)
+        if audio is None:
+            return None
+        with open(output_path, "wb") as f:
+            f.write(audio)
+        self._count("bytes_served", len(audio))
+        logger.debug(f"TTS: {len(audio)} bytes ({self.profile.name}), {self.bytes_per_turn:.0f} bytes/turn on average")
+        return output_path
+
+    @property
+    def bytes_per_turn(self) -> float:
+        with self._stats_lock:
+            served = self.stats["turns"] - self.stats["failed"]
+            return self.stats["bytes_served"] / served if served else 0.0
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
 
     def synthesize_openai(self, text: str, output_path: str):
+        return self._synthesize_with("openai", text, output_path)
+
+    def synthesize_elevenlabs(self, text: str, output_path: str):
+        return self._synthesize_with("elevenlabs", text, output_path)
+
+    def _synthesize_with(self, provider: str, text: str, output_path: str):
         try:
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                voice="alloy",
-                input=text
-            )
-            response.stream_to_file(output_path)
-            return output_path
+            audio = self._attempt(provider, text)
         except Exception as e:
-            print(f"Error synthesizing speech (OpenAI): {e}")
+            print(f"Error synthesizing speech ({provider}): {e}")
             return None
+        with open(output_path, "wb") as f:
+            f.write(audio)
+        return output_path
 
-    def synthesize_elevenlabs(self, text: str, output_path: str):
+    def hedge_delay(self, provider: str) -> float:
+        """
+        How long to wait on a provider before racing the next one.
+        """
+        p95 = self.latency[provider].percentile(0.95)
+        delay = p95 if p95 is not None else self.default_hedge_delay
+        return min(delay, self.latency_slo)
+
+    def synthesize_bytes(self, text: str) -> Optional[bytes]:
+        self._count("turns")
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.key(self.profile, f"{ELEVENLABS_VOICE_ID}|{OPENAI_VOICE}", text)
+            audio = self.cache.get(cache_key, self.profile)
+            if audio is not None:
+                self._count("cache_hits")
+                return audio
+        audio = self._race_providers(text)
+        if audio is None:
+            self._count("failed")
+        elif self.cache:
+            self.cache.put(cache_key, self.profile, audio)
+        return audio
+
+    def _race_providers(self, text: str) -> Optional[bytes]:
+        waiting = list(self.providers)
+        # Every breaker is open: trying something beats certain silence
+        forced = False
+        pending = {}
+
+        def next_provider() -> Optional[str]:
+            # Breakers are asked only when their provider is about to be sent the
+            # request, so a half-open probe is never spent on a hedge that never runs
+            while waiting:
+                provider = waiting.pop(0)
+                if forced or self.breakers[provider].allow():
+                    return provider
+                self._count("breaker_skips")
+            return None
+
+        def launch(provider: str) -> float:
+            pending[self._executor.submit(in_context(self._attempt), provider, text)] = provider
+            return time.monotonic() + self.hedge_delay(provider)
+
+        primary = next_provider()
+        if primary is None:
+            forced = True
+            waiting = list(self.providers)
+            primary = next_provider()
+        hedge_at = launch(primary)
+        while pending:
+            timeout = max(0.0, hedge_at - time.monotonic()) if waiting else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slower than usual: race the next provider
+                backup = next_provider()
+                if backup is not None:
+                    self._count("hedged")
+                    hedge_at = launch(backup)
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    audio = future.result()
+                except Exception as e:
+                    print(f"Error synthesizing speech ({provider}): {e}")
+                    if not pending:
+                        backup = next_provider()
+                        if backup is not None:
+                            hedge_at = launch(backup)
+                    continue
+                if provider != primary:
+                    self._count("won_by_backup")
+                return audio
+        return None
+
+    def _attempt(self, provider: str, text: str) -> bytes:
+        start = time.monotonic()
         try:
-            # Using a default voice ID (e.g., "Rachel" - 21m00Tcm4TlvDq8ikWAM)
-            # You can change this to any voice ID from your library
-            voice_id = "21m00Tcm4TlvDq8ikWAM" 
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-            
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": self.elevenlabs_api_key
-            }
-            
-            data = {
-                "text": text,
-                "model_id": "eleven_multilingual_v2",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.5
-                }
+            audio = self.fetchers[provider](text)
+        except Exception:
+            self.breakers[provider].record_failure()
+            raise
+        elapsed = time.monotonic() - start
+        # Hedge losers are billed too; they count if they finish before the turn is logged
+        record_usage(TTS_MODELS[provider], characters=len(text), latency_s=elapsed)
+        self.latency[provider].record(elapsed)
+        if elapsed > self.latency_slo:
+            self.breakers[provider].record_failure()
+        else:
+            self.breakers[provider].record_success()
+        return audio
+
+    def _fetch_openai(self, text: str) -> bytes:
+        response = limited_call(
+            "openai", TTS_MODELS["openai"],
+            lambda: self.client.audio.speech.create(
+                model=TTS_MODELS["openai"],
+                voice=OPENAI_VOICE,
+                input=text,
+                response_format=self.profile.openai_format
+            ),
+            priority=LIVE,
+            max_retries=2
+        )
+        return to_profile(self.profile, self.profile.openai_format, response.content)
+
+    def _fetch_elevenlabs(self, text: str) -> bytes:
+        output_format = self.profile.elevenlabs_format
+        url = f"{self.elevenlabs_base_url}/v1/text-to-speech/{ELEVENLABS_VOICE_ID}?output_format={output_format}"
+
+        headers = {
+            "Accept": "audio/mpeg" if output_format.startswith("mp3") else "audio/basic",
+            "Content-Type": "application/json",
+            "xi-api-key": self.elevenlabs_api_key
+        }
+
+        data = {
+            "text": text,
+            "model_id": TTS_MODELS["elevenlabs"],
+            "voice_settings": {
+                "stability": 0.5,
+                "similarity_boost": 0.5
             }
-            
-            response = requests.post(url, json=data, headers=headers)
-            
-            if response.status_code == 200:
-                with open(output_path, 'wb') as f:
-                    f.write(response.content)
-                return output_path
-            else:
-                print(f"ElevenLabs Error: {response.text}")
-                # Fallback to OpenAI if possible
-                if self.openai_api_key:
-                    print("Falling back to OpenAI TTS...")
-                    return self.synthesize_openai(text, output_path)
-                return None
-        except Exception as e:
-            print(f"Error synthesizing speech (ElevenLabs): {e}")
-            return None
+        }
+
+        def request():
+            response = requests.post(url, json=data, headers=headers, timeout=self.request_timeout)
+            if response.status_code == 429:
+                raise RateLimited("ElevenLabs rate limit", parse_retry_after(response.headers))
+            return response
+
+        response = limited_call("elevenlabs", data["model_id"], request, priority=LIVE, max_retries=2)
+        if response.status_code != 200:
+            raise RuntimeError(f"ElevenLabs error {response.status_code}: {response.text[:200]}")
+        return to_profile(self.profile, output_format, response.content)
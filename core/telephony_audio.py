@@ -0,0 +1,118 @@
+"""Output audio profiles for TTS, including native 8kHz μ-law for phone lines."""
+import hashlib
+import io
+import os
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import audioop
+except ImportError:  # Python 3.13+: pydub ships a pure-Python fallback
+    from pydub import pyaudioop as audioop
+
+TELEPHONY_RATE = 8000
+WAVE_FORMAT_MULAW = 7
+# OpenAI "pcm" output: 24kHz, 16-bit little-endian, mono
+OPENAI_PCM_RATE = 24000
+
+
+@dataclass(frozen=True)
+class AudioProfile:
+    """Formats to request from each provider and the file type served to Twilio."""
+    name: str
+    extension: str
+    elevenlabs_format: str
+    openai_format: str
+
+
+PROFILES = {
+    # What the phone line carries: 8kHz μ-law in a WAV container, which
+    # Twilio plays without transcoding.
+    "telephony": AudioProfile("telephony", "wav", elevenlabs_format="ulaw_8000", openai_format="pcm"),
+    # Provider defaults, as before telephony output existed
+    "mp3": AudioProfile("mp3", "mp3", elevenlabs_format="mp3_44100_128", openai_format="mp3"),
+}
+
+
+def get_profile(name: Optional[str] = None) -> AudioProfile:
+    name = name or os.getenv("TTS_AUDIO_PROFILE", "telephony")
+    if name not in PROFILES:
+        raise ValueError(f"Unknown TTS audio profile '{name}' (expected one of {sorted(PROFILES)})")
+    return PROFILES[name]
+
+
+def mulaw_wav(ulaw: bytes, sample_rate: int = TELEPHONY_RATE) -> bytes:
+    """Wrap raw mono μ-law samples in a WAV header."""
+    fmt = struct.pack("<HHIIHHH", WAVE_FORMAT_MULAW, 1, sample_rate, sample_rate, 1, 8, 0)
+    fact = struct.pack("<I", len(ulaw))
+    pad = b"\x00" if len(ulaw) % 2 else b""
+    chunks = (
+        b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"fact" + struct.pack("<I", len(fact)) + fact
+        + b"data" + struct.pack("<I", len(ulaw)) + ulaw + pad
+    )
+    return b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks
+
+
+def pcm16_to_mulaw_wav(pcm: bytes, sample_rate: int = OPENAI_PCM_RATE) -> bytes:
+    """Resample 16-bit mono PCM to 8kHz and encode it as μ-law WAV."""
+    from pydub import AudioSegment
+    segment = AudioSegment(data=pcm, sample_width=2, frame_rate=sample_rate, channels=1)
+    segment = segment.set_frame_rate(TELEPHONY_RATE)
+    return mulaw_wav(audioop.lin2ulaw(segment.raw_data, 2))
+
+
+def encoded_to_mulaw_wav(data: bytes, fmt: str) -> bytes:
+    """Transcode compressed audio (e.g. mp3) to 8kHz μ-law WAV; needs ffmpeg."""
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(io.BytesIO(data), format=fmt)
+    segment = segment.set_channels(1).set_sample_width(2).set_frame_rate(TELEPHONY_RATE)
+    return mulaw_wav(audioop.lin2ulaw(segment.raw_data, 2))
+
+
+def to_profile(profile: AudioProfile, provider_format: str, data: bytes) -> bytes:
+    """Convert a provider response in ``provider_format`` to the profile's file."""
+    if profile.extension == "wav":
+        if provider_format == "ulaw_8000":
+            return mulaw_wav(data)
+        if provider_format == "pcm":
+            return pcm16_to_mulaw_wav(data)
+        return encoded_to_mulaw_wav(data, provider_format.split("_")[0])
+    return data
+
+
+class AudioCache:
+    """Rendered TTS files on disk, keyed by profile, voice and text.
+
+    A phrase is synthesized and transcoded once; later turns that say the
+    same thing reuse the file.
+    """
+
+    def __init__(self, directory: str = os.path.join("static", "tts_cache")):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, profile: AudioProfile, voice: str, text: str) -> str:
+        return hashlib.sha256(f"{profile.name}|{voice}|{text}".encode()).hexdigest()
+
+    def path(self, key: str, profile: AudioProfile) -> str:
+        return os.path.join(self.directory, f"{key}.{profile.extension}")
+
+    def get(self, key: str, profile: AudioProfile) -> Optional[bytes]:
+        path = self.path(key, profile)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Mark as recently used for the storage manager's eviction order
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, profile: AudioProfile, data: bytes):
+        path = self.path(key, profile)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -1,24 +1,63 @@
 from openai import OpenAI
+import logging
 import os
+import time
+from .stt_engines import STTEngine, create_engine
+from .stt_preprocessing import load_recording, prepare_recording
+
+logger = logging.getLogger(__name__)
 
 class Transcriber:
-    def __init__(self):
+    def __init__(self, engine=None):
+        """
+        ``engine`` is an engine name (default: STT_ENGINE) or an STTEngine instance.
+        """
         self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY not found.")
-        self.client = OpenAI(api_key=self.api_key)
+        engine_name = engine or os.getenv("STT_ENGINE", "api")
+        if isinstance(engine_name, STTEngine):
+            self.client = None
+        elif engine_name == "api":
+            if not self.api_key:
+                raise ValueError("OPENAI_API_KEY not found.")
+            # Retries are handled by the shared rate limiter
+            self.client = OpenAI(api_key=self.api_key, max_retries=0)
+        else:
+            self.client = None
+        # Loaded once here, so a local model is ready before the first call
+        self.engine = engine_name if isinstance(engine_name, STTEngine) else create_engine(engine_name, self.client)
+        # Trim and compress recordings before upload; STT_PREPROCESS=0 sends them as recorded
+        self.preprocess = os.getenv("STT_PREPROCESS", "1") != "0"
+        self.stats = {"calls": 0, "no_speech": 0, "original_bytes": 0, "uploaded_bytes": 0}
 
     def transcribe(self, audio_file_path: str):
         """
-        Transcribes the audio file using OpenAI Whisper.
+        Transcribes the audio file with the configured STT engine.
+
+        Returns "" without running the engine when the recording has no speech,
+        and None if transcription failed.
         """
         try:
-            with open(audio_file_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file
-                )
-            return transcript.text
+            prepared = None
+            if self.preprocess:
+                try:
+                    prepared = prepare_recording(audio_file_path, encode_audio=self.engine.uploads)
+                except Exception as e:
+                    print(f"Error preprocessing audio, using it as recorded: {e}")
+            if prepared is None:
+                prepared = load_recording(audio_file_path)
+            self.stats["original_bytes"] += prepared.original_bytes
+            if not prepared.has_speech:
+                self.stats["no_speech"] += 1
+                logger.debug(f"STT: no speech in {prepared.duration_s:.1f}s recording, skipping {self.engine.name}")
+                return ""
+            if self.engine.uploads:
+                self.stats["uploaded_bytes"] += prepared.uploaded_bytes
+            self.stats["calls"] += 1
+
+            start = time.monotonic()
+            text = self.engine.transcribe(prepared)
+            logger.debug(f"STT: {prepared.speech_s:.1f}s of speech, {self.engine.name} took {time.monotonic() - start:.2f}s")
+            return text
         except Exception as e:
             print(f"Error transcribing audio: {e}")
             return None
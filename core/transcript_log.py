@@ -0,0 +1,110 @@
+"""Versioned, append-only call transcripts.
+
+A call's transcript is a JSON Lines file, ``recordings/{call_sid}_transcript.jsonl``.
+Its first record describes the call, then each turn is appended as soon as it
+happens, and a final record closes the call:
+
+    {"type": "call", "version": 2, "call_id": ..., "scenario": ..., "model": ..., "started_at": ...}
+    {"type": "turn", "index": 0, "role": "assistant", "content": ..., "at": ...,
+     "audio": "{call_sid}_0_bot.mp3", "timing": {"llm_ms": ..., "tts_ms": ...},
+     "usage": {"gpt-4": {"requests": 1, "prompt_tokens": ..., ...}, "tts-1": {"requests": 1, "characters": ...}}}
+    {"type": "turn", "index": 1, "role": "user", "content": ..., "at": ...,
+     "audio": "{call_sid}_0_user.wav", "audio_duration_s": ..., "timing": {"download_ms": ..., "stt_ms": ...},
+     "usage": {"whisper-1": {"requests": 1, "audio_seconds": ...}}}
+    {"type": "end", "ended_at": ..., "duration_s": ..., "turns": ..., "usage": {...}, "cost_usd": ...}
+
+Usage is per model, in the units each one is billed in (see ``core/usage.py``).
+
+The system prompt is referenced by scenario name rather than copied, and the
+synthetic instruction that makes the bot speak first is not a turn. While the
+call is in progress the file is named ``*.jsonl.part``; ``close()`` renames it,
+so directory scans only see finished calls and a crash still leaves every
+turn up to the last one on disk. ``evaluation/transcripts.py`` reads both
+this format and the original list-of-messages JSON.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from .usage import Usage, merge_usage, round_usage, usage_cost
+
+TRANSCRIPT_VERSION = 2
+TRANSCRIPT_LOG_SUFFIX = "_transcript.jsonl"
+PARTIAL_SUFFIX = ".part"
+
+
+class TranscriptWriter:
+    """Appends one call's records, flushing after each so nothing waits in a buffer."""
+
+    def __init__(self, directory: str, call_id: str, scenario: str, model: Optional[str] = None):
+        self.call_id = call_id
+        self.path = os.path.join(directory, f"{call_id}{TRANSCRIPT_LOG_SUFFIX}")
+        self.partial_path = self.path + PARTIAL_SUFFIX
+        self.turns = 0
+        self.usage: Usage = {}
+        self.started_at = time.time()
+        self.closed = False
+        self._lock = threading.Lock()
+        self._file = open(self.partial_path, "a", encoding="utf-8")
+        self._append({
+            "type": "call",
+            "version": TRANSCRIPT_VERSION,
+            "call_id": call_id,
+            "scenario": scenario,
+            "model": model,
+            "started_at": self.started_at,
+        })
+
+    def _append(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def add_turn(
+        self,
+        role: str,
+        content: str,
+        audio: Optional[str] = None,
+        audio_duration_s: Optional[float] = None,
+        timing: Optional[Dict[str, float]] = None,
+        usage: Optional[Usage] = None
+    ) -> int:
+        """Append a turn and return its index."""
+        details = {"role": role, "content": content, "at": time.time()}
+        if audio:
+            details["audio"] = audio
+        if audio_duration_s is not None:
+            details["audio_duration_s"] = audio_duration_s
+        if timing:
+            details["timing"] = {name: round(ms, 1) for name, ms in timing.items() if ms is not None}
+        if usage:
+            details["usage"] = usage
+        with self._lock:
+            if self.closed:
+                raise ValueError(f"Transcript for {self.call_id} is already closed")
+            index = self.turns
+            self._append({"type": "turn", "index": index, **details})
+            self.turns += 1
+            merge_usage(self.usage, usage)
+            return index
+
+    def close(self, reason: str = "hangup") -> str:
+        """Write the closing record and publish the file; returns its final path."""
+        with self._lock:
+            if self.closed:
+                return self.path
+            ended_at = time.time()
+            self._append({
+                "type": "end",
+                "reason": reason,
+                "ended_at": ended_at,
+                "duration_s": round(ended_at - self.started_at, 3),
+                "turns": self.turns,
+                "usage": round_usage(self.usage),
+                "cost_usd": round(usage_cost(self.usage), 6),
+            })
+            self._file.close()
+            os.replace(self.partial_path, self.path)
+            self.closed = True
+        return self.path
@@ -0,0 +1,166 @@
+"""Token, audio and character accounting for provider requests.
+
+Usage is kept per model, since that is how it is billed:
+
+    {"gpt-4": {"requests": 3, "prompt_tokens": 812, "completion_tokens": 95, "cached_tokens": 0, "latency_s": 4.1},
+     "whisper-1": {"requests": 2, "audio_seconds": 6.4, "latency_s": 1.2},
+     "tts-1": {"requests": 3, "characters": 310, "latency_s": 2.0}}
+
+Each call site reports a request with ``record_usage()``. It is added to
+every ``UsageMeter`` opened with ``metered()`` in the current context (a
+webhook turn, a check, a whole evaluation) and to ``process_usage``. Work handed to a thread pool keeps its meters if it is submitted
+through ``in_context()``.
+"""
+import contextvars
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+Usage = Dict[str, Dict[str, float]]
+
+# Approximate USD price per 1K tokens as (prompt, completion).
+MODEL_PRICING = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+# Cached prompt tokens are billed at this fraction of the prompt price
+CACHED_PROMPT_DISCOUNT = 0.5
+# Approximate USD per minute of audio transcribed
+AUDIO_PRICING = {"whisper-1": 0.006}
+# Approximate USD per 1K characters synthesized (ElevenLabs varies by plan)
+CHARACTER_PRICING = {"tts-1": 0.015, "eleven_multilingual_v2": 0.18}
+
+COUNTERS = ("requests", "prompt_tokens", "completion_tokens", "cached_tokens", "audio_seconds", "characters", "latency_s")
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimate the USD cost of a completion from its token usage."""
+    prompt_price, completion_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    uncached = prompt_tokens - cached_tokens
+    return (uncached * prompt_price + cached_tokens * prompt_price * CACHED_PROMPT_DISCOUNT
+            + completion_tokens * completion_price) / 1000
+
+
+def model_cost(model: str, counts: Dict[str, float]) -> float:
+    """Estimated USD cost of one model's usage; 0 for models without a price."""
+    return (
+        estimate_cost(model, counts.get("prompt_tokens", 0), counts.get("completion_tokens", 0),
+                      counts.get("cached_tokens", 0))
+        + counts.get("audio_seconds", 0) / 60 * AUDIO_PRICING.get(model, 0.0)
+        + counts.get("characters", 0) / 1000 * CHARACTER_PRICING.get(model, 0.0)
+    )
+
+
+def usage_cost(usage: Usage) -> float:
+    return sum(model_cost(model, counts) for model, counts in usage.items())
+
+
+def chat_usage(response) -> Dict[str, int]:
+    """Token counts from a chat completion response (zeros when it has none)."""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+    }
+
+
+def merge_usage(total: Usage, usage: Optional[Usage]) -> Usage:
+    """Add per-model usage into ``total`` in place; returns ``total``."""
+    for model, counts in (usage or {}).items():
+        into = total.setdefault(model, {})
+        for key, value in counts.items():
+            into[key] = into.get(key, 0) + (value or 0)
+    return total
+
+
+def round_usage(usage: Usage) -> Usage:
+    """A copy with float counters (seconds) rounded for storage."""
+    return {
+        model: {key: round(value, 3) if isinstance(value, float) else value for key, value in counts.items()}
+        for model, counts in usage.items()
+    }
+
+
+def usage_totals(usage: Usage) -> Dict[str, float]:
+    """Counters summed over models, plus the estimated cost."""
+    totals = {key: 0 for key in COUNTERS}
+    for counts in usage.values():
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+    totals["latency_s"] = round(totals["latency_s"], 3)
+    totals["audio_seconds"] = round(totals["audio_seconds"], 2)
+    totals["cost_usd"] = round(usage_cost(usage), 6)
+    return totals
+
+
+class UsageMeter:
+    """Usage recorded while the meter was open; safe to feed from several threads."""
+
+    def __init__(self):
+        self.usage: Usage = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.usage)
+
+    def add(self, model: str, counts: Dict[str, float]):
+        with self._lock:
+            into = self.usage.get(model)
+            if into is None:
+                self.usage[model] = dict(counts)
+                return
+            for key, value in counts.items():
+                into[key] = into.get(key, 0) + value
+
+    def __enter__(self) -> "UsageMeter":
+        self._token = _meters.set(_meters.get() + (self,))
+        return self
+
+    def __exit__(self, *exc_info):
+        _meters.reset(self._token)
+
+    def to_dict(self) -> Usage:
+        """A rounded copy, as stored in transcripts and reports."""
+        with self._lock:
+            return round_usage(self.usage)
+
+    @property
+    def cost(self) -> float:
+        with self._lock:
+            return usage_cost(self.usage)
+
+
+# Everything this process has used since it started
+process_usage = UsageMeter()
+
+_meters: contextvars.ContextVar[Tuple[UsageMeter, ...]] = contextvars.ContextVar("usage_meters", default=())
+
+
+def metered() -> UsageMeter:
+    """A meter that, used as a context manager, collects the usage of every request made
+    inside the block (nested meters all see it)."""
+    return UsageMeter()
+
+
+def record_usage(model: str, requests: int = 1, **counts: float):
+    """Report one provider request to the process totals and the open meters."""
+    counts = {"requests": requests, **{key: value for key, value in counts.items() if value}}
+    process_usage.add(model, counts)
+    for meter in _meters.get():
+        meter.add(model, counts)
+
+
+def in_context(func: Callable) -> Callable:
+    """Wrap ``func`` to run in the current context, e.g. before ``executor.submit``."""
+    if not _meters.get():
+        return func
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time, so each run gets its own copy
+        return context.copy().run(func, *args, **kwargs)
+    return run
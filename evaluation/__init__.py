@@ -5,6 +5,8 @@ from .checks.base import Check, CheckResult, EvaluationReport
 from .checks.boolean import BooleanCheck
 from .checks.threshold import ThresholdCheck
 from .checks.content import ContentCheck
+from .checks.llm import CascadeConfig, LLMCheck
+from .checks.transcript_view import TranscriptView
 
 __all__ = [
     "BugDetector",
@@ -18,4 +20,7 @@ __all__ = [
     "BooleanCheck",
     "ThresholdCheck",
     "ContentCheck",
+    "CascadeConfig",
+    "LLMCheck",
+    "TranscriptView",
 ]
\ No newline at end of file
@@ -1,12 +1,18 @@
-from openai import OpenAI
 import os
 import json
+import hashlib
 
 import logging
+import re
 import time
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from .check_runner import CheckRunner
 from .checks.base import EvaluationReport
+from .progress import track_llm_call
+from core.rate_limiter import BACKGROUND, estimate_tokens, limited_call, openai_usage
+from core.usage import chat_usage, in_context, metered, record_usage, usage_cost
+from .report_store import ReportStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,20 +46,152 @@ Output your analysis as a JSON object with the following structure:
 }
 """
 
+# Appended to the prompt when a long call is analyzed one window at a time
+WINDOW_PROMPT = """
+You are only shown turns {first}-{last} of a {total}-turn call; neighbouring windows overlap by a few turns.
+Report only issues visible in these turns and give each issue a "turn" field with the number of the turn it occurs in.
+{completion}
+"""
+WINDOW_MIDDLE = "The call continues after this window: do not judge task completion, set \"success\" to true unless the task has already visibly failed."
+WINDOW_END = "This window contains the end of the call: judge task completion from it."
+
+SEVERITY_RANK = {"high": 3, "medium": 2, "low": 1}
+
+
+def conversation_turns(transcript: List[Dict]) -> List[Dict]:
+    """Turns between the two parties, without the system prompt."""
+    return [turn for turn in transcript if turn.get("role") != "system"]
+
+
+def turn_windows(count: int, size: int, overlap: int) -> List[Tuple[int, int]]:
+    """[start, end) ranges of ``size`` turns covering ``count``, each overlapping the previous."""
+    step = max(1, size - overlap)
+    windows = []
+    start = 0
+    while True:
+        end = min(count, start + size)
+        windows.append((start, end))
+        if end >= count:
+            return windows
+        start += step
+
+
+def _description_words(issue: Dict) -> set:
+    return set(re.findall(r"[a-z0-9']+", (issue.get("description") or "").lower()))
+
+
+def _same_issue(a: Dict, b: Dict) -> bool:
+    if (a.get("type") or "other") != (b.get("type") or "other"):
+        return False
+    turn_a, turn_b = a.get("turn"), b.get("turn")
+    # Windows number turns the same way, so one issue seen twice has (nearly) the same turn
+    if isinstance(turn_a, int) and isinstance(turn_b, int) and abs(turn_a - turn_b) > 1:
+        return False
+    words_a, words_b = _description_words(a), _description_words(b)
+    if not words_a or not words_b:
+        return words_a == words_b
+    return len(words_a & words_b) / len(words_a | words_b) >= 0.5
+
+
+def merge_window_reports(call_id: str, windows: List[Tuple[int, int]], reports: List[Optional[Dict]]) -> Optional[Dict]:
+    """Combine per-window analyses into one report with the single-request schema.
+
+    Issues the overlap made two windows report are kept once, at the higher
+    severity. Task success is the final window's verdict unless an earlier
+    window saw the task fail. Only the final window sees how the call ends, so
+    if its analysis failed (and no earlier window saw a failure) success is
+    None. The quality score is the turn-weighted mean.
+    """
+    analyzed = [(window, report) for window, report in zip(windows, reports) if report]
+    if not analyzed:
+        return None
+    issues: List[Dict] = []
+    for _, report in analyzed:
+        for issue in report.get("issues") or []:
+            if not isinstance(issue, dict):
+                continue
+            duplicate = next((kept for kept in issues if _same_issue(kept, issue)), None)
+            if duplicate is None:
+                issues.append(dict(issue))
+            elif SEVERITY_RANK.get(issue.get("severity"), 0) > SEVERITY_RANK.get(duplicate.get("severity"), 0):
+                duplicate["severity"] = issue["severity"]
+    issues.sort(key=lambda issue: issue.get("turn") if isinstance(issue.get("turn"), int) else 0)
+
+    weights = [end - start for (start, end), _ in analyzed]
+    scores = [report.get("quality_score") for _, report in analyzed]
+    scored = [(score, weight) for score, weight in zip(scores, weights) if isinstance(score, (int, float))]
+    quality = round(sum(s * w for s, w in scored) / sum(w for _, w in scored)) if scored else None
+    final = reports[-1]
+    if not all(report.get("success", True) for report in reports[:-1] if report):
+        success = False
+    elif final:
+        success = bool(final.get("success", False))
+    else:
+        success = None
+    summaries = [report.get("summary") for _, report in analyzed if report.get("summary")]
+
+    merged = {
+        "call_id": call_id,
+        "success": success,
+        "quality_score": quality,
+        "issues": issues,
+        "summary": " ".join(summaries[-1:]) if summaries else "",
+        "windows": {"total": len(windows), "analyzed": len(analyzed), "turns": windows[-1][1]},
+    }
+    if len(analyzed) < len(windows):
+        merged["windows"]["failed"] = [
+            f"{start + 1}-{end}" for (start, end), report in zip(windows, reports) if not report
+        ]
+        # Success is not judged from a window that never saw the end of the call
+        merged["windows"]["final_analyzed"] = bool(final)
+    return merged
+
 class BugDetector:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=self.api_key)
+        self.model = "gpt-4-turbo"
         self.custom_evaluator: Optional[CheckRunner] = None
+        self._client = None
+        self._store: Optional[ReportStore] = None
+        # Calls longer than window_turns are analyzed in overlapping windows (0 disables)
+        self.window_turns = int(os.getenv("BUG_WINDOW_TURNS", 24))
+        self.window_overlap = int(os.getenv("BUG_WINDOW_OVERLAP", 4))
+        self.window_concurrency = int(os.getenv("BUG_WINDOW_CONCURRENCY", 8))
+    
+    @property
+    def client(self):
+        """Lazily created OpenAI client, so runs that skip every call never import it."""
+        if self._client is None:
+            from openai import OpenAI
+            # Retries are handled by the shared rate limiter
+            self._client = OpenAI(api_key=self.api_key, max_retries=0)
+        return self._client
     
-    def load_custom_evaluation(self, config_path: str):
+    @property
+    def store(self) -> ReportStore:
+        """Lazily opened report index shared by the save methods."""
+        if self._store is None:
+            self._store = ReportStore(os.path.join("reports", "index.sqlite3"))
+        return self._store
+    
+    def load_custom_evaluation(self, config_path: str, fast_fail: Optional[bool] = None):
         """Load custom evaluation checks from YAML config."""
         if os.path.exists(config_path):
-            self.custom_evaluator = CheckRunner(config_path)
+            self.custom_evaluator = CheckRunner(config_path, fast_fail=fast_fail)
             logger.info(f"Loaded custom evaluation from {config_path}")
         else:
             logger.warning(f"Custom evaluation config not found: {config_path}")
     
+    def fingerprint(self) -> str:
+        """Hash of the prompt, model and custom checks used by this detector."""
+        digest = hashlib.sha256(BUG_DETECTION_PROMPT.encode())
+        digest.update(self.model.encode())
+        if self.window_turns:
+            digest.update(f"{WINDOW_PROMPT}{self.window_turns}/{self.window_overlap}".encode())
+        if self.custom_evaluator:
+            digest.update(self.custom_evaluator.fingerprint().encode())
+        return digest.hexdigest()
+    
     def analyze_transcript(self, call_id: str, transcript: list):
         """
         Analyzes the transcript using GPT-4.
@@ -62,23 +200,75 @@ class BugDetector:
             logger.warning(f"Empty transcript for call {call_id}")
             return None
 
-        messages = [
-            {"role": "system", "content": BUG_DETECTION_PROMPT},
-            {"role": "user", "content": f"Call ID: {call_id}\nTranscript: {json.dumps(transcript)}"}
-        ]
-        
+        with metered() as usage:
+            report = self._analyze_transcript(call_id, transcript)
+        if report and usage:
+            report["usage"] = usage.to_dict()
+            report["cost_usd"] = round(usage_cost(report["usage"]), 6)
+        return report
+
+    def _analyze_transcript(self, call_id: str, transcript: list):
+        turns = conversation_turns(transcript)
+        if self.window_turns and len(turns) > self.window_turns:
+            return self.analyze_windows(call_id, transcript)
+
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo", # Use turbo for JSON mode reliability and speed
-                messages=messages,
-                response_format={"type": "json_object"}
-            )
-            result_json = response.choices[0].message.content
-            return json.loads(result_json)
+            return self._analyze(BUG_DETECTION_PROMPT, f"Call ID: {call_id}\nTranscript: {json.dumps(transcript)}")
         except Exception as e:
             logger.error(f"Error analyzing transcript: {e}")
             return None
 
+    def analyze_windows(self, call_id: str, transcript: list):
+        """
+        Map-reduce analysis of a long call: overlapping turn windows are analyzed
+        concurrently and their issues merged, so the prompt size (and the latency
+        of each request) stays the same however long the call runs.
+        """
+        turns = conversation_turns(transcript)
+        size = self.window_turns or len(turns)
+        windows = turn_windows(len(turns), size, min(self.window_overlap, size - 1))
+        system = next((turn.get("content") for turn in transcript if turn.get("role") == "system"), None)
+
+        def analyze(window):
+            start, end = window
+            prompt = BUG_DETECTION_PROMPT + WINDOW_PROMPT.format(
+                first=start + 1, last=end, total=len(turns),
+                completion=WINDOW_END if end == len(turns) else WINDOW_MIDDLE
+            )
+            lines = [f"[{start + i + 1}] {turn.get('role')}: {turn.get('content') or ''}" for i, turn in enumerate(turns[start:end])]
+            context = f"Patient instructions: {system.strip()}\n" if system else ""
+            try:
+                return self._analyze(prompt, f"Call ID: {call_id}\n{context}Turns:\n" + "\n".join(lines))
+            except Exception as e:
+                logger.error(f"Error analyzing turns {start + 1}-{end} of {call_id}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.window_concurrency, len(windows)))) as executor:
+            reports = list(executor.map(in_context(analyze), windows))
+        return merge_window_reports(call_id, windows, reports)
+
+    def _analyze(self, prompt: str, content: str) -> Dict:
+        """One JSON-mode request to the bug-detection model."""
+        messages = [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": content}
+        ]
+        start = time.perf_counter()
+        with track_llm_call():
+            response = limited_call(
+                "openai", self.model,
+                lambda: self.client.chat.completions.create(
+                    model=self.model, # Use turbo for JSON mode reliability and speed
+                    messages=messages,
+                    response_format={"type": "json_object"}
+                ),
+                priority=BACKGROUND,
+                tokens=estimate_tokens(prompt, content, completion=1000),
+                usage=openai_usage
+            )
+        record_usage(self.model, latency_s=time.perf_counter() - start, **chat_usage(response))
+        return json.loads(response.choices[0].message.content)
+
     def run_custom_evaluation(self, call_id: str, transcript: list) -> Optional[EvaluationReport]:
         """Run custom evaluation checks if configured."""
         if not self.custom_evaluator:
@@ -111,21 +301,24 @@ class BugDetector:
         try:
             with open(filename, "w") as f:
                 json.dump(report, f, indent=2)
+            self.store.add_bug_report(report, path=filename)
             logger.info(f"Report saved to {filename}")
             return filename
         except Exception as e:
             logger.error(f"Error saving report: {e}")
             return None
     
-    def save_custom_report(self, call_id: str, report: EvaluationReport):
+    def save_custom_report(self, call_id: str, report: EvaluationReport, scenario: Optional[str] = None):
         """Save only the custom evaluation report."""
         filename = f"reports/{call_id}_custom_eval.json"
         if not os.path.exists("reports"):
             os.makedirs("reports")
         
         try:
+            report_dict = report.to_dict()
             with open(filename, "w") as f:
-                json.dump(report.to_dict(), f, indent=2)
+                json.dump(report_dict, f, indent=2)
+            self.store.add_custom_report(call_id, report_dict, path=filename, scenario=scenario)
             logger.info(f"Custom evaluation report saved to {filename}")
             return filename
         except Exception as e:
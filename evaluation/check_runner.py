@@ -1,13 +1,19 @@
 """Check runner to execute all checks and generate evaluation reports."""
+import copy
+import hashlib
 import json
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Optional
-import yaml
+
+from core.usage import in_context, merge_usage, metered, round_usage
 
 from .checks.base import Check, CheckResult, EvaluationReport
 from .checks.boolean import BooleanCheck
 from .checks.threshold import ThresholdCheck
 from .checks.content import ContentCheck
+from .checks.transcript_view import TranscriptView
 
 
 class CheckRunner:
@@ -20,21 +26,38 @@ class CheckRunner:
         "content": ContentCheck,
     }
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        fast_fail: Optional[bool] = None,
+        llm_concurrency: int = 1
+    ):
         self.config_path = config_path
         self.checks: List[Check] = []
         self.pass_threshold = 80.0
         self.max_score = 100.0
         self.name = "Custom Evaluation"
         self.description = ""
+        self.fast_fail = False
+        self.llm_concurrency = max(1, llm_concurrency)
+        self._config_text = ""
+        self.config_name = os.path.splitext(os.path.basename(config_path))[0] if config_path else None
         
         if config_path and os.path.exists(config_path):
             self.load_config(config_path)
+        
+        # An explicit argument overrides the config file setting
+        if fast_fail is not None:
+            self.fast_fail = fast_fail
     
     def load_config(self, config_path: str):
         """Load checks from YAML configuration file."""
+        import yaml
+        
         with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+            raw_config = f.read()
+        config = yaml.safe_load(raw_config)
+        self._config_text = raw_config
         
         self.name = config.get("name", "Custom Evaluation")
         self.description = config.get("description", "")
@@ -42,6 +65,7 @@ class CheckRunner:
         scoring = config.get("scoring", {})
         self.pass_threshold = scoring.get("pass_threshold", 80.0)
         self.max_score = scoring.get("max_score", 100.0)
+        self.fast_fail = scoring.get("fast_fail", False)
         
         # Create checks from config
         for check_config in config.get("checks", []):
@@ -69,7 +93,15 @@ class CheckRunner:
         self.CHECK_TYPES[name] = check_class
     
     def evaluate(self, transcript: List[Dict]) -> EvaluationReport:
-        """Run all checks against the transcript and generate a report."""
+        """Run all checks against the transcript and generate a report.
+        
+        The transcript is turned into a TranscriptView once, so every check
+        shares the same rendered text and per-turn features. With
+        ``llm_concurrency`` above 1, LLM checks are sent to their judges
+        concurrently once the local checks ahead of them have run. In
+        fast-fail mode at most ``llm_concurrency`` of them are in flight, and
+        no more are sent once the verdict is decided.
+        """
         if not self.checks:
             return EvaluationReport(
                 overall_score=0.0,
@@ -79,34 +111,95 @@ class CheckRunner:
                 summary="No checks configured"
             )
         
-        check_results = []
+        view = TranscriptView.of(transcript)
+        check_results: List[Optional[CheckResult]] = [None] * len(self.checks)
         failures = []
+        errors = []
+        errored_weight = 0.0
         total_weight = sum(check.weight for check in self.checks)
         total_score = 0.0
         
-        for check in self.checks:
-            result = check.evaluate(transcript)
-            check_results.append(result)
-            
-            # Calculate weighted score contribution
-            if total_weight > 0:
-                normalized_score = (result.score / check.weight) * (check.weight / total_weight) * self.max_score
-                total_score += normalized_score
-            
-            # Track failures
-            if not result.passed:
-                if check.required:
-                    failures.append(f"REQUIRED: {check.name} failed")
-                else:
-                    failures.append(f"{check.name} failed")
+        # In fast-fail mode local checks run first so the verdict is usually
+        # known before any LLM call is made.
+        order = list(range(len(self.checks)))
+        if self.fast_fail:
+            order.sort(key=lambda i: self.checks[i].uses_llm)
+        remaining_weight = total_weight
+        decided = None
+        executor = None
+        pending: Dict[int, Future] = {}
+        # Without fast-fail every LLM check can be in flight at once; with it,
+        # one window's worth, so a decided verdict stops further judge calls
+        window = self.llm_concurrency if self.fast_fail else len(order)
+        
+        try:
+            for position, index in enumerate(order):
+                check = self.checks[index]
+                remaining_weight -= check.weight
+                
+                if decided and check.uses_llm:
+                    future = pending.get(index)
+                    if future is None or future.cancel():
+                        pending.pop(index, None)
+                        check_results[index] = self._skipped_result(check, decided)
+                        continue
+                    # Already sent to the judge: it is paid for, so report it
+                
+                if check.uses_llm and self.llm_concurrency > 1 and not decided:
+                    # Results are still consumed in order so fast-fail decisions are unchanged
+                    if executor is None:
+                        executor = ThreadPoolExecutor(max_workers=self.llm_concurrency)
+                    for later in order[position:]:
+                        if len(pending) >= window:
+                            break
+                        if self.checks[later].uses_llm and later not in pending:
+                            pending[later] = executor.submit(in_context(self._run_check), self.checks[later], view)
+                
+                future = pending.pop(index, None)
+                result = future.result() if future else self._run_check(check, view)
+                check_results[index] = result
+                
+                # Calculate weighted score contribution
+                if total_weight > 0:
+                    normalized_score = (result.score / check.weight) * (check.weight / total_weight) * self.max_score
+                    total_score += normalized_score
+                
+                # Track failures; a check that could not run (e.g. the judge
+                # was rate limited) is reported as an error, not a failure
+                if result.error:
+                    errors.append(f"{check.name}: {result.error}")
+                    errored_weight += check.weight
+                elif not result.passed:
+                    if check.required:
+                        failures.append(f"REQUIRED: {check.name} failed")
+                    else:
+                        failures.append(f"{check.name} failed")
+                
+                if self.fast_fail and not decided:
+                    decided = self._decided_verdict(
+                        check, result, total_score, remaining_weight, total_weight, errored_weight,
+                        [self.checks[i] for i in order[position + 1:]]
+                    )
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        
+        # Errored checks are left out of the score rather than counted as zero
+        if errored_weight:
+            scored_weight = total_weight - errored_weight
+            total_score = total_score * total_weight / scored_weight if scored_weight > 0 else 0.0
         
         # Determine overall pass/fail
-        passed = total_score >= self.pass_threshold and not any(
+        required_errored = any(r.error and c.required for r, c in zip(check_results, self.checks))
+        passed = total_score >= self.pass_threshold and not required_errored and not any(
             f.startswith("REQUIRED:") for f in failures
         )
         
         # Generate summary
         summary = self._generate_summary(check_results, total_score, passed)
+        usage = {}
+        for result in check_results:
+            merge_usage(usage, result.usage)
         
         return EvaluationReport(
             overall_score=round(total_score, 2),
@@ -115,9 +208,67 @@ class CheckRunner:
             passed=passed,
             check_results=check_results,
             failures=failures,
-            summary=summary
+            summary=summary,
+            cascade_stats=self.get_cascade_stats(),
+            voting_stats=self.get_voting_stats(),
+            errors=errors,
+            config=self.config_name,
+            usage=round_usage(usage)
         )
     
+    def _run_check(self, check: Check, view: TranscriptView) -> CheckResult:
+        """Evaluate one check, attributing the provider usage it caused to its result."""
+        if not check.uses_llm:
+            return check.evaluate(view)
+        with metered() as usage:
+            result = check.evaluate(view)
+        if usage:
+            result.usage = usage.to_dict()
+        return result
+    
+    def _skipped_result(self, check: Check, reason: str) -> CheckResult:
+        """Result for an LLM check that fast-fail decided not to run."""
+        return CheckResult(
+            name=check.name,
+            passed=False,
+            score=0.0,
+            weight=check.weight,
+            evidence=f"Skipped: {reason}",
+            skipped=True
+        )
+    
+    def _decided_verdict(
+        self,
+        check: Check,
+        result: CheckResult,
+        total_score: float,
+        remaining_weight: float,
+        total_weight: float,
+        errored_weight: float,
+        remaining_checks: List[Check]
+    ) -> Optional[str]:
+        """Return why the overall verdict can no longer change, or None.
+        
+        Errored checks are left out of the score, as in the final scoring:
+        both bounds are rescaled to the weight that can still be scored.
+        """
+        if check.required and not result.passed:
+            return f"required check '{check.name}' failed"
+        
+        scored_weight = total_weight - errored_weight
+        if scored_weight <= 0:
+            return None
+        scale = total_weight / scored_weight
+        
+        best_case = (total_score + remaining_weight / total_weight * self.max_score) * scale
+        if best_case < self.pass_threshold:
+            return "pass threshold unreachable"
+        
+        # Later checks can only add score, or error and be left out, which raises it
+        if total_score * scale >= self.pass_threshold and not any(c.required for c in remaining_checks):
+            return "pass threshold already reached"
+        return None
+    
     def _generate_summary(
         self,
         results: List[CheckResult],
@@ -126,24 +277,107 @@ class CheckRunner:
     ) -> str:
         """Generate a summary of the evaluation."""
         passed_count = sum(1 for r in results if r.passed)
+        skipped_count = sum(1 for r in results if r.skipped)
         total_count = len(results)
         
         status = "PASSED" if passed else "FAILED"
         summary = f"{self.name}: {status} ({passed_count}/{total_count} checks passed, score: {total_score:.1f}/{self.max_score})"
+        if skipped_count:
+            summary += f" [{skipped_count} skipped by fast-fail]"
+        errored_count = sum(1 for r in results if r.error)
+        if errored_count:
+            summary += f" [{errored_count} errored, excluded from score]"
         
         return summary
     
+    def fingerprint(self) -> str:
+        """Hash of everything that determines this runner's results.
+        
+        Covers the YAML config text, the fast-fail setting and any checks
+        added programmatically, so a changed config invalidates old results.
+        """
+        digest = hashlib.sha256(self._config_text.encode())
+        digest.update(f"fast_fail={self.fast_fail}".encode())
+        for check in self.checks:
+            digest.update(f"{type(check).__name__}:{check.name}:{check.weight}:{check.required}".encode())
+        return digest.hexdigest()
+    
+    def get_cascade_stats(self) -> Dict[str, Dict]:
+        """Get escalation and savings stats for cascaded checks.
+        
+        Counters accumulate over every transcript this runner has evaluated.
+        """
+        return {
+            check.name: check.cascade_stats.to_dict()
+            for check in self.checks
+            if getattr(check, "cascade_stats", None)
+        }
+    
+    def get_voting_stats(self) -> Dict[str, Dict]:
+        """Get vote rates and samples drawn per evaluation for voting checks.
+        
+        Counters accumulate over every transcript this runner has evaluated.
+        """
+        return {
+            check.name: check.voting_stats.to_dict()
+            for check in self.checks
+            if getattr(check, "voting_stats", None)
+        }
+    
+    def copy(self) -> "CheckRunner":
+        """A runner with the same config whose checks keep their own stats.
+        
+        Copies are cheap, so concurrent jobs can each take one from a cached
+        runner instead of sharing its counters.
+        """
+        clone = copy.copy(self)
+        clone.checks = [check.copy() for check in self.checks]
+        return clone
+    
     def get_available_check_types(self) -> List[str]:
         """Get list of available check types."""
         return list(self.CHECK_TYPES.keys())
 
 
+class CheckRunnerCache:
+    """Parsed CheckRunners kept warm for a long-running process.
+    
+    Entries are keyed by config path and fast-fail setting, and a runner is
+    rebuilt when its file's modification time changes. Each ``get()`` returns
+    a copy of the cached runner, so concurrent jobs never update the same
+    cascade or voting stats and each report carries only its own job's.
+    """
+    
+    def __init__(self):
+        self._runners: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, config_path: str, fast_fail: Optional[bool] = None) -> CheckRunner:
+        """Return a runner for the config, loading it if new or modified."""
+        mtime = os.stat(config_path).st_mtime_ns
+        key = (os.path.abspath(config_path), fast_fail)
+        with self._lock:
+            cached = self._runners.get(key)
+            if cached and cached[0] == mtime:
+                return cached[1].copy()
+        runner = CheckRunner(config_path, fast_fail=fast_fail)
+        with self._lock:
+            self._runners[key] = (mtime, runner)
+        return runner.copy()
+    
+    def clear(self):
+        with self._lock:
+            self._runners.clear()
+
+
 def run_evaluation_from_config(
     transcript: List[Dict],
-    config_path: str
+    config_path: str,
+    fast_fail: Optional[bool] = None,
+    llm_concurrency: int = 1
 ) -> EvaluationReport:
     """Convenience function to run evaluation from a config file."""
-    runner = CheckRunner(config_path)
+    runner = CheckRunner(config_path, fast_fail=fast_fail, llm_concurrency=llm_concurrency)
     return runner.evaluate(transcript)
 
 
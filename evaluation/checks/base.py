@@ -1,7 +1,12 @@
 """Base classes for custom evaluation checks."""
+import copy
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
+
+from core.usage import usage_cost
+
+from .transcript_view import TranscriptView
 
 
 @dataclass
@@ -14,6 +19,11 @@ class CheckResult:
     evidence: Optional[str] = None
     actual: Optional[Any] = None
     threshold: Optional[Any] = None
+    details: Optional[Dict] = None
+    skipped: bool = False
+    error: Optional[str] = None
+    # Provider usage per model (see core/usage.py), for checks that called one
+    usage: Optional[Dict[str, Dict]] = None
     
     def to_dict(self) -> Dict:
         """Convert to dictionary for serialization."""
@@ -29,6 +39,14 @@ class CheckResult:
             result["actual"] = self.actual
         if self.threshold is not None:
             result["threshold"] = self.threshold
+        if self.details:
+            result["details"] = self.details
+        if self.skipped:
+            result["skipped"] = True
+        if self.error:
+            result["error"] = self.error
+        if self.usage:
+            result["usage"] = self.usage
         return result
 
 
@@ -42,10 +60,17 @@ class EvaluationReport:
     check_results: List[CheckResult] = field(default_factory=list)
     failures: List[str] = field(default_factory=list)
     summary: str = ""
+    cascade_stats: Dict[str, Dict] = field(default_factory=dict)
+    voting_stats: Dict[str, Dict] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    # Name of the checks config (its file name without extension)
+    config: Optional[str] = None
+    # Provider usage of this evaluation, summed over its checks
+    usage: Dict[str, Dict] = field(default_factory=dict)
     
     def to_dict(self) -> Dict:
         """Convert to dictionary for serialization."""
-        return {
+        result = {
             "overall_score": self.overall_score,
             "max_score": self.max_score,
             "pass_threshold": self.pass_threshold,
@@ -54,6 +79,18 @@ class EvaluationReport:
             "failures": self.failures,
             "summary": self.summary,
         }
+        if self.cascade_stats:
+            result["cascade"] = self.cascade_stats
+        if self.voting_stats:
+            result["voting"] = self.voting_stats
+        if self.errors:
+            result["errors"] = self.errors
+        if self.config:
+            result["config"] = self.config
+        if self.usage:
+            result["usage"] = self.usage
+            result["cost_usd"] = round(usage_cost(self.usage), 6)
+        return result
 
 
 class Check(ABC):
@@ -65,18 +102,28 @@ class Check(ABC):
         self.weight = weight
         self.required = required
     
+    @property
+    def uses_llm(self) -> bool:
+        """Whether evaluating this check calls out to an LLM (used for cost ordering)."""
+        return False
+    
     @abstractmethod
-    def evaluate(self, transcript: List[Dict]) -> CheckResult:
+    def evaluate(self, transcript: Union[TranscriptView, List[Dict]]) -> CheckResult:
         """Evaluate the check against the transcript.
         
         Args:
-            transcript: List of conversation turns with 'role' and 'content' keys
+            transcript: TranscriptView (as passed by CheckRunner) or a list of
+                conversation turns with 'role' and 'content' keys
             
         Returns:
             CheckResult with the evaluation outcome
         """
         pass
     
+    def copy(self) -> "Check":
+        """A copy sharing this check's configuration, for another runner."""
+        return copy.copy(self)
+    
     @classmethod
     @abstractmethod
     def from_config(cls, config: Dict) -> "Check":
@@ -90,13 +137,6 @@ class Check(ABC):
         """
         pass
     
-    def _get_transcript_text(self, transcript: List[Dict]) -> str:
+    def _get_transcript_text(self, transcript: Union[TranscriptView, List[Dict]]) -> str:
         """Convert transcript to readable text format."""
-        lines = []
-        for turn in transcript:
-            role = turn.get("role", "unknown")
-            content = turn.get("content", "")
-            if role != "system" and content:
-                speaker = "Assistant" if role == "assistant" else "User"
-                lines.append(f"{speaker}: {content}")
-        return "\n".join(lines)
+        return TranscriptView.of(transcript).text
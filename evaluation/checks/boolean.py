@@ -1,13 +1,11 @@
 """Boolean checks using GPT-4 to answer yes/no questions."""
-import json
-import os
 from typing import Dict, List, Optional
-from openai import OpenAI
 
-from .base import Check, CheckResult
+from .base import CheckResult
+from .llm import CascadeConfig, LLMCheck, VotingConfig
 
 
-class BooleanCheck(Check):
+class BooleanCheck(LLMCheck):
     """A check that uses GPT-4 to answer a yes/no question about the transcript."""
     
     def __init__(
@@ -16,22 +14,12 @@ class BooleanCheck(Check):
         query: str,
         weight: float = 1.0,
         required: bool = False,
-        model: str = "gpt-4-turbo"
+        model: str = "gpt-4-turbo",
+        cascade: Optional[CascadeConfig] = None,
+        voting: Optional[VotingConfig] = None
     ):
-        super().__init__(name, "boolean", weight, required)
+        super().__init__(name, "boolean", weight, required, model, cascade, voting)
         self.query = query
-        self.model = model
-        self._client = None
-    
-    @property
-    def client(self):
-        """Lazy initialization of OpenAI client."""
-        if self._client is None:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY environment variable not set")
-            self._client = OpenAI(api_key=api_key)
-        return self._client
     
     def evaluate(self, transcript: List[Dict]) -> CheckResult:
         """Evaluate boolean check using GPT-4."""
@@ -54,32 +42,8 @@ Transcript:
 Answer the question with yes or no and provide evidence."""
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.1
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            answer = result.get("answer", "no").lower().strip()
-            confidence = result.get("confidence", 0.5)
-            evidence = result.get("evidence", "")
-            
-            passed = answer == "yes"
-            # Calculate score based on confidence if passed, 0 if failed
-            score = self.weight * confidence if passed else 0.0
-            
-            return CheckResult(
-                name=self.name,
-                passed=passed,
-                score=score,
-                weight=self.weight,
-                evidence=evidence
-            )
+            verdict, details = self._run_judge(system_prompt, user_prompt)
+            return self._verdict_result(verdict, details)
             
         except Exception as e:
             # Return failed result on error
@@ -88,9 +52,14 @@ Answer the question with yes or no and provide evidence."""
                 passed=False,
                 score=0.0,
                 weight=self.weight,
-                evidence=f"Error during evaluation: {str(e)}"
+                evidence=f"Error during evaluation: {str(e)}",
+                error=str(e)
             )
     
+    def _parse_verdict(self, result: Dict) -> bool:
+        """A "yes" answer passes the check."""
+        return str(result.get("answer", "no")).lower().strip() == "yes"
+    
     @classmethod
     def from_config(cls, config: Dict) -> "BooleanCheck":
         """Create from configuration dictionary."""
@@ -99,5 +68,7 @@ Answer the question with yes or no and provide evidence."""
             query=config["query"],
             weight=config.get("weight", 1.0),
             required=config.get("required", False),
-            model=config.get("model", "gpt-4-turbo")
+            model=config.get("model", "gpt-4-turbo"),
+            cascade=CascadeConfig.from_config(config.get("cascade")),
+            voting=VotingConfig.from_config(config.get("voting"))
         )
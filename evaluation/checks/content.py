@@ -1,14 +1,13 @@
 """Content checks for phrase matching and validation."""
-import json
-import os
-import re
 from typing import Dict, List, Optional
-from openai import OpenAI
 
-from .base import Check, CheckResult
+from .base import CheckResult
+from .llm import CascadeConfig, LLMCheck, VotingConfig
+from .matcher import PatternMatcher, PhraseMatcher, locate_turn
+from .transcript_view import TranscriptView
 
 
-class ContentCheck(Check):
+class ContentCheck(LLMCheck):
     """A check that validates content based on required/prohibited phrases or semantic content."""
     
     def __init__(
@@ -20,28 +19,32 @@ class ContentCheck(Check):
         query: Optional[str] = None,
         weight: float = 1.0,
         required: bool = False,
-        model: str = "gpt-4-turbo"
+        model: str = "gpt-4-turbo",
+        cascade: Optional[CascadeConfig] = None,
+        voting: Optional[VotingConfig] = None
     ):
-        super().__init__(name, "content", weight, required)
+        super().__init__(name, "content", weight, required, model, cascade, voting)
         self.check_subtype = check_subtype
         self.required_phrases = required_phrases or []
         self.prohibited_phrases = prohibited_phrases or []
         self.query = query
-        self.model = model
-        self._client = None
+        
+        # Compile matchers once; every transcript is then scanned in one pass
+        self._phrase_matcher = None
+        self._pattern_matcher = None
+        if check_subtype == "phrases":
+            self._phrase_matcher = PhraseMatcher(self.required_phrases + self.prohibited_phrases)
+        elif check_subtype == "regex":
+            self._pattern_matcher = PatternMatcher(self.required_phrases + self.prohibited_phrases)
     
     @property
-    def client(self):
-        """Lazy initialization of OpenAI client."""
-        if self._client is None:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY environment variable not set")
-            self._client = OpenAI(api_key=api_key)
-        return self._client
+    def uses_llm(self) -> bool:
+        """Only the semantic subtype needs the LLM judge."""
+        return self.check_subtype == "semantic"
     
     def evaluate(self, transcript: List[Dict]) -> CheckResult:
         """Evaluate content check."""
+        transcript = TranscriptView.of(transcript)
         if self.check_subtype == "phrases":
             return self._evaluate_phrases(transcript)
         elif self.check_subtype == "semantic":
@@ -57,23 +60,30 @@ class ContentCheck(Check):
                 evidence=f"Unknown check subtype: {self.check_subtype}"
             )
     
-    def _evaluate_phrases(self, transcript: List[Dict]) -> CheckResult:
+    def _evaluate_phrases(self, view: TranscriptView) -> CheckResult:
         """Check for required and prohibited phrases."""
-        transcript_text = self._get_transcript_text(transcript).lower()
+        found = self._phrase_matcher.find_first(view.lower_text, lowered=True)
         
         missing_required = []
         found_prohibited = []
-        
-        # Check required phrases
-        for phrase in self.required_phrases:
-            if phrase.lower() not in transcript_text:
+        matches = []
+        
+        for index, phrase in enumerate(self._phrase_matcher.phrases):
+            is_required = index < len(self.required_phrases)
+            if index in found:
+                position = found[index]
+                turn = locate_turn(view.line_starts, view.line_turns, position)
+                matches.append({
+                    "phrase": phrase,
+                    "kind": "required" if is_required else "prohibited",
+                    "position": position,
+                    "turn": turn,
+                })
+                if not is_required:
+                    found_prohibited.append(f"{phrase} (turn {turn})")
+            elif is_required:
                 missing_required.append(phrase)
         
-        # Check prohibited phrases
-        for phrase in self.prohibited_phrases:
-            if phrase.lower() in transcript_text:
-                found_prohibited.append(phrase)
-        
         # Calculate score
         total_checks = len(self.required_phrases) + len(self.prohibited_phrases)
         if total_checks == 0:
@@ -99,10 +109,11 @@ class ContentCheck(Check):
             passed=passed,
             score=score,
             weight=self.weight,
-            evidence="; ".join(evidence_parts)
+            evidence="; ".join(evidence_parts),
+            details={"matches": matches} if matches else None
         )
     
-    def _evaluate_semantic(self, transcript: List[Dict]) -> CheckResult:
+    def _evaluate_semantic(self, transcript: TranscriptView) -> CheckResult:
         """Use GPT-4 for semantic content analysis."""
         if not self.query:
             return CheckResult(
@@ -131,30 +142,8 @@ Transcript:
 Analyze and provide your assessment."""
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.1
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            passed = result.get("passed", False)
-            confidence = result.get("confidence", 0.5)
-            evidence = result.get("evidence", "")
-            
-            score = self.weight * confidence if passed else 0.0
-            
-            return CheckResult(
-                name=self.name,
-                passed=passed,
-                score=score,
-                weight=self.weight,
-                evidence=evidence
-            )
+            verdict, details = self._run_judge(system_prompt, user_prompt)
+            return self._verdict_result(verdict, details)
             
         except Exception as e:
             return CheckResult(
@@ -162,40 +151,49 @@ Analyze and provide your assessment."""
                 passed=False,
                 score=0.0,
                 weight=self.weight,
-                evidence=f"Error during semantic evaluation: {str(e)}"
+                evidence=f"Error during semantic evaluation: {str(e)}",
+                error=str(e)
             )
     
-    def _evaluate_regex(self, transcript: List[Dict]) -> CheckResult:
+    def _parse_verdict(self, result: Dict) -> bool:
+        """Semantic answers carry the verdict in the "passed" field."""
+        return bool(result.get("passed", False))
+    
+    def _evaluate_regex(self, view: TranscriptView) -> CheckResult:
         """Check content using regex patterns."""
-        transcript_text = self._get_transcript_text(transcript)
+        transcript_text = view.text
+        matcher = self._pattern_matcher
+        found = matcher.find_first(transcript_text, view.lower_text)
         
         evidence_parts = []
-        total_patterns = 0
+        matches = []
+        total_patterns = len(matcher.patterns)
         matched_patterns = 0
         
-        # Check required patterns
-        if self.required_phrases:
-            for pattern in self.required_phrases:
-                total_patterns += 1
-                try:
-                    if re.search(pattern, transcript_text, re.IGNORECASE):
-                        matched_patterns += 1
-                    else:
-                        evidence_parts.append(f"Pattern not found: {pattern}")
-                except re.error as e:
-                    evidence_parts.append(f"Invalid regex pattern '{pattern}': {e}")
-        
-        # Check prohibited patterns
-        if self.prohibited_phrases:
-            for pattern in self.prohibited_phrases:
-                total_patterns += 1
-                try:
-                    if re.search(pattern, transcript_text, re.IGNORECASE):
-                        evidence_parts.append(f"Prohibited pattern found: {pattern}")
-                    else:
-                        matched_patterns += 1
-                except re.error as e:
-                    evidence_parts.append(f"Invalid regex pattern '{pattern}': {e}")
+        for index, pattern in enumerate(matcher.patterns):
+            is_required = index < len(self.required_phrases)
+            if index in matcher.errors:
+                evidence_parts.append(f"Invalid regex pattern '{pattern}': {matcher.errors[index]}")
+                continue
+            
+            if index in found:
+                start, end = found[index]
+                turn = locate_turn(view.line_starts, view.line_turns, start)
+                matches.append({
+                    "pattern": pattern,
+                    "kind": "required" if is_required else "prohibited",
+                    "position": start,
+                    "match": transcript_text[start:end],
+                    "turn": turn,
+                })
+                if is_required:
+                    matched_patterns += 1
+                else:
+                    evidence_parts.append(f"Prohibited pattern found: {pattern} (turn {turn})")
+            elif is_required:
+                evidence_parts.append(f"Pattern not found: {pattern}")
+            else:
+                matched_patterns += 1
         
         if total_patterns == 0:
             passed = True
@@ -212,19 +210,25 @@ Analyze and provide your assessment."""
             passed=passed,
             score=score,
             weight=self.weight,
-            evidence="; ".join(evidence_parts)
+            evidence="; ".join(evidence_parts),
+            details={"matches": matches} if matches else None
         )
     
     @classmethod
     def from_config(cls, config: Dict) -> "ContentCheck":
         """Create from configuration dictionary."""
+        # "required" is either the phrase list or the must-pass flag
+        required = config.get("required", False)
+        required_list = required if isinstance(required, list) else []
         return cls(
             name=config["name"],
             check_subtype=config.get("subtype", "phrases"),
-            required_phrases=config.get("required_phrases", config.get("required", [])),
+            required_phrases=config.get("required_phrases", required_list),
             prohibited_phrases=config.get("prohibited_phrases", config.get("prohibited", [])),
             query=config.get("query"),
             weight=config.get("weight", 1.0),
-            required=config.get("required", False),
-            model=config.get("model", "gpt-4-turbo")
+            required=required is True,
+            model=config.get("model", "gpt-4-turbo"),
+            cascade=CascadeConfig.from_config(config.get("cascade")),
+            voting=VotingConfig.from_config(config.get("voting"))
         )
@@ -0,0 +1,385 @@
+"""Shared LLM judge plumbing for checks that ask a model for a verdict."""
+import json
+import os
+import time
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from core.rate_limiter import BACKGROUND, estimate_tokens, limited_call, openai_usage
+# Pricing lives with the rest of the usage accounting; re-exported for existing imports
+from core.usage import MODEL_PRICING, chat_usage, estimate_cost, in_context, record_usage
+
+from ..progress import track_llm_call
+from .base import Check, CheckResult
+
+
+@dataclass
+class JudgeVerdict:
+    """A single verdict returned by an LLM judge."""
+    passed: bool
+    confidence: float
+    evidence: str
+    model: str
+    elapsed: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def cost(self) -> float:
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens, self.cached_tokens)
+
+
+@dataclass
+class CascadeConfig:
+    """Cheap-judge-first settings for an LLM check.
+
+    The cheap model answers first; the check's own model is only consulted when
+    the cheap verdict is below ``confidence_threshold`` or when one of the
+    ``agreement_samples`` extra cheap samples disagrees with it.
+    """
+    model: str = "gpt-4o-mini"
+    confidence_threshold: float = 0.8
+    agreement_samples: int = 1
+    agreement_temperature: float = 0.7
+
+    @classmethod
+    def from_config(cls, config) -> Optional["CascadeConfig"]:
+        """Create from the ``cascade`` entry of a check config."""
+        if not config:
+            return None
+        if config is True:
+            return cls()
+        return cls(
+            model=config.get("model", cls.model),
+            confidence_threshold=config.get("confidence_threshold", cls.confidence_threshold),
+            agreement_samples=config.get("agreement_samples", cls.agreement_samples),
+            agreement_temperature=config.get("agreement_temperature", cls.agreement_temperature),
+        )
+
+
+@dataclass
+class CascadeStats:
+    """Running escalation, latency and cost counters for a cascaded check."""
+    evaluations: int = 0
+    escalations: int = 0
+    cheap_calls: int = 0
+    cheap_time: float = 0.0
+    expensive_time: float = 0.0
+    actual_cost: float = 0.0
+    baseline_cost: float = 0.0
+
+    def record(self, cheap: List[JudgeVerdict], expensive: Optional[JudgeVerdict], primary_model: str):
+        """Record one cascaded evaluation."""
+        self.evaluations += 1
+        self.cheap_calls += len(cheap)
+        self.cheap_time += sum(v.elapsed for v in cheap)
+        self.actual_cost += sum(v.cost for v in cheap)
+        if expensive:
+            self.escalations += 1
+            self.expensive_time += expensive.elapsed
+            self.actual_cost += expensive.cost
+            self.baseline_cost += expensive.cost
+        else:
+            # Same prompt, so the first cheap sample's usage prices the
+            # expensive call we avoided.
+            first = cheap[0]
+            self.baseline_cost += estimate_cost(primary_model, first.prompt_tokens, first.completion_tokens)
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalations / self.evaluations if self.evaluations else 0.0
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary for serialization."""
+        result = {
+            "evaluations": self.evaluations,
+            "escalations": self.escalations,
+            "escalation_rate": round(self.escalation_rate, 4),
+            "cheap_calls": self.cheap_calls,
+            "wall_time_s": round(self.cheap_time + self.expensive_time, 3),
+            "cost_usd": round(self.actual_cost, 6),
+            "baseline_cost_usd": round(self.baseline_cost, 6),
+            "cost_saved_usd": round(self.baseline_cost - self.actual_cost, 6),
+        }
+        # Wall-time savings can only be estimated once the expensive model's
+        # latency has been observed on an escalation.
+        if self.escalations:
+            avg_expensive = self.expensive_time / self.escalations
+            baseline_time = avg_expensive * self.evaluations
+            result["baseline_wall_time_s"] = round(baseline_time, 3)
+            result["wall_time_saved_s"] = round(baseline_time - result["wall_time_s"], 3)
+        return result
+
+
+@dataclass
+class VotingConfig:
+    """Adaptive self-consistency settings for an LLM check.
+
+    A verdict below ``confidence_threshold`` is put to a vote: more samples at
+    ``temperature`` are drawn in parallel, up to ``max_samples`` in total
+    (the first verdict included), and drawing stops as soon as the remaining
+    samples could no longer overturn the majority.
+    """
+    confidence_threshold: float = 0.75
+    max_samples: int = 5
+    temperature: float = 0.7
+
+    @classmethod
+    def from_config(cls, config) -> Optional["VotingConfig"]:
+        """Create from the ``voting`` entry of a check config."""
+        if not config:
+            return None
+        if config is True:
+            return cls()
+        return cls(
+            confidence_threshold=config.get("confidence_threshold", cls.confidence_threshold),
+            max_samples=max(1, int(config.get("max_samples", cls.max_samples))),
+            temperature=config.get("temperature", cls.temperature),
+        )
+
+
+@dataclass
+class VotingStats:
+    """Running counters for a voting check."""
+    evaluations: int = 0
+    votes: int = 0
+    extra_samples: int = 0
+    decided_early: int = 0
+    overturned: int = 0
+
+    def record(self, votes: Optional[Dict]):
+        """Record one evaluation, with the vote it went to if any."""
+        self.evaluations += 1
+        if votes:
+            self.votes += 1
+            self.extra_samples += votes["samples"] - 1
+            self.decided_early += int(votes["decided_early"])
+            self.overturned += int(votes["overturned"])
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary for serialization."""
+        return {
+            "evaluations": self.evaluations,
+            "votes": self.votes,
+            "vote_rate": round(self.votes / self.evaluations, 4) if self.evaluations else 0.0,
+            "samples_per_evaluation": round(1 + self.extra_samples / self.evaluations, 3) if self.evaluations else 0.0,
+            "decided_early": self.decided_early,
+            "overturned": self.overturned,
+        }
+
+
+class LLMCheck(Check):
+    """Base class for checks that delegate their verdict to an LLM judge."""
+
+    # Shared by every check, so vote samples draw from one bounded pool; the
+    # rate limiter still decides how many reach the provider at once
+    _vote_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="judge-vote")
+
+    def __init__(
+        self,
+        name: str,
+        check_type: str,
+        weight: float = 1.0,
+        required: bool = False,
+        model: str = "gpt-4-turbo",
+        cascade: Optional[CascadeConfig] = None,
+        voting: Optional[VotingConfig] = None
+    ):
+        super().__init__(name, check_type, weight, required)
+        self.model = model
+        self.cascade = cascade
+        self.cascade_stats = CascadeStats() if cascade else None
+        self.voting = voting
+        self.voting_stats = VotingStats() if voting else None
+        self._client = None
+
+    @property
+    def uses_llm(self) -> bool:
+        return True
+
+    def copy(self) -> "LLMCheck":
+        """A copy with its own cascade and voting stats, sharing the OpenAI client."""
+        if self._client is None and self.uses_llm and os.getenv("OPENAI_API_KEY"):
+            # Created once here so every copy reuses its connection pool
+            self.client
+        clone = super().copy()
+        clone.cascade_stats = CascadeStats() if self.cascade else None
+        clone.voting_stats = VotingStats() if self.voting else None
+        return clone
+
+    @property
+    def client(self):
+        """Lazy initialization of OpenAI client."""
+        if self._client is None:
+            from openai import OpenAI
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY environment variable not set")
+            # Retries are handled by the shared rate limiter
+            self._client = OpenAI(api_key=api_key, max_retries=0)
+        return self._client
+
+    @abstractmethod
+    def _parse_verdict(self, result: Dict) -> bool:
+        """Extract the pass/fail verdict from the judge's JSON answer."""
+        pass
+
+    def _judge(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: str,
+        temperature: float = 0.1
+    ) -> JudgeVerdict:
+        """Ask a single model for a verdict."""
+        start = time.perf_counter()
+        with track_llm_call():
+            response = limited_call(
+                "openai", model,
+                lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=temperature
+                ),
+                priority=BACKGROUND,
+                tokens=estimate_tokens(system_prompt, user_prompt, completion=300),
+                usage=openai_usage
+            )
+        elapsed = time.perf_counter() - start
+        tokens = chat_usage(response)
+        record_usage(model, latency_s=elapsed, **tokens)
+
+        result = json.loads(response.choices[0].message.content)
+        return JudgeVerdict(
+            passed=self._parse_verdict(result),
+            confidence=result.get("confidence", 0.5),
+            evidence=result.get("evidence", ""),
+            model=model,
+            elapsed=elapsed,
+            **tokens
+        )
+
+    def _run_judge(self, system_prompt: str, user_prompt: str) -> Tuple[JudgeVerdict, Optional[Dict]]:
+        """Get a verdict through the cascade, if configured, and put it to a vote if it is uncertain."""
+        verdict, details = self._cascade_judge(system_prompt, user_prompt)
+        if not self.voting:
+            return verdict, details
+        votes = None
+        if verdict.confidence < self.voting.confidence_threshold:
+            verdict, votes = self._vote(system_prompt, user_prompt, verdict)
+            details = {**(details or {}), "votes": votes}
+        self.voting_stats.record(votes)
+        return verdict, details
+
+    def _cascade_judge(self, system_prompt: str, user_prompt: str) -> Tuple[JudgeVerdict, Optional[Dict]]:
+        """Get a verdict, going through the cascade when one is configured."""
+        if not self.cascade:
+            return self._judge(system_prompt, user_prompt, self.model), None
+
+        cheap = [self._judge(system_prompt, user_prompt, self.cascade.model)]
+        reason = None
+        if cheap[0].confidence < self.cascade.confidence_threshold:
+            reason = "low_confidence"
+        else:
+            for _ in range(self.cascade.agreement_samples):
+                sample = self._judge(
+                    system_prompt, user_prompt, self.cascade.model,
+                    temperature=self.cascade.agreement_temperature
+                )
+                cheap.append(sample)
+                if sample.passed != cheap[0].passed:
+                    reason = "disagreement"
+                    break
+
+        expensive = None
+        if reason:
+            expensive = self._judge(system_prompt, user_prompt, self.model)
+        self.cascade_stats.record(cheap, expensive, self.model)
+
+        verdict = expensive or cheap[0]
+        details = {
+            "cascade": {
+                "model": verdict.model,
+                "escalated": expensive is not None,
+                "reason": reason,
+                "cheap_samples": len(cheap),
+            }
+        }
+        return verdict, details
+
+    def _vote(self, system_prompt: str, user_prompt: str, first: JudgeVerdict) -> Tuple[JudgeVerdict, Dict]:
+        """Majority verdict over adaptively drawn samples from the first verdict's model.
+
+        Each round draws, in parallel, the fewest samples that could settle
+        the vote if they all sided with the current majority. Drawing stops
+        once the majority leads by more than the samples left in the budget.
+        A tie at the end keeps the first (low-temperature) verdict.
+        """
+        samples = [first]
+        failed = 0
+        start = time.perf_counter()
+        while True:
+            passes = sum(sample.passed for sample in samples)
+            lead, trail = max(passes, len(samples) - passes), min(passes, len(samples) - passes)
+            remaining = self.voting.max_samples - len(samples) - failed
+            if remaining <= 0 or lead > trail + remaining:
+                break
+            draw = min(remaining, (trail + remaining - lead) // 2 + 1)
+            futures = [
+                self._vote_executor.submit(
+                    in_context(self._judge), system_prompt, user_prompt, first.model, self.voting.temperature
+                )
+                for _ in range(draw)
+            ]
+            for future in futures:
+                try:
+                    samples.append(future.result())
+                except Exception:
+                    # A sample that could not be drawn (e.g. rate limited) just shrinks the vote
+                    failed += 1
+
+        passes = sum(sample.passed for sample in samples)
+        fails = len(samples) - passes
+        passed = first.passed if passes == fails else passes > fails
+        majority = [sample for sample in samples if sample.passed == passed]
+        strongest = max(majority, key=lambda sample: sample.confidence)
+        votes = {
+            "pass": passes,
+            "fail": fails,
+            "samples": len(samples),
+            "failed_samples": failed,
+            "decided_early": len(samples) + failed < self.voting.max_samples,
+            "overturned": passed != first.passed,
+            "first_confidence": first.confidence,
+        }
+        verdict = JudgeVerdict(
+            passed=passed,
+            confidence=sum(sample.confidence for sample in majority) / len(majority),
+            evidence=f"{passes} of {len(samples)} samples voted pass. {strongest.evidence}",
+            model=first.model,
+            elapsed=first.elapsed + time.perf_counter() - start,
+            prompt_tokens=sum(sample.prompt_tokens for sample in samples),
+            completion_tokens=sum(sample.completion_tokens for sample in samples),
+            cached_tokens=sum(sample.cached_tokens for sample in samples),
+        )
+        return verdict, votes
+
+    def _verdict_result(self, verdict: JudgeVerdict, details: Optional[Dict] = None) -> CheckResult:
+        """Turn a judge verdict into a scored check result."""
+        # Score is weighted by confidence if passed, 0 if failed
+        score = self.weight * verdict.confidence if verdict.passed else 0.0
+        return CheckResult(
+            name=self.name,
+            passed=verdict.passed,
+            score=score,
+            weight=self.weight,
+            evidence=verdict.evidence,
+            details=details
+        )
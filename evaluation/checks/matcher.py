@@ -0,0 +1,203 @@
+"""Compiled multi-pattern matchers used by content checks."""
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+try:
+    import ahocorasick as _ahocorasick
+except ImportError:  # optional C accelerator (pip install pyahocorasick)
+    _ahocorasick = None
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton that finds many literal phrases in one pass.
+
+    Phrases are matched case-insensitively. Scanning is linear in the length
+    of the text regardless of how many phrases are loaded.
+    """
+
+    def __init__(self, phrases: Sequence[str]):
+        self.phrases = list(phrases)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._empty: List[int] = []
+        self._lengths = [len(phrase.lower()) for phrase in self.phrases]
+
+        for index, phrase in enumerate(self.phrases):
+            key = phrase.lower()
+            if not key:
+                self._empty.append(index)
+                continue
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # Prefer the C implementation when it is installed. It stores one
+        # value per key, so phrases that lowercase alike share a group.
+        self._native = None
+        if _ahocorasick is not None and len(self._empty) < len(self.phrases):
+            groups: Dict[str, List[int]] = {}
+            for index, phrase in enumerate(self.phrases):
+                if phrase:
+                    groups.setdefault(phrase.lower(), []).append(index)
+            self._native = _ahocorasick.Automaton()
+            for key, indices in groups.items():
+                self._native.add_word(key, (len(key), indices))
+            self._native.make_automaton()
+        else:
+            self._build_failure_links()
+
+    def _build_failure_links(self):
+        """Breadth-first pass linking each state to its longest proper suffix.
+
+        Failure links are then folded into a full transition table so the scan
+        does a single dict lookup per character.
+        """
+        self._delta: List[Dict[str, int]] = [self._goto[0]] + [{} for _ in self._goto[1:]]
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                # Inherit outputs so every match ending here is reported
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+            if state:
+                transitions = dict(self._delta[self._fail[state]])
+                transitions.update(self._goto[state])
+                self._delta[state] = transitions
+
+    def find_first(self, text: str, lowered: bool = False) -> Dict[int, int]:
+        """Map phrase index to the start offset of its first occurrence.
+
+        Pass ``lowered=True`` when ``text`` is already lowercased.
+        """
+        if not lowered:
+            text = text.lower()
+        found = {index: 0 for index in self._empty}
+        remaining = len(self.phrases) - len(found)
+        if not remaining:
+            return found
+
+        if self._native is not None:
+            for end, (length, indices) in self._native.iter(text):
+                if indices[0] not in found:
+                    for index in indices:
+                        found[index] = end - length + 1
+                    remaining -= len(indices)
+                    if not remaining:
+                        break
+            return found
+
+        delta, out, lengths = self._delta, self._out, self._lengths
+        state = 0
+        for pos, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for index in out[state]:
+                    if index not in found:
+                        found[index] = pos - lengths[index] + 1
+                        remaining -= 1
+                if not remaining:
+                    break
+        return found
+
+
+def _required_literal(pattern: str, flags: int) -> Optional[str]:
+    """Longest literal run every match of ``pattern`` must contain, if any.
+
+    Only top-level ASCII literals are considered, so the result is a safe
+    (lowercased) prefilter key; patterns without one are always searched.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+    best, run = "", []
+    for op, value in parsed:
+        if op is _sre_parse.LITERAL and value < 128:
+            run.append(chr(value).lower())
+        else:
+            best = max(best, "".join(run), key=len)
+            run = []
+    best = max(best, "".join(run), key=len)
+    return best if len(best) >= 3 else None
+
+
+class PatternMatcher:
+    """Regex patterns compiled once and prefiltered by their literal substrings.
+
+    A single Aho-Corasick pass over the text finds which patterns' mandatory
+    literals occur; only those candidates (plus patterns with no usable
+    literal) are then searched.
+    """
+
+    def __init__(self, patterns: Sequence[str], flags: int = re.IGNORECASE):
+        self.patterns = list(patterns)
+        self.errors: Dict[int, str] = {}
+        self._compiled: Dict[int, "re.Pattern"] = {}
+        self._always: List[int] = []
+        literal_owners: List[int] = []
+        literals: List[str] = []
+
+        for index, pattern in enumerate(self.patterns):
+            try:
+                self._compiled[index] = re.compile(pattern, flags)
+            except re.error as e:
+                self.errors[index] = str(e)
+                continue
+            literal = _required_literal(pattern, flags)
+            if literal:
+                literal_owners.append(index)
+                literals.append(literal)
+            else:
+                self._always.append(index)
+
+        self._literal_owners = literal_owners
+        self._prefilter = PhraseMatcher(literals) if literals else None
+
+    def find_first(self, text: str, lower_text: Optional[str] = None) -> Dict[int, Tuple[int, int]]:
+        """Map pattern index to the (start, end) span of its first match.
+
+        ``lower_text`` may pass an already lowercased copy of ``text``.
+        """
+        candidates = list(self._always)
+        if self._prefilter is not None:
+            if lower_text is None:
+                lower_text = text.lower()
+            present = self._prefilter.find_first(lower_text, lowered=True)
+            candidates.extend(self._literal_owners[i] for i in sorted(present))
+
+        found: Dict[int, Tuple[int, int]] = {}
+        for index in candidates:
+            match = self._compiled[index].search(text)
+            if match:
+                found[index] = match.span()
+        return found
+
+
+def locate_turn(line_starts: List[int], turn_indices: List[int], position: int) -> Optional[int]:
+    """Return the transcript turn index that a rendered-text offset falls in."""
+    line = bisect_right(line_starts, position) - 1
+    if line < 0:
+        return None
+    return turn_indices[line]
@@ -4,12 +4,15 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 
 from .base import Check, CheckResult
+from .transcript_view import TranscriptView
 
 
 class ThresholdCheck(Check):
     """A check that validates a numeric metric against a threshold."""
     
     METRIC_FUNCTIONS = {}
+    # Vectorized metrics used by evaluation.corpus: func(TranscriptCorpus) -> array
+    CORPUS_METRIC_FUNCTIONS = {}
     
     def __init__(
         self,
@@ -58,8 +61,9 @@ class ThresholdCheck(Check):
     
     def _calculate_metric(self, transcript: List[Dict]) -> float:
         """Calculate the metric value from transcript."""
+        view = TranscriptView.of(transcript)
         if self.metric in self.METRIC_FUNCTIONS:
-            return self.METRIC_FUNCTIONS[self.metric](transcript)
+            return self.METRIC_FUNCTIONS[self.metric](view)
         
         # Default metric calculations
         metric_calculators = {
@@ -71,34 +75,32 @@ class ThresholdCheck(Check):
         }
         
         if self.metric in metric_calculators:
-            return metric_calculators[self.metric](transcript)
+            return metric_calculators[self.metric](view)
         
         # Unknown metric
         return 0.0
     
-    def _calc_turn_count(self, transcript: List[Dict]) -> int:
+    def _calc_turn_count(self, view: TranscriptView) -> int:
         """Count total non-system turns."""
-        return sum(1 for t in transcript if t.get("role") != "system")
+        return view.turn_count
     
-    def _calc_response_count(self, transcript: List[Dict]) -> int:
+    def _calc_response_count(self, view: TranscriptView) -> int:
         """Count assistant responses."""
-        return sum(1 for t in transcript if t.get("role") == "assistant")
+        return len(view.assistant_turns)
     
-    def _calc_user_turn_count(self, transcript: List[Dict]) -> int:
+    def _calc_user_turn_count(self, view: TranscriptView) -> int:
         """Count user turns."""
-        return sum(1 for t in transcript if t.get("role") == "user")
+        return len(view.user_turns)
     
-    def _calc_assistant_turn_count(self, transcript: List[Dict]) -> int:
+    def _calc_assistant_turn_count(self, view: TranscriptView) -> int:
         """Count assistant turns."""
-        return sum(1 for t in transcript if t.get("role") == "assistant")
+        return len(view.assistant_turns)
     
-    def _calc_avg_response_length(self, transcript: List[Dict]) -> float:
+    def _calc_avg_response_length(self, view: TranscriptView) -> float:
         """Calculate average response length."""
-        assistant_turns = [t for t in transcript if t.get("role") == "assistant"]
-        if not assistant_turns:
+        if not view.assistant_lengths:
             return 0.0
-        total_length = sum(len(t.get("content", "")) for t in assistant_turns)
-        return total_length / len(assistant_turns)
+        return sum(view.assistant_lengths) / len(view.assistant_lengths)
     
     def _compare(self, value: float, threshold: float, operator: str) -> bool:
         """Compare value against threshold."""
@@ -131,5 +133,18 @@ class ThresholdCheck(Check):
     
     @classmethod
     def register_metric(cls, name: str, func):
-        """Register a custom metric calculation function."""
+        """Register a custom metric calculation function.
+        
+        The function receives the shared TranscriptView, which also iterates
+        like the raw list of turns.
+        """
         cls.METRIC_FUNCTIONS[name] = func
+    
+    @classmethod
+    def register_corpus_metric(cls, name: str, func):
+        """Register a vectorized metric for corpus-wide evaluation.
+        
+        The function receives a TranscriptCorpus and returns one value per call.
+        Metrics without a vectorized form fall back to their per-transcript function.
+        """
+        cls.CORPUS_METRIC_FUNCTIONS[name] = func
@@ -0,0 +1,80 @@
+"""Per-transcript features computed once and shared by every check."""
+from typing import Dict, Iterator, List, Union
+
+
+class TranscriptView:
+    """Read-only view of a transcript with features derived in a single pass.
+
+    Holds the rendered text (as shown to LLM judges), its lowercased form,
+    per-role turn lists with their lengths and token counts, and the offsets
+    needed to map a position in the text back to a transcript turn.
+
+    The view iterates, indexes and measures like the underlying list of turns,
+    so code written against raw transcripts keeps working.
+    """
+
+    def __init__(self, turns: List[Dict]):
+        self.turns = turns
+        self.roles: List[str] = []
+        self.lengths: List[int] = []
+        self.token_counts: List[int] = []
+        self.user_turns: List[str] = []
+        self.assistant_turns: List[str] = []
+        self.user_lengths: List[int] = []
+        self.assistant_lengths: List[int] = []
+        self.line_starts: List[int] = []
+        self.line_turns: List[int] = []
+
+        lines = []
+        offset = 0
+        for index, turn in enumerate(turns):
+            role = turn.get("role", "unknown")
+            if role == "system":
+                continue
+            content = turn.get("content", "") or ""
+            length = len(content)
+            self.roles.append(role)
+            self.lengths.append(length)
+            self.token_counts.append(len(content.split()))
+            if role == "user":
+                self.user_turns.append(content)
+                self.user_lengths.append(length)
+            elif role == "assistant":
+                self.assistant_turns.append(content)
+                self.assistant_lengths.append(length)
+
+            if content:
+                speaker = "Assistant" if role == "assistant" else "User"
+                line = f"{speaker}: {content}"
+                lines.append(line)
+                self.line_starts.append(offset)
+                self.line_turns.append(index)
+                offset += len(line) + 1
+
+        self.text = "\n".join(lines)
+        self.lower_text = self.text.lower()
+
+    @classmethod
+    def of(cls, transcript: Union["TranscriptView", List[Dict]]) -> "TranscriptView":
+        """Return ``transcript`` as a view, building one only if needed."""
+        if isinstance(transcript, cls):
+            return transcript
+        return cls(transcript)
+
+    @property
+    def turn_count(self) -> int:
+        """Number of non-system turns."""
+        return len(self.roles)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.token_counts)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.turns)
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def __getitem__(self, index):
+        return self.turns[index]
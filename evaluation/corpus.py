@@ -0,0 +1,255 @@
+"""Columnar metric computation for threshold checks across a transcript corpus."""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .checks.base import CheckResult
+from .checks.threshold import ThresholdCheck
+from .checks.transcript_view import TranscriptView
+from .transcripts import iter_transcript_files, load_transcript
+
+ROLE_CODES = {"system": 0, "user": 1, "assistant": 2}
+OTHER_ROLE = 3
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+
+class TranscriptCorpus:
+    """All turns of many transcripts packed into flat NumPy columns.
+
+    Turn ``j`` of call ``i`` lives at row ``offsets[i] + j``; ``call_index``
+    maps every row back to its call so per-call reductions are one
+    ``np.bincount`` each. Turn text is one UTF-8 buffer, with row ``k``'s
+    bytes at ``text[text_offsets[k]:text_offsets[k + 1]]``, so no per-turn
+    Python objects are kept once the corpus is built.
+    """
+
+    def __init__(self, call_ids: Sequence[str], transcripts: Sequence[List[Dict]]):
+        self.call_ids = list(call_ids)
+
+        counts = [len(transcript) for transcript in transcripts]
+        turns = [turn for transcript in transcripts for turn in transcript]
+        roles = [turn.get("role", "unknown") for turn in turns]
+        contents = [turn.get("content", "") or "" for turn in turns]
+        self.roles = np.fromiter(
+            (ROLE_CODES.get(role, OTHER_ROLE) for role in roles), dtype=np.int8, count=len(roles)
+        )
+        # Role names outside ROLE_CODES, by row, so transcript() can rebuild them
+        self._other_roles: Dict[int, str] = {
+            row: roles[row] for row in np.flatnonzero(self.roles == OTHER_ROLE).tolist()
+        }
+
+        self.offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.call_index = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+
+        self.lengths = np.fromiter(map(len, contents), dtype=np.int32, count=len(contents))
+        encoded = [content.encode("utf-8") for content in contents]
+        self.text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=self.text_offsets[1:])
+        self._buffer = b"".join(encoded)
+        self.text = np.frombuffer(self._buffer, dtype=np.uint8)
+        self._token_counts: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_directory(cls, directory: str = "recordings") -> "TranscriptCorpus":
+        """Load every transcript in the directory."""
+        call_ids, transcripts = [], []
+        for call_id, path in sorted(iter_transcript_files(directory)):
+            call_ids.append(call_id)
+            transcripts.append(load_transcript(path))
+        return cls(call_ids, transcripts)
+
+    @property
+    def token_counts(self) -> np.ndarray:
+        """Whitespace token count per turn, matching ``len(content.split())``."""
+        if self._token_counts is None:
+            text = self.text
+            space = text <= 32
+            # A token starts at a non-space byte that opens its turn or follows a space
+            starts = ~space
+            starts[1:] &= space[:-1]
+            first = self.text_offsets[:-1][np.diff(self.text_offsets) > 0]
+            starts[first] = ~space[first]
+            counts = self._per_row_count(starts)
+            # Rows where ``<= 32`` disagrees with str.split(): Unicode whitespace
+            # and non-whitespace control characters are counted exactly
+            irregular = (text >= 0x80) | (text < 9) | ((text > 13) & (text < 28))
+            rows = np.searchsorted(self.text_offsets, np.flatnonzero(irregular), side="right") - 1
+            for row in np.unique(rows).tolist():
+                counts[row] = len(self.content(row).split())
+            self._token_counts = counts
+        return self._token_counts
+
+    def _per_row_count(self, mask: np.ndarray) -> np.ndarray:
+        """Number of true bytes of ``mask`` within each turn's slice of ``text``."""
+        sizes = np.diff(self.text_offsets)
+        if not len(mask):
+            return np.zeros(len(sizes), dtype=np.int32)
+        starts = np.minimum(self.text_offsets[:-1], len(mask) - 1)
+        counts = np.add.reduceat(mask.view(np.uint8), starts, dtype=np.int32)
+        # reduceat yields mask[start] for an empty slice rather than 0
+        counts[sizes == 0] = 0
+        return counts
+
+    def content(self, row: int) -> str:
+        """Text of one turn."""
+        return self._buffer[self.text_offsets[row]:self.text_offsets[row + 1]].decode("utf-8")
+
+    def transcript(self, index: int) -> List[Dict]:
+        """Rebuild one call's role/content messages from the columns."""
+        return [
+            {"role": self._other_roles.get(row, ROLE_NAMES.get(self.roles[row])), "content": self.content(row)}
+            for row in range(self.offsets[index], self.offsets[index + 1])
+        ]
+
+    def __len__(self) -> int:
+        return len(self.call_ids)
+
+    def per_call_count(self, mask: np.ndarray) -> np.ndarray:
+        """Number of rows per call where ``mask`` is true."""
+        return np.bincount(self.call_index[mask], minlength=len(self))
+
+    def per_call_sum(self, values: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sum of ``values`` per call, optionally restricted to ``mask`` rows."""
+        if mask is None:
+            return np.bincount(self.call_index, weights=values, minlength=len(self))
+        return np.bincount(self.call_index[mask], weights=values[mask], minlength=len(self))
+
+
+def _avg_response_length(corpus: TranscriptCorpus) -> np.ndarray:
+    mask = corpus.roles == ROLE_CODES["assistant"]
+    counts = corpus.per_call_count(mask)
+    totals = corpus.per_call_sum(corpus.lengths, mask)
+    return np.divide(totals, counts, out=np.zeros(len(corpus)), where=counts > 0)
+
+
+# Vectorized versions of ThresholdCheck's built-in metrics
+BUILTIN_CORPUS_METRICS: Dict[str, Callable[[TranscriptCorpus], np.ndarray]] = {
+    "turn_count": lambda c: c.per_call_count(c.roles != ROLE_CODES["system"]),
+    "response_count": lambda c: c.per_call_count(c.roles == ROLE_CODES["assistant"]),
+    "user_turn_count": lambda c: c.per_call_count(c.roles == ROLE_CODES["user"]),
+    "assistant_turn_count": lambda c: c.per_call_count(c.roles == ROLE_CODES["assistant"]),
+    "avg_response_length": _avg_response_length,
+}
+
+
+def compute_metric(corpus: TranscriptCorpus, metric: str) -> np.ndarray:
+    """Compute one metric for every call, using the same precedence as ThresholdCheck."""
+    if metric in ThresholdCheck.CORPUS_METRIC_FUNCTIONS:
+        return np.asarray(ThresholdCheck.CORPUS_METRIC_FUNCTIONS[metric](corpus), dtype=float)
+    if metric in ThresholdCheck.METRIC_FUNCTIONS:
+        # Per-transcript custom metric without a vectorized form
+        func = ThresholdCheck.METRIC_FUNCTIONS[metric]
+        return np.fromiter(
+            (func(TranscriptView(corpus.transcript(i))) for i in range(len(corpus))),
+            dtype=float, count=len(corpus)
+        )
+    if metric in BUILTIN_CORPUS_METRICS:
+        return BUILTIN_CORPUS_METRICS[metric](corpus).astype(float)
+    return np.zeros(len(corpus))
+
+
+def _compare(values: np.ndarray, threshold: float, operator: str) -> np.ndarray:
+    operators = {
+        "<=": np.less_equal,
+        "<": np.less,
+        ">=": np.greater_equal,
+        ">": np.greater,
+        "==": np.equal,
+        "!=": np.not_equal,
+    }
+    if operator not in operators:
+        return np.zeros(len(values), dtype=bool)
+    return operators[operator](values, threshold)
+
+
+def _score(check: ThresholdCheck, values: np.ndarray, passed: np.ndarray) -> np.ndarray:
+    """Vectorized ThresholdCheck.evaluate scoring, including partial credit."""
+    if check.comparison in ["<=", "<"]:
+        ratio = np.divide(check.threshold, values, out=np.zeros(len(values)), where=values > 0)
+        return np.where(values <= check.threshold, check.weight, check.weight * np.maximum(0, ratio))
+    return np.where(passed, float(check.weight), 0.0)
+
+
+@dataclass
+class CorpusMetricReport:
+    """Per-call values and distribution summaries for a set of threshold checks."""
+    call_ids: List[str]
+    checks: List[ThresholdCheck]
+    values: Dict[str, np.ndarray] = field(default_factory=dict)
+    passed: Dict[str, np.ndarray] = field(default_factory=dict)
+    scores: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def results_for(self, index: int) -> List[CheckResult]:
+        """Build the CheckResults for one call."""
+        return [
+            self._result(check, self.values[check.name][index].item(),
+                         bool(self.passed[check.name][index]), self.scores[check.name][index].item())
+            for check in self.checks
+        ]
+
+    def check_results(self) -> Dict[str, List[CheckResult]]:
+        """CheckResults for every call, keyed by call_id."""
+        # Convert each column to Python scalars once rather than per element
+        columns = [
+            (check, self.values[check.name].tolist(), self.passed[check.name].tolist(),
+             self.scores[check.name].tolist())
+            for check in self.checks
+        ]
+        return {
+            call_id: [self._result(check, values[i], passed[i], scores[i])
+                      for check, values, passed, scores in columns]
+            for i, call_id in enumerate(self.call_ids)
+        }
+
+    @staticmethod
+    def _result(check: ThresholdCheck, value: float, passed: bool, score: float) -> CheckResult:
+        return CheckResult(
+            name=check.name,
+            passed=passed,
+            score=score,
+            weight=check.weight,
+            evidence=check._generate_evidence(value, passed),
+            actual=value,
+            threshold=check.threshold
+        )
+
+    def summaries(self) -> Dict[str, Dict]:
+        """Distribution summary of each check's metric across the corpus."""
+        summaries = {}
+        for check in self.checks:
+            values = self.values[check.name]
+            summary = {"metric": check.metric, "count": int(len(values))}
+            if len(values):
+                p50, p90, p99 = np.percentile(values, [50, 90, 99])
+                summary.update({
+                    "mean": float(values.mean()),
+                    "std": float(values.std()),
+                    "min": float(values.min()),
+                    "p50": float(p50),
+                    "p90": float(p90),
+                    "p99": float(p99),
+                    "max": float(values.max()),
+                    "pass_rate": float(self.passed[check.name].mean()),
+                })
+            summaries[check.name] = summary
+        return summaries
+
+
+def evaluate_corpus_thresholds(
+    corpus: TranscriptCorpus,
+    checks: Sequence[ThresholdCheck]
+) -> CorpusMetricReport:
+    """Score threshold checks for every call in the corpus in vectorized passes."""
+    report = CorpusMetricReport(call_ids=corpus.call_ids, checks=list(checks))
+    metric_cache: Dict[str, np.ndarray] = {}
+    for check in checks:
+        if check.metric not in metric_cache:
+            metric_cache[check.metric] = compute_metric(corpus, check.metric)
+        values = metric_cache[check.metric]
+        passed = _compare(values, check.threshold, check.comparison)
+        report.values[check.name] = values
+        report.passed[check.name] = passed
+        report.scores[check.name] = _score(check, values, passed)
+    return report
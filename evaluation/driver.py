@@ -0,0 +1,286 @@
+"""Parallel, resumable evaluation of a directory of transcripts.
+
+Transcripts are handed out one at a time to a pool of worker processes, each
+with its own detector/runner. Workers only compute; the parent process writes
+report files and the report store as results arrive, and records every
+finished transcript in the store's evaluation manifest. An interrupted run
+therefore resumes where it stopped: the next run skips everything already in
+the manifest.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.rate_limiter import set_share
+
+from .bug_detector import BugDetector
+from .check_runner import CheckRunner
+from .checks.base import EvaluationReport
+from .checks.llm import CascadeStats, VotingStats
+from .progress import ProgressMeter, install_llm_counters
+from .reporter import Reporter
+from .transcripts import infer_scenario, iter_transcript_files, load_transcript_record
+
+EVALUATE = "evaluate"
+CUSTOM_EVAL = "custom-eval"
+
+
+@dataclass
+class EvaluationOutcome:
+    """Result of evaluating one transcript, sent back from a worker."""
+    call_id: str
+    path: str
+    transcript_hash: str
+    scenario: Optional[str] = None
+    analysis: Optional[Dict] = None
+    custom_report: Optional[EvaluationReport] = None
+    cascade: Dict[str, Dict] = field(default_factory=dict)
+    voting: Dict[str, Dict] = field(default_factory=dict)
+    # The call's own provider usage, from its transcript
+    call_usage: Dict[str, Dict] = field(default_factory=dict)
+    call_ended_at: Optional[float] = None
+    worker: int = 0
+    error: Optional[str] = None
+
+
+class TranscriptEvaluator:
+    """Evaluates single transcripts for one mode; each worker owns one."""
+
+    def __init__(
+        self,
+        mode: str,
+        checks_config: Optional[str] = None,
+        fast_fail: Optional[bool] = None,
+        llm_concurrency: int = 1
+    ):
+        self.mode = mode
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.detector: Optional[BugDetector] = None
+        self.runner: Optional[CheckRunner] = None
+
+        if mode == EVALUATE:
+            self.detector = BugDetector()
+            if checks_config and os.path.exists(checks_config):
+                self.detector.load_custom_evaluation(checks_config, fast_fail=fast_fail)
+            self.runner = self.detector.custom_evaluator
+        else:
+            self.runner = CheckRunner(checks_config, fast_fail=fast_fail)
+        if self.runner:
+            self.runner.llm_concurrency = self.llm_concurrency
+
+    def fingerprint(self) -> str:
+        if self.detector:
+            return self.detector.fingerprint()
+        return self.runner.fingerprint()
+
+    def evaluate(self, call_id: str, path: str, transcript_hash: str) -> EvaluationOutcome:
+        outcome = EvaluationOutcome(call_id, path, transcript_hash, worker=os.getpid())
+        try:
+            record = load_transcript_record(path)
+            transcript = record.messages()
+            outcome.scenario = record.scenario or infer_scenario(transcript)
+            outcome.call_usage = record.usage
+            outcome.call_ended_at = record.ended_at
+            if self.detector and self.runner and self.llm_concurrency > 1:
+                # The bug-detection call and the custom checks are independent
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    analysis = executor.submit(self.detector.analyze_transcript, call_id, transcript)
+                    outcome.custom_report = self.detector.run_custom_evaluation(call_id, transcript)
+                    outcome.analysis = analysis.result()
+            elif self.detector:
+                outcome.analysis = self.detector.analyze_transcript(call_id, transcript)
+                outcome.custom_report = self.detector.run_custom_evaluation(call_id, transcript)
+            else:
+                outcome.custom_report = self.runner.evaluate(transcript)
+        except Exception as e:
+            outcome.error = str(e)
+
+        if self.runner:
+            # Cumulative for this worker; the parent keeps the latest per worker
+            outcome.cascade = {
+                check.name: asdict(check.cascade_stats)
+                for check in self.runner.checks
+                if getattr(check, "cascade_stats", None)
+            }
+            outcome.voting = {
+                check.name: asdict(check.voting_stats)
+                for check in self.runner.checks
+                if getattr(check, "voting_stats", None)
+            }
+        return outcome
+
+
+_worker_evaluator: Optional[TranscriptEvaluator] = None
+
+
+def _init_worker(mode, checks_config, fast_fail, llm_concurrency, inflight, completed, share):
+    global _worker_evaluator
+    install_llm_counters(inflight, completed)
+    # Provider rate limits are per process; split them across the pool
+    set_share(share)
+    _worker_evaluator = TranscriptEvaluator(mode, checks_config, fast_fail, llm_concurrency)
+
+
+def _evaluate_in_worker(call_id: str, path: str, transcript_hash: str) -> EvaluationOutcome:
+    return _worker_evaluator.evaluate(call_id, path, transcript_hash)
+
+
+def merge_check_stats(snapshots: List[Dict[str, Dict]], stats_type=CascadeStats) -> Dict[str, Dict]:
+    """Sum per-worker CascadeStats (or ``stats_type``) snapshots into one summary per check."""
+    totals: Dict[str, stats_type] = {}
+    for snapshot in snapshots:
+        for name, counters in snapshot.items():
+            merged = totals.setdefault(name, stats_type())
+            for key, value in counters.items():
+                setattr(merged, key, getattr(merged, key) + value)
+    return {name: stats.to_dict() for name, stats in totals.items()}
+
+
+class CorpusEvaluation:
+    """Evaluates every transcript in a directory, optionally across processes.
+
+    With ``workers`` at 1 everything runs in this process. Within each worker,
+    up to ``llm_concurrency`` LLM requests for the same transcript are in
+    flight at once.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        reporter: Reporter,
+        checks_config: Optional[str] = None,
+        fast_fail: Optional[bool] = None,
+        workers: int = 1,
+        llm_concurrency: int = 4,
+        progress_interval: float = 2.0
+    ):
+        if mode not in (EVALUATE, CUSTOM_EVAL):
+            raise ValueError(f"Unknown evaluation mode: {mode}")
+        self.mode = mode
+        self.reporter = reporter
+        self.store = reporter.store
+        self.checks_config = checks_config
+        self.fast_fail = fast_fail
+        self.workers = max(1, workers)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.progress_interval = progress_interval
+        self.evaluator = TranscriptEvaluator(mode, checks_config, fast_fail, self.llm_concurrency)
+        self.config_hash = self.evaluator.fingerprint()
+        self._cascade_by_worker: Dict[int, Dict[str, Dict]] = {}
+        self._voting_by_worker: Dict[int, Dict[str, Dict]] = {}
+
+    def pending(self, recordings_dir: str = "recordings", force: bool = False) -> Tuple[List[Tuple[str, str, str]], int]:
+        """Transcripts still to evaluate as (call_id, path, hash), and the skip count."""
+        tasks, skipped = [], 0
+        for call_id, path in sorted(iter_transcript_files(recordings_dir)):
+            transcript_hash = self.store.file_hash(path)
+            if not force and self.store.find_evaluation(self.mode, transcript_hash, self.config_hash):
+                skipped += 1
+                continue
+            tasks.append((call_id, path, transcript_hash))
+        return tasks, skipped
+
+    def run(
+        self,
+        recordings_dir: str = "recordings",
+        force: bool = False,
+        on_outcome: Optional[Callable[[EvaluationOutcome], None]] = None
+    ) -> Dict:
+        """Evaluate all pending transcripts and return run totals."""
+        import multiprocessing
+        
+        tasks, skipped = self.pending(recordings_dir, force)
+        context = multiprocessing.get_context()
+        inflight, completed = context.Value("i", 0), context.Value("i", 0)
+        install_llm_counters(inflight, completed)
+        meter = ProgressMeter(len(tasks), interval=self.progress_interval)
+
+        def handle(outcome: EvaluationOutcome):
+            ok = self._save(outcome)
+            meter.update(done=1, failed=0 if ok else 1)
+            if on_outcome:
+                on_outcome(outcome)
+
+        try:
+            if self.workers == 1 or len(tasks) <= 1:
+                for task in tasks:
+                    handle(self.evaluator.evaluate(*task))
+            else:
+                self._run_pool(tasks, context, inflight, completed, meter, handle)
+            if tasks:
+                meter.tick(force=True)
+        finally:
+            install_llm_counters(None, None)
+
+        return {
+            "processed": meter.done - meter.failed,
+            "failed": meter.failed,
+            "skipped": skipped,
+            "elapsed_s": round(meter.elapsed, 3),
+            "transcripts_per_s": round(meter.rate, 3),
+            "llm_calls": completed.value,
+            "cascade": merge_check_stats(list(self._cascade_by_worker.values())),
+            "voting": merge_check_stats(list(self._voting_by_worker.values()), VotingStats),
+        }
+
+    def _run_pool(self, tasks, context, inflight, completed, meter, handle):
+        workers = min(self.workers, len(tasks))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.mode, self.checks_config, self.fast_fail, self.llm_concurrency,
+                      inflight, completed, 1.0 / workers)
+        ) as pool:
+            remaining = {pool.submit(_evaluate_in_worker, *task) for task in tasks}
+            try:
+                while remaining:
+                    done, remaining = wait(remaining, timeout=self.progress_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(future.result())
+                    meter.tick()
+            except BaseException:
+                # Finished transcripts are already in the manifest
+                for future in remaining:
+                    future.cancel()
+                raise
+
+    def _save(self, outcome: EvaluationOutcome) -> bool:
+        if outcome.cascade:
+            self._cascade_by_worker[outcome.worker] = outcome.cascade
+        if outcome.voting:
+            self._voting_by_worker[outcome.worker] = outcome.voting
+        if outcome.error:
+            print(f"  {outcome.call_id}: error: {outcome.error}")
+            return False
+        return publish_outcome(self.reporter, self.mode, self.config_hash, outcome)
+
+
+def publish_outcome(reporter: Reporter, mode: str, config_hash: str, outcome: EvaluationOutcome) -> bool:
+    """Write an outcome's reports and manifest entry; False if it failed.
+
+    Everything is indexed in one transaction, and the report files are moved
+    into place only once it commits, so a failure leaves neither index rows
+    nor report files for the retry to duplicate.
+    """
+    # Failed analyses save nothing and stay out of the manifest, so the next run retries them
+    if outcome.error or (mode == EVALUATE and not outcome.analysis):
+        return False
+
+    with reporter.store.transaction():
+        custom_report_path = None
+        if outcome.custom_report:
+            custom_report_path = reporter.save_custom_report(
+                outcome.call_id, outcome.custom_report, scenario=outcome.scenario
+            )
+        report_path = None
+        if mode == EVALUATE:
+            report_path = reporter.save_report(outcome.analysis, scenario=outcome.scenario)
+        if outcome.call_usage:
+            reporter.store.add_call_usage(outcome.call_id, outcome.call_usage, outcome.scenario, outcome.call_ended_at)
+        reporter.store.record_evaluation(
+            mode, outcome.call_id, outcome.transcript_hash, config_hash,
+            report_path=report_path, custom_report_path=custom_report_path
+        )
+    return True
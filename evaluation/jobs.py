@@ -0,0 +1,158 @@
+"""Prioritized background job scheduler with per-provider concurrency limits."""
+import bisect
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A unit of work and its lifecycle."""
+    job_id: str
+    func: Callable[[], Any]
+    priority: int = 0
+    providers: FrozenSet[str] = frozenset()
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary for serialization."""
+        data = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "priority": self.priority,
+            "providers": sorted(self.providers),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == DONE:
+            data["result"] = self.result
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class JobScheduler:
+    """Runs submitted jobs on worker threads, highest priority first.
+
+    Each job names the providers it calls (e.g. ``{"openai"}``). A job only
+    starts when every one of its providers is below its limit in ``limits``;
+    otherwise workers move on to the next eligible job, so local-only work is
+    not held up behind a saturated API. Providers without a limit are
+    unbounded. Equal priorities run in submission order.
+    """
+
+    def __init__(self, workers: int = 4, limits: Optional[Dict[str, int]] = None, keep_finished: int = 1000):
+        self.limits = dict(limits or {})
+        self.keep_finished = keep_finished
+        # Kept sorted as (-priority, submission order, job)
+        self._queue: List[Tuple[int, int, Job]] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, int] = {}
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, func: Callable[[], Any], priority: int = 0, providers: Iterable[str] = ()) -> Job:
+        """Queue ``func`` and return its Job; higher ``priority`` runs sooner."""
+        job = Job(job_id=uuid.uuid4().hex, func=func, priority=priority, providers=frozenset(providers))
+        with self._cond:
+            self._jobs[job.job_id] = job
+            bisect.insort(self._queue, (-priority, next(self._order), job))
+            self._trim()
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict:
+        """Queue depth and in-flight jobs per provider."""
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "active": dict(self._active),
+                "limits": dict(self.limits),
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work; queued jobs that have not started are dropped."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _has_capacity(self, job: Job) -> bool:
+        return all(
+            self._active.get(provider, 0) < self.limits[provider]
+            for provider in job.providers
+            if provider in self.limits
+        )
+
+    def _next_job(self) -> Optional[Job]:
+        for index, (_, _, job) in enumerate(self._queue):
+            if self._has_capacity(job):
+                del self._queue[index]
+                return job
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopping:
+                    job = self._next_job()
+                    if job:
+                        break
+                    self._cond.wait()
+                if job is None:
+                    return
+                for provider in job.providers:
+                    self._active[provider] = self._active.get(provider, 0) + 1
+                job.status = RUNNING
+                job.started_at = time.time()
+
+            try:
+                job.result = job.func()
+                status = DONE
+            except Exception as e:
+                job.error = str(e)
+                status = FAILED
+            job.finished_at = time.time()
+            job.status = status
+
+            with self._cond:
+                for provider in job.providers:
+                    self._active[provider] -= 1
+                job.func = None
+                # A freed provider slot may unblock a job another worker skipped
+                self._cond.notify_all()
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond ``keep_finished``."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (DONE, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
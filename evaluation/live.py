@@ -0,0 +1,123 @@
+"""Background evaluation of calls as soon as their transcripts are saved."""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .driver import EVALUATE, TranscriptEvaluator, publish_outcome
+from .reporter import Reporter
+from .transcripts import iter_transcript_files
+
+logger = logging.getLogger(__name__)
+
+
+class LiveEvaluator:
+    """Bounded queue of finished calls evaluated by a background thread.
+
+    ``submit`` never blocks: when ``max_pending`` calls are already waiting the
+    call is rejected and left on disk, where the next watch scan or batch run
+    (which skip anything already in the manifest) will pick it up. Before each
+    evaluation the worker waits, for at most ``max_defer`` seconds, while
+    ``is_busy`` reports live webhook traffic.
+    """
+
+    def __init__(
+        self,
+        checks_config: Optional[str] = None,
+        fast_fail: Optional[bool] = None,
+        reporter: Optional[Reporter] = None,
+        max_pending: int = 32,
+        llm_concurrency: int = 4,
+        is_busy: Optional[Callable[[], bool]] = None,
+        max_defer: float = 5.0
+    ):
+        self.evaluator = TranscriptEvaluator(EVALUATE, checks_config, fast_fail, llm_concurrency)
+        self.config_hash = self.evaluator.fingerprint()
+        self.reporter = reporter or Reporter()
+        self.store = self.reporter.store
+        self.is_busy = is_busy
+        self.max_defer = max_defer
+        self.stats: Dict[str, int] = {"submitted": 0, "rejected": 0, "evaluated": 0, "failed": 0, "skipped": 0}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="live-evaluator", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, call_id: str, path: str) -> bool:
+        """Enqueue a saved transcript; returns False if the queue is full."""
+        with self._lock:
+            if path in self._queued:
+                return True
+            try:
+                self._queue.put_nowait((call_id, path, time.monotonic()))
+            except queue.Full:
+                self.stats["rejected"] += 1
+                logger.warning(f"Evaluation queue full, leaving {call_id} for the next batch run")
+                return False
+            self._queued.add(path)
+            self.stats["submitted"] += 1
+        return True
+
+    def scan(self, directory: str = "recordings") -> int:
+        """Submit transcripts in ``directory`` not yet evaluated under this config."""
+        submitted = 0
+        for call_id, path in sorted(iter_transcript_files(directory)):
+            if path in self._queued:
+                continue
+            if self.store.find_evaluation(EVALUATE, self.store.file_hash(path), self.config_hash):
+                continue
+            if not self.submit(call_id, path):
+                break
+            submitted += 1
+        return submitted
+
+    def stop(self, timeout: Optional[float] = None):
+        """Finish queued evaluations and stop the worker thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _wait_for_quiet(self):
+        if not self.is_busy:
+            return
+        deadline = time.monotonic() + self.max_defer
+        while self.is_busy() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            call_id, path, enqueued = item
+            try:
+                self._evaluate(call_id, path, enqueued)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Live evaluation of {call_id} failed: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(path)
+
+    def _evaluate(self, call_id: str, path: str, enqueued: float):
+        self._wait_for_quiet()
+        if not os.path.exists(path):
+            return
+        transcript_hash = self.store.file_hash(path)
+        if self.store.find_evaluation(EVALUATE, transcript_hash, self.config_hash):
+            self.stats["skipped"] += 1
+            return
+
+        outcome = self.evaluator.evaluate(call_id, path, transcript_hash)
+        if publish_outcome(self.reporter, EVALUATE, self.config_hash, outcome):
+            self.stats["evaluated"] += 1
+            logger.info(f"Evaluated {call_id} {time.monotonic() - enqueued:.1f}s after hangup")
+        else:
+            self.stats["failed"] += 1
+            logger.error(f"Live evaluation of {call_id} failed: {outcome.error or 'analysis failed'}")
@@ -0,0 +1,80 @@
+"""Live progress counters for long evaluation runs."""
+import sys
+import time
+from contextlib import contextmanager
+
+# Process-shared counters installed by the evaluation driver. They stay None
+# in ordinary runs, where tracking LLM calls costs nothing.
+_inflight = None
+_completed = None
+
+
+def install_llm_counters(inflight, completed):
+    """Use the given ``multiprocessing.Value`` counters to track LLM calls."""
+    global _inflight, _completed
+    _inflight = inflight
+    _completed = completed
+
+
+@contextmanager
+def track_llm_call():
+    """Count an LLM request as in flight for the duration of the block."""
+    if _inflight is None:
+        yield
+        return
+    with _inflight.get_lock():
+        _inflight.value += 1
+    try:
+        yield
+    finally:
+        with _inflight.get_lock():
+            _inflight.value -= 1
+        with _completed.get_lock():
+            _completed.value += 1
+
+
+def llm_calls_in_flight() -> int:
+    return _inflight.value if _inflight is not None else 0
+
+
+def llm_calls_completed() -> int:
+    return _completed.value if _completed is not None else 0
+
+
+class ProgressMeter:
+    """Prints throughput and in-flight LLM calls at most once per interval."""
+
+    def __init__(self, total: int, interval: float = 2.0, stream=None):
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.done = 0
+        self.failed = 0
+        self.start = time.perf_counter()
+        self._last_print = self.start
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def update(self, done: int = 0, failed: int = 0):
+        self.done += done
+        self.failed += failed
+        self.tick()
+
+    def tick(self, force: bool = False):
+        """Print a status line if the interval has elapsed."""
+        now = time.perf_counter()
+        if not force and now - self._last_print < self.interval:
+            return
+        self._last_print = now
+        line = (f"[{self.done}/{self.total}] {self.rate:.2f} transcripts/s, "
+                f"{llm_calls_in_flight()} LLM calls in flight, {llm_calls_completed()} completed")
+        if self.failed:
+            line += f", {self.failed} failed"
+        print(line, file=self.stream, flush=True)
@@ -0,0 +1,524 @@
+"""Append-only SQLite index of bug and custom evaluation reports."""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from core.usage import COUNTERS, Usage, model_cost
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    call_id TEXT NOT NULL,
+    scenario TEXT,
+    created_at TEXT NOT NULL,
+    passed INTEGER,
+    score REAL,
+    issue_count INTEGER NOT NULL DEFAULT 0,
+    path TEXT,
+    payload TEXT NOT NULL,
+    config TEXT,
+    current INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS ix_reports_call_id ON reports(call_id);
+CREATE INDEX IF NOT EXISTS ix_reports_scenario ON reports(scenario, created_at);
+CREATE INDEX IF NOT EXISTS ix_reports_kind_created ON reports(kind, created_at);
+
+CREATE TABLE IF NOT EXISTS check_results (
+    report_id INTEGER NOT NULL REFERENCES reports(id),
+    check_name TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    score REAL NOT NULL,
+    weight REAL NOT NULL,
+    skipped INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_check_results_name ON check_results(check_name);
+CREATE INDEX IF NOT EXISTS ix_check_results_report ON check_results(report_id);
+
+CREATE TABLE IF NOT EXISTS summary (
+    kind TEXT PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    passed INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    issue_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS manifest (
+    mode TEXT NOT NULL,
+    transcript_hash TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    call_id TEXT NOT NULL,
+    report_path TEXT,
+    custom_report_path TEXT,
+    evaluated_at TEXT NOT NULL,
+    PRIMARY KEY (mode, transcript_hash, config_hash)
+);
+
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS usage (
+    report_id INTEGER REFERENCES reports(id),
+    kind TEXT NOT NULL,
+    call_id TEXT NOT NULL,
+    scenario TEXT,
+    config TEXT,
+    check_name TEXT,
+    model TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    audio_seconds REAL NOT NULL DEFAULT 0,
+    characters INTEGER NOT NULL DEFAULT 0,
+    latency_s REAL NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_usage_call ON usage(call_id, kind);
+CREATE INDEX IF NOT EXISTS ix_usage_created ON usage(created_at);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_FILENAME_TIMESTAMP = re.compile(r"_(\d{8}_\d{6})\.json$")
+
+BUG_REPORT = "bug"
+CUSTOM_REPORT = "custom"
+# Usage rows of the call itself (patient LLM, STT, TTS), one set per call
+CALL_USAGE = "call"
+
+# Columns usage can be grouped by in usage_summary()
+USAGE_GROUPS = {
+    "kind": "kind", "scenario": "scenario", "config": "config",
+    "check": "check_name", "model": "model", "call": "call_id",
+}
+
+
+class ReportStore:
+    """Indexed store for evaluation results.
+
+    Every saved report is appended to ``reports`` along with its per-check
+    rows, and the running totals in ``summary`` are updated in the same
+    transaction, so summary stats never need a rescan. Only the newest
+    report per call, kind and checks config is ``current``: re-evaluating a
+    call replaces its earlier report in the summary and check pass rates,
+    while ``query()`` still returns the history. Provider usage found
+    in a report (and in call transcripts, via ``add_call_usage``) goes to
+    ``usage``, one row per model, so spend can be broken down by scenario,
+    checks config, check or model.
+    """
+
+    def __init__(self, path: str = "reports/index.sqlite3"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._lock = threading.RLock()
+        self._depth = 0
+        # Callbacks registered with after_commit() for the open transaction
+        self._on_commit: List[Callable[[], None]] = []
+        self._on_rollback: List[Callable[[], None]] = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def close(self):
+        self._conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Commit every write made in the block together, or none if it raises."""
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            self._depth = 1
+            self._on_commit, self._on_rollback = [], []
+            try:
+                with self._conn:
+                    yield
+            except BaseException:
+                for action in self._on_rollback:
+                    action()
+                raise
+            finally:
+                self._depth = 0
+            for action in self._on_commit:
+                action()
+
+    def after_commit(self, action: Callable[[], None], on_rollback: Optional[Callable[[], None]] = None):
+        """Run ``action`` once the open transaction commits, or ``on_rollback`` if it does not."""
+        # The lock is held by the thread whose transaction is open
+        with self._lock:
+            if not self._depth:
+                raise RuntimeError("after_commit() needs an open transaction")
+            self._on_commit.append(action)
+            if on_rollback:
+                self._on_rollback.append(on_rollback)
+
+    def _migrate(self):
+        """Bring a store created by an earlier version up to the current schema."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(reports)")}
+        if "current" not in columns:
+            with self.transaction():
+                self._conn.execute("ALTER TABLE reports ADD COLUMN config TEXT")
+                self._conn.execute("ALTER TABLE reports ADD COLUMN current INTEGER NOT NULL DEFAULT 1")
+                self._conn.execute(
+                    "UPDATE reports SET config = json_extract(payload, '$.config') WHERE kind = ?", (CUSTOM_REPORT,)
+                )
+                # Earlier versions counted every re-evaluation; keep only the newest of each
+                self._conn.execute(
+                    "UPDATE reports SET current = 0 WHERE EXISTS (SELECT 1 FROM reports newer "
+                    "WHERE newer.kind = reports.kind AND newer.call_id = reports.call_id "
+                    "AND newer.config IS reports.config "
+                    "AND (newer.created_at, newer.id) > (reports.created_at, reports.id))"
+                )
+                self._conn.execute("DELETE FROM summary")
+                self._conn.execute(
+                    "INSERT INTO summary (kind, total, passed, score_sum, issue_count) "
+                    "SELECT kind, COUNT(*), SUM(COALESCE(passed, 0)), SUM(score), SUM(issue_count) "
+                    "FROM reports WHERE current = 1 GROUP BY kind"
+                )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_reports_current ON reports(call_id, kind, config) WHERE current = 1"
+        )
+
+    def add_bug_report(self, report: Dict, path: Optional[str] = None,
+                       scenario: Optional[str] = None, created_at: Optional[str] = None) -> int:
+        """Index a BugDetector analysis result."""
+        return self._insert(
+            kind=BUG_REPORT,
+            call_id=report.get("call_id", "unknown"),
+            scenario=scenario,
+            created_at=created_at,
+            passed=report.get("success"),
+            score=report.get("quality_score", 0),
+            issue_count=len(report.get("issues", [])),
+            path=path,
+            payload=report,
+            checks=[],
+            usage=[(None, report.get("usage"))]
+        )
+
+    def add_custom_report(self, call_id: str, report: Dict, path: Optional[str] = None,
+                          scenario: Optional[str] = None, created_at: Optional[str] = None) -> int:
+        """Index a custom evaluation report (EvaluationReport.to_dict())."""
+        return self._insert(
+            kind=CUSTOM_REPORT,
+            call_id=call_id,
+            scenario=scenario,
+            created_at=created_at,
+            passed=report.get("passed"),
+            score=report.get("overall_score", 0),
+            issue_count=len(report.get("failures", [])),
+            path=path,
+            payload=report,
+            checks=report.get("checks", []),
+            usage=_custom_usage(report),
+            config=report.get("config")
+        )
+
+    def _insert(self, kind, call_id, scenario, created_at, passed, score,
+                issue_count, path, payload, checks, usage=(), config=None) -> int:
+        created_at = created_at or datetime.now().isoformat(timespec="seconds")
+        passed_flag = None if passed is None else int(bool(passed))
+        with self.transaction():
+            previous = self._conn.execute(
+                "SELECT id, created_at, passed, score, issue_count FROM reports "
+                "WHERE call_id = ? AND kind = ? AND config IS ? AND current = 1",
+                (call_id, kind, config)
+            ).fetchone()
+            # An import of an older report goes into the history without replacing the newer one
+            current = previous is None or previous["created_at"] <= created_at
+            if previous is not None and current:
+                self._conn.execute("UPDATE reports SET current = 0 WHERE id = ?", (previous["id"],))
+                self._conn.execute(
+                    "UPDATE summary SET total = total - 1, passed = passed - ?, score_sum = score_sum - ?, "
+                    "issue_count = issue_count - ? WHERE kind = ?",
+                    (previous["passed"] or 0, previous["score"], previous["issue_count"], kind)
+                )
+            cursor = self._conn.execute(
+                "INSERT INTO reports (kind, call_id, scenario, created_at, passed, score, "
+                "issue_count, path, payload, config, current) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, call_id, scenario, created_at, passed_flag, score or 0,
+                 issue_count, path, json.dumps(payload), config, int(current))
+            )
+            report_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO check_results (report_id, check_name, passed, score, weight, skipped) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(report_id, c["name"], int(bool(c.get("passed"))), c.get("score", 0),
+                  c.get("weight", 0), int(bool(c.get("skipped")))) for c in checks]
+            )
+            for check_name, check_usage in usage:
+                self._insert_usage(report_id, kind, call_id, scenario, config, check_name, check_usage, created_at)
+            if not current:
+                return report_id
+            self._conn.execute(
+                "INSERT INTO summary (kind, total, passed, score_sum, issue_count) VALUES (?, 1, ?, ?, ?) "
+                "ON CONFLICT(kind) DO UPDATE SET total = total + 1, passed = passed + excluded.passed, "
+                "score_sum = score_sum + excluded.score_sum, issue_count = issue_count + excluded.issue_count",
+                (kind, passed_flag or 0, score or 0, issue_count)
+            )
+        return report_id
+
+    def _insert_usage(self, report_id, kind, call_id, scenario, config, check_name,
+                      usage: Optional[Usage], created_at: str):
+        self._conn.executemany(
+            f"INSERT INTO usage (report_id, kind, call_id, scenario, config, check_name, model, created_at, "
+            f"{', '.join(COUNTERS)}, cost_usd) VALUES ({', '.join('?' * (len(COUNTERS) + 9))})",
+            [(report_id, kind, call_id, scenario, config, check_name, model, created_at,
+              *(counts.get(key, 0) for key in COUNTERS), model_cost(model, counts))
+             for model, counts in (usage or {}).items()]
+        )
+
+    def add_call_usage(self, call_id: str, usage: Optional[Usage], scenario: Optional[str] = None,
+                       ended_at: Optional[float] = None):
+        """Record (or replace) the provider usage of a call, as totalled in its transcript."""
+        created_at = (datetime.fromtimestamp(ended_at) if ended_at else datetime.now()).isoformat(timespec="seconds")
+        with self.transaction():
+            self._conn.execute("DELETE FROM usage WHERE kind = ? AND call_id = ?", (CALL_USAGE, call_id))
+            self._insert_usage(None, CALL_USAGE, call_id, scenario, None, None, usage, created_at)
+
+    def has_call_usage(self, call_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM usage WHERE kind = ? AND call_id = ? LIMIT 1", (CALL_USAGE, call_id)
+            ).fetchone()
+        return row is not None
+
+    def usage_summary(
+        self,
+        group_by: str = "scenario",
+        kind: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> List[Dict]:
+        """Usage, cost and provider latency totals per group, most expensive first.
+
+        ``group_by`` is one of ``USAGE_GROUPS``; ``kind`` is "call", "bug" or
+        "custom". ``latency_s`` is time spent waiting on the provider.
+        """
+        column = USAGE_GROUPS[group_by]
+        sums = ", ".join(f"SUM({key}) AS {key}" for key in COUNTERS)
+        sql = (f"SELECT {column} AS name, COUNT(DISTINCT call_id) AS calls, {sums}, SUM(cost_usd) AS cost_usd "
+               "FROM usage")
+        clauses, params = [], []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("created_at <= ?")
+            params.append(until if "T" in until else until + "T23:59:59")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" GROUP BY {column} ORDER BY cost_usd DESC, latency_s DESC"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def summary(self, kind: str = BUG_REPORT) -> Dict:
+        """Aggregate stats over the current report of each call, read from the running totals."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM summary WHERE kind = ?", (kind,)).fetchone()
+        total = row["total"] if row else 0
+        if kind == BUG_REPORT:
+            return {
+                "total_calls": total,
+                "success_rate": row["passed"] / total if total else 0,
+                "average_quality_score": row["score_sum"] / total if total else 0,
+                "total_issues_found": row["issue_count"] if row else 0,
+            }
+        return {
+            "total_evaluations": total,
+            "pass_rate": row["passed"] / total if total else 0,
+            "average_score": row["score_sum"] / total if total else 0,
+            "total_failures": row["issue_count"] if row else 0,
+        }
+
+    def query(
+        self,
+        kind: Optional[str] = None,
+        call_id: Optional[str] = None,
+        scenario: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        check_name: Optional[str] = None,
+        limit: Optional[int] = None,
+        include_payload: bool = True
+    ) -> List[Dict]:
+        """Find reports by kind, call, scenario, date range (ISO strings) or check name.
+
+        With ``check_name``, each row also carries that check's result.
+        """
+        columns = "r.id, r.kind, r.call_id, r.scenario, r.created_at, r.passed, r.score, r.issue_count, r.path"
+        if include_payload:
+            columns += ", r.payload"
+        sql = f"SELECT {columns}"
+        joins = ""
+        clauses, params = [], []
+        if check_name:
+            sql += ", c.passed AS check_passed, c.score AS check_score, c.skipped AS check_skipped"
+            joins = " JOIN check_results c ON c.report_id = r.id"
+            clauses.append("c.check_name = ?")
+            params.append(check_name)
+        for column, value in (("r.kind", kind), ("r.call_id", call_id), ("r.scenario", scenario)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("r.created_at >= ?")
+            params.append(since)
+        if until:
+            # A bare date includes the whole day
+            clauses.append("r.created_at <= ?")
+            params.append(until if "T" in until else until + "T23:59:59")
+        sql += " FROM reports r" + joins
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY r.created_at DESC, r.id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            result = dict(row)
+            if include_payload:
+                result["payload"] = json.loads(result["payload"])
+            results.append(result)
+        return results
+
+    def check_pass_rates(self, scenario: Optional[str] = None) -> Dict[str, Dict]:
+        """Pass rate and average score per check name across current custom evaluations."""
+        sql = ("SELECT c.check_name, COUNT(*) AS runs, SUM(c.passed) AS passed, AVG(c.score) AS avg_score "
+               "FROM check_results c JOIN reports r ON r.id = c.report_id WHERE c.skipped = 0 AND r.current = 1")
+        params = []
+        if scenario:
+            sql += " AND r.scenario = ?"
+            params.append(scenario)
+        sql += " GROUP BY c.check_name"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return {
+            row["check_name"]: {
+                "runs": row["runs"],
+                "pass_rate": row["passed"] / row["runs"],
+                "average_score": row["avg_score"],
+            }
+            for row in rows
+        }
+
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of a file, only re-read when its size or mtime changed."""
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+        if row:
+            return row["hash"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        file_hash = digest.hexdigest()
+        with self.transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, file_hash)
+            )
+        return file_hash
+
+    def find_evaluation(self, mode: str, transcript_hash: str, config_hash: str) -> Optional[Dict]:
+        """Manifest entry for a transcript already evaluated with this config, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM manifest WHERE mode = ? AND transcript_hash = ? AND config_hash = ?",
+                (mode, transcript_hash, config_hash)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def record_evaluation(self, mode: str, call_id: str, transcript_hash: str, config_hash: str,
+                          report_path: Optional[str] = None, custom_report_path: Optional[str] = None):
+        """Remember that a transcript/config pair has been evaluated."""
+        with self.transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO manifest (mode, transcript_hash, config_hash, call_id, "
+                "report_path, custom_report_path, evaluated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (mode, transcript_hash, config_hash, call_id, report_path, custom_report_path,
+                 datetime.now().isoformat(timespec="seconds"))
+            )
+
+    def import_directory(self, report_dir: str) -> int:
+        """Index the JSON reports already in a directory, once per store."""
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'imported'").fetchone()
+        if done or not os.path.exists(report_dir):
+            return 0
+
+        imported = 0
+        for filename in sorted(os.listdir(report_dir)):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(report_dir, filename)
+            created_at = _timestamp_from_filename(filename) or \
+                datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if filename.endswith("_custom_eval.json"):
+                call_id = filename[: -len("_custom_eval.json")]
+                self.add_custom_report(call_id, data, path=path, created_at=created_at)
+            elif "quality_score" in data or "issues" in data:
+                self.add_bug_report(data, path=path, created_at=created_at)
+            else:
+                continue
+            imported += 1
+
+        with self.transaction():
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('imported', ?)",
+                               (datetime.now().isoformat(timespec="seconds"),))
+        return imported
+
+
+def _custom_usage(report: Dict) -> List:
+    """(check name, usage) pairs of a custom evaluation; the total only if no check has its own."""
+    per_check = [(c["name"], c["usage"]) for c in report.get("checks", []) if c.get("usage")]
+    return per_check or [(None, report.get("usage"))]
+
+
+def _timestamp_from_filename(filename: str) -> Optional[str]:
+    """ISO timestamp embedded in Reporter file names (report_<call>_<YYYYmmdd_HHMMSS>.json)."""
+    match = _FILENAME_TIMESTAMP.search(filename)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").isoformat(timespec="seconds")
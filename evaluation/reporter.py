@@ -1,16 +1,23 @@
 import json
 import os
 from datetime import datetime
+from typing import Optional
+
+from .checks.base import EvaluationReport
+from .report_store import ReportStore
 
 class Reporter:
-    def __init__(self, report_dir="reports"):
+    def __init__(self, report_dir="reports", store: Optional[ReportStore] = None):
         self.report_dir = report_dir
         if not os.path.exists(self.report_dir):
             os.makedirs(self.report_dir)
+        self.store = store or ReportStore(os.path.join(self.report_dir, "index.sqlite3"))
+        # Index reports written before the store existed (no-op afterwards)
+        self.store.import_directory(self.report_dir)
 
-    def save_report(self, analysis_result: dict):
+    def save_report(self, analysis_result: dict, scenario: Optional[str] = None):
         """
-        Saves the analysis result to a JSON file.
+        Saves the analysis result to a JSON file and indexes it.
         """
         if not analysis_result:
             return None
@@ -19,36 +26,34 @@ class Reporter:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{self.report_dir}/report_{call_id}_{timestamp}.json"
         
-        with open(filename, "w") as f:
-            json.dump(analysis_result, f, indent=2)
+        with self.store.transaction():
+            self._write_json(filename, analysis_result)
+            self.store.add_bug_report(analysis_result, path=filename, scenario=scenario)
             
         print(f"Report saved to {filename}")
         return filename
 
+    def save_custom_report(self, call_id: str, report: EvaluationReport, scenario: Optional[str] = None):
+        """
+        Saves a custom evaluation report to a JSON file and indexes it.
+        """
+        filename = f"{self.report_dir}/{call_id}_custom_eval.json"
+        report_dict = report.to_dict()
+        with self.store.transaction():
+            self._write_json(filename, report_dict)
+            self.store.add_custom_report(call_id, report_dict, path=filename, scenario=scenario)
+        return filename
+
+    def _write_json(self, filename: str, data: dict):
+        """Write ``data`` to a temp file that replaces ``filename`` only when the store's
+        open transaction commits, and is removed if it rolls back."""
+        temp_path = f"{filename}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        self.store.after_commit(lambda: os.replace(temp_path, filename), lambda: os.remove(temp_path))
+
     def generate_summary_stats(self):
         """
-        Aggregates stats from all reports in the directory.
+        Aggregate stats over all bug reports, maintained incrementally by the store.
         """
-        total_calls = 0
-        successful_calls = 0
-        total_score = 0
-        issues_count = 0
-        
-        for filename in os.listdir(self.report_dir):
-            if filename.endswith(".json"):
-                with open(os.path.join(self.report_dir, filename), "r") as f:
-                    data = json.load(f)
-                    total_calls += 1
-                    if data.get("success"):
-                        successful_calls += 1
-                    total_score += data.get("quality_score", 0)
-                    issues_count += len(data.get("issues", []))
-        
-        avg_score = total_score / total_calls if total_calls > 0 else 0
-        
-        return {
-            "total_calls": total_calls,
-            "success_rate": successful_calls / total_calls if total_calls > 0 else 0,
-            "average_quality_score": avg_score,
-            "total_issues_found": issues_count
-        }
+        return self.store.summary()
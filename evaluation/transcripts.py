@@ -0,0 +1,145 @@
+"""Locating and loading saved call transcripts.
+
+Two formats are on disk: the original ``*_transcript.json`` (the scenario
+engine's message list, system prompt and opening instruction included) and
+the versioned ``*_transcript.jsonl`` written turn by turn (see
+``core/transcript_log.py``). Both load into the same list of role/content
+messages, opened by the scenario's system prompt, so checks never need to
+know which one they were given.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.transcript_log import PARTIAL_SUFFIX, TRANSCRIPT_LOG_SUFFIX
+from logic.prompts import OPENING_INSTRUCTION, SCENARIOS
+
+TRANSCRIPT_SUFFIX = "_transcript.json"
+# Newest format first: a call saved in both formats is listed once
+SUFFIXES = (TRANSCRIPT_LOG_SUFFIX, TRANSCRIPT_SUFFIX)
+
+
+@dataclass
+class TranscriptRecord:
+    """A call transcript in either format, with whatever metadata it carries."""
+    call_id: Optional[str]
+    version: int
+    scenario: Optional[str] = None
+    model: Optional[str] = None
+    # Only old-format transcripts carry the prompt text itself
+    system_prompt: Optional[str] = None
+    # Conversation turns only: no system prompt, no opening instruction
+    turns: List[Dict] = field(default_factory=list)
+    started_at: Optional[float] = None
+    ended_at: Optional[float] = None
+    # Provider usage of the call per model (see core/usage.py)
+    usage: Dict[str, Dict] = field(default_factory=dict)
+    # False for a call that was still in progress (or crashed) when read
+    complete: bool = True
+
+    def messages(self) -> List[Dict]:
+        """Role/content messages as the checks expect them."""
+        messages = [{"role": turn["role"], "content": turn.get("content", "")} for turn in self.turns]
+        prompt = self.system_prompt or (SCENARIOS.get(self.scenario) if self.scenario else None)
+        if prompt is not None:
+            messages.insert(0, {"role": "system", "content": prompt})
+        return messages
+
+
+def transcript_call_id(path: str) -> str:
+    """Call ID from a transcript file name in any format."""
+    name = os.path.basename(path)
+    if name.endswith(PARTIAL_SUFFIX):
+        name = name[: -len(PARTIAL_SUFFIX)]
+    for suffix in SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return os.path.splitext(name)[0]
+
+
+def iter_transcript_files(directory: str = "recordings") -> Iterator[Tuple[str, str]]:
+    """Yield (call_id, path) for every finished transcript in the directory."""
+    if not os.path.exists(directory):
+        return
+    found: Dict[str, Tuple[int, str]] = {}
+    for entry in os.scandir(directory):
+        for rank, suffix in enumerate(SUFFIXES):
+            if entry.name.endswith(suffix):
+                call_id = entry.name[: -len(suffix)]
+                if call_id not in found or rank < found[call_id][0]:
+                    found[call_id] = (rank, entry.path)
+                break
+    for call_id, (_, path) in found.items():
+        yield call_id, path
+
+
+def find_transcript(directory: str, call_id: str) -> Optional[str]:
+    """Path of a call's finished transcript, in the newest format available."""
+    for suffix in SUFFIXES:
+        path = os.path.join(directory, f"{call_id}{suffix}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _from_messages(call_id: Optional[str], messages: List[Dict]) -> TranscriptRecord:
+    turns = [
+        message for message in messages
+        if message.get("role") != "system" and message.get("content") != OPENING_INSTRUCTION
+    ]
+    system = next((message.get("content") for message in messages if message.get("role") == "system"), None)
+    return TranscriptRecord(
+        call_id=call_id, version=1, scenario=infer_scenario(messages), system_prompt=system, turns=turns
+    )
+
+
+def _from_log(call_id: str, lines: List[str]) -> TranscriptRecord:
+    record = TranscriptRecord(call_id=call_id, version=0, complete=False)
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            # A line torn by a crash mid-write; the records around it are intact
+            continue
+        kind = entry.get("type")
+        if kind == "call":
+            record.call_id = entry.get("call_id", call_id)
+            record.version = entry.get("version", 0)
+            record.scenario = entry.get("scenario")
+            record.model = entry.get("model")
+            record.started_at = entry.get("started_at")
+        elif kind == "turn":
+            record.turns.append(entry)
+        elif kind == "end":
+            record.ended_at = entry.get("ended_at")
+            record.usage = entry.get("usage") or {}
+            record.complete = True
+    return record
+
+
+def load_transcript_record(path: str) -> TranscriptRecord:
+    """Load a transcript in either format, including an unfinished ``.part`` file."""
+    call_id = transcript_call_id(path)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return _from_messages(call_id, json.loads(text))
+    return _from_log(call_id, text.splitlines())
+
+
+def load_transcript(path: str) -> List[Dict]:
+    """Load a transcript as a list of role/content messages."""
+    return load_transcript_record(path).messages()
+
+
+def infer_scenario(transcript: List[Dict]) -> Optional[str]:
+    """Name of the scenario whose system prompt opens the transcript, if any."""
+    for turn in transcript:
+        if turn.get("role") == "system":
+            content = (turn.get("content") or "").strip()
+            for name, prompt in SCENARIOS.items():
+                if prompt.strip() == content:
+                    return name
+            return None
+    return None
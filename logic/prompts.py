@@ -25,3 +25,6 @@ SCENARIOS = {
     "refill": REFILL_PROMPT,
     "insurance": INSURANCE_PROMPT
 }
+
+# Sent as a user message so the patient bot speaks first; not part of the conversation
+OPENING_INSTRUCTION = "You are starting the call. The other side has just picked up and said 'Hello'. Introduce yourself and state your purpose based on your scenario."
@@ -1,11 +1,17 @@
-from openai import OpenAI
 import os
-from .prompts import SCENARIOS
+import time
+from core.rate_limiter import LIVE, estimate_tokens, limited_call, openai_usage
+from core.usage import chat_usage, record_usage
+from .prompts import OPENING_INSTRUCTION, SCENARIOS
 
 class ScenarioEngine:
-    def __init__(self, scenario_name: str = "scheduling"):
+    def __init__(self, scenario_name: str = "scheduling", client=None):
         self.api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=self.api_key)
+        if client is None:
+            from openai import OpenAI
+            # Retries are handled by the shared rate limiter
+            client = OpenAI(api_key=self.api_key, max_retries=0)
+        self.client = client
         self.scenario_name = scenario_name
         self.system_prompt = SCENARIOS.get(scenario_name, SCENARIOS["scheduling"])
         self.history = [
@@ -13,6 +19,10 @@ class ScenarioEngine:
         ]
         self.turn_count = 0
         self.max_turns = 10 # Prevent infinite loops
+        self.model = "gpt-4"
+        # Latency of the most recent completion, for the transcript; its token
+        # usage is reported through core.usage
+        self.last_latency_ms = None
 
     def generate_response(self, user_transcript: str):
         """
@@ -21,12 +31,7 @@ class ScenarioEngine:
         self.history.append({"role": "user", "content": user_transcript})
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=self.history,
-                max_tokens=150,
-                temperature=0.7
-            )
+            response = self._complete(max_tokens=150, temperature=0.7)
             bot_text = response.choices[0].message.content
             self.history.append({"role": "assistant", "content": bot_text})
             self.turn_count += 1
@@ -35,20 +40,38 @@ class ScenarioEngine:
             print(f"Error generating response: {e}")
             return "I'm sorry, I didn't catch that. Could you say it again?"
 
+    def _complete(self, max_tokens: int, **kwargs):
+        """
+        Calls the patient model with live-call priority in the shared rate limiter.
+        """
+        self.last_latency_ms = None
+        start = time.perf_counter()
+        response = limited_call(
+            "openai", self.model,
+            lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=self.history,
+                max_tokens=max_tokens,
+                **kwargs
+            ),
+            priority=LIVE,
+            tokens=estimate_tokens(*(m["content"] for m in self.history), completion=max_tokens),
+            usage=openai_usage,
+            max_retries=2
+        )
+        self.last_latency_ms = (time.perf_counter() - start) * 1000
+        record_usage(self.model, latency_s=self.last_latency_ms / 1000, **chat_usage(response))
+        return response
+
     def get_first_message(self):
         """
         Generates the opening line for the call.
         """
         # We prompt the LLM to start the conversation
-        initial_instruction = "You are starting the call. The other side has just picked up and said 'Hello'. Introduce yourself and state your purpose based on your scenario."
-        self.history.append({"role": "user", "content": initial_instruction})
+        self.history.append({"role": "user", "content": OPENING_INSTRUCTION})
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=self.history,
-                max_tokens=100
-            )
+            response = self._complete(max_tokens=100)
             bot_text = response.choices[0].message.content
             self.history.append({"role": "assistant", "content": bot_text})
             return bot_text
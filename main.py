@@ -4,21 +4,24 @@ import threading
 import time
 import json
 from dotenv import load_dotenv
-from core.server import app, start_server
-from core.voice_bot import VoiceBot
-from evaluation.bug_detector import BugDetector
 from evaluation.reporter import Reporter
 from evaluation.check_runner import CheckRunner
-from pyngrok import ngrok
-import uvicorn
+from evaluation.checks.threshold import ThresholdCheck
+from evaluation.driver import CorpusEvaluation
+from evaluation.transcripts import infer_scenario, load_transcript, transcript_call_id
 
 # Load environment variables
 load_dotenv()
 
-def run_server_thread(port):
+def run_server_thread(app, port):
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=port)
 
-def start_call_mode(scenario, target_number):
+def start_call_mode(scenario, target_number, live_eval=False, checks_config=None, fast_fail=None):
+    # Telephony code is only imported for calls, keeping evaluation commands fast
+    from pyngrok import ngrok
+    from core import server
+    
     port = int(os.getenv("PORT", 8000))
     
     # 1. Start Ngrok
@@ -29,17 +32,19 @@ def start_call_mode(scenario, target_number):
     print(f"Ngrok tunnel running at: {public_url}")
     
     # Update server's base URL (hacky but works for simple script)
-    from core import server
     server.BASE_URL = public_url
+    app = server.get_app()
+    if live_eval:
+        server.enable_live_evaluation(checks_config, fast_fail)
     
     # 2. Start Server in Thread
-    server_thread = threading.Thread(target=run_server_thread, args=(port,), daemon=True)
+    server_thread = threading.Thread(target=run_server_thread, args=(app, port), daemon=True)
     server_thread.start()
     print("Server started in background...")
     time.sleep(2) # Give it a sec
     
     # 3. Initiate Call
-    bot = VoiceBot()
+    bot = server.get_bot()
     # The first webhook for a call is usually just the URL
     # But we want to hit /voice
     webhook_url = f"{public_url}/voice"
@@ -54,69 +59,62 @@ def start_call_mode(scenario, target_number):
                 time.sleep(1)
         except KeyboardInterrupt:
             print("Stopping server...")
+            if server.live_evaluator:
+                print(f"Waiting for {server.live_evaluator.pending} pending evaluations...")
+                server.live_evaluator.stop(timeout=60)
     else:
         print("Failed to initiate call.")
 
-def run_evaluation_mode(checks_config: str = None):
+def run_evaluation_mode(checks_config: str = None, fast_fail: bool = None, force: bool = False,
+                        workers: int = 1, llm_concurrency: int = 4):
     print("Running evaluation on transcript files...")
-    detector = BugDetector()
     reporter = Reporter()
     
-    # Load custom evaluation if config provided
-    custom_runner = None
-    if checks_config and os.path.exists(checks_config):
-        print(f"Loading custom evaluation from {checks_config}")
-        detector.load_custom_evaluation(checks_config)
-        custom_runner = CheckRunner(checks_config)
-    
     recordings_dir = "recordings"
     if not os.path.exists(recordings_dir):
         print(f"No recordings directory found at {recordings_dir}")
         return
-
-    processed_count = 0
+    
+    # Load custom evaluation if config provided
+    if checks_config and os.path.exists(checks_config):
+        print(f"Loading custom evaluation from {checks_config}")
+    
+    evaluation = CorpusEvaluation("evaluate", reporter, checks_config, fast_fail,
+                                  workers=workers, llm_concurrency=llm_concurrency)
     custom_eval_count = 0
     
-    for filename in os.listdir(recordings_dir):
-        if filename.endswith("_transcript.json"):
-            filepath = os.path.join(recordings_dir, filename)
-            print(f"Analyzing {filename}...")
-            
-            with open(filepath, "r") as f:
-                transcript = json.load(f)
-            
-            call_id = filename.split("_transcript")[0]
-            
-            # Run standard bug detection
-            result = detector.analyze_transcript(call_id, transcript)
-            
-            # Run custom evaluation if configured
-            custom_report = None
-            if detector.custom_evaluator:
-                custom_report = detector.run_custom_evaluation(call_id, transcript)
-                if custom_report:
-                    custom_eval_count += 1
-                    detector.save_custom_report(call_id, custom_report)
-            
-            reporter.save_report(result)
-            processed_count += 1
+    def on_outcome(outcome):
+        nonlocal custom_eval_count
+        if outcome.custom_report:
+            custom_eval_count += 1
+    
+    totals = evaluation.run(recordings_dir, force=force, on_outcome=on_outcome)
             
-    print(f"Evaluation complete. Processed {processed_count} transcripts.")
+    print(f"Evaluation complete. Processed {totals['processed']} transcripts "
+          f"({totals['transcripts_per_s']:.2f}/s, {totals['llm_calls']} LLM calls).")
+    if totals["failed"]:
+        print(f"{totals['failed']} transcripts failed and will be retried on the next run")
+    if totals["skipped"]:
+        print(f"Skipped {totals['skipped']} unchanged transcripts (use --force to re-evaluate)")
     if custom_eval_count > 0:
         print(f"Custom evaluation applied to {custom_eval_count} transcripts")
     stats = reporter.generate_summary_stats()
     print("Summary Stats:", json.dumps(stats, indent=2))
 
 
-def run_custom_evaluation_mode(checks_config: str, transcript_file: str = None):
+def run_custom_evaluation_mode(checks_config: str, transcript_file: str = None, fast_fail: bool = None,
+                               force: bool = False, workers: int = 1, llm_concurrency: int = 4):
     """Run custom evaluation on specific transcript or all transcripts."""
     if not os.path.exists(checks_config):
         print(f"Error: Checks config not found: {checks_config}")
         return
     
-    runner = CheckRunner(checks_config)
+    runner = CheckRunner(checks_config, fast_fail=fast_fail, llm_concurrency=llm_concurrency)
+    reporter = Reporter()
     print(f"Loaded {len(runner.checks)} checks from {checks_config}")
     print(f"Pass threshold: {runner.pass_threshold}%")
+    if runner.fast_fail:
+        print("Fast-fail: LLM checks are skipped once the verdict is decided")
     
     if transcript_file:
         # Evaluate single transcript
@@ -124,10 +122,8 @@ def run_custom_evaluation_mode(checks_config: str, transcript_file: str = None):
             print(f"Error: Transcript file not found: {transcript_file}")
             return
         
-        with open(transcript_file, "r") as f:
-            transcript = json.load(f)
-        
-        call_id = os.path.basename(transcript_file).replace("_transcript.json", "")
+        transcript = load_transcript(transcript_file)
+        call_id = transcript_call_id(transcript_file)
         report = runner.evaluate(transcript)
         
         print(f"\n{'='*60}")
@@ -135,9 +131,14 @@ def run_custom_evaluation_mode(checks_config: str, transcript_file: str = None):
         print(f"{'='*60}")
         print(f"Status: {'PASSED' if report.passed else 'FAILED'}")
         print(f"Score: {report.overall_score}/{report.max_score}")
+        if report.usage:
+            from core.usage import usage_totals
+            totals = usage_totals(report.usage)
+            print(f"Usage: {totals['prompt_tokens'] + totals['completion_tokens']} tokens "
+                  f"({totals['cached_tokens']} cached), ${totals['cost_usd']:.4f}")
         print(f"\nCheck Results:")
         for result in report.check_results:
-            status = "✓" if result.passed else "✗"
+            status = "⊘" if result.skipped else ("✓" if result.passed else "✗")
             print(f"  {status} {result.name}: {result.score:.1f}/{result.weight}")
             if result.evidence:
                 print(f"      Evidence: {result.evidence}")
@@ -148,11 +149,7 @@ def run_custom_evaluation_mode(checks_config: str, transcript_file: str = None):
                 print(f"  - {failure}")
         
         # Save report
-        if not os.path.exists("reports"):
-            os.makedirs("reports")
-        report_file = f"reports/{call_id}_custom_eval.json"
-        with open(report_file, "w") as f:
-            json.dump(report.to_dict(), f, indent=2)
+        report_file = reporter.save_custom_report(call_id, report, scenario=infer_scenario(transcript))
         print(f"\nReport saved to {report_file}")
     else:
         # Evaluate all transcripts in recordings directory
@@ -162,62 +159,314 @@ def run_custom_evaluation_mode(checks_config: str, transcript_file: str = None):
             return
         
         print(f"\nEvaluating all transcripts in {recordings_dir}...")
-        processed = 0
+        evaluation = CorpusEvaluation("custom-eval", reporter, checks_config, fast_fail,
+                                      workers=workers, llm_concurrency=llm_concurrency)
         passed = 0
         
-        for filename in os.listdir(recordings_dir):
-            if filename.endswith("_transcript.json"):
-                filepath = os.path.join(recordings_dir, filename)
-                with open(filepath, "r") as f:
-                    transcript = json.load(f)
-                
-                call_id = filename.replace("_transcript.json", "")
-                report = runner.evaluate(transcript)
-                
+        def on_outcome(outcome):
+            nonlocal passed
+            report = outcome.custom_report
+            if report:
                 status = "PASS" if report.passed else "FAIL"
-                print(f"  {call_id}: {status} ({report.overall_score:.1f}%)")
-                
+                print(f"  {outcome.call_id}: {status} ({report.overall_score:.1f}%)")
                 if report.passed:
                     passed += 1
-                processed += 1
-                
-                # Save individual report
-                if not os.path.exists("reports"):
-                    os.makedirs("reports")
-                report_file = f"reports/{call_id}_custom_eval.json"
-                with open(report_file, "w") as f:
-                    json.dump(report.to_dict(), f, indent=2)
+        
+        totals = evaluation.run(recordings_dir, force=force, on_outcome=on_outcome)
+        processed = totals["processed"]
+        
+        if totals["skipped"]:
+            print(f"  Skipped {totals['skipped']} unchanged transcripts (use --force to re-evaluate)")
         
         if processed > 0:
             pass_rate = (passed / processed) * 100
             print(f"\n{'='*60}")
             print(f"Summary: {passed}/{processed} passed ({pass_rate:.1f}%)")
+            print(f"Throughput: {totals['transcripts_per_s']:.2f} transcripts/s, {totals['llm_calls']} LLM calls")
             print(f"{'='*60}")
+        
+        if totals["cascade"]:
+            print("\nCascade:")
+            for name, stats in totals["cascade"].items():
+                print(f"  {name}: {stats['escalation_rate']*100:.0f}% escalated, "
+                      f"${stats['cost_saved_usd']:.4f} saved")
+        
+        if totals["voting"]:
+            print("\nVoting:")
+            for name, stats in totals["voting"].items():
+                print(f"  {name}: {stats['vote_rate']*100:.0f}% voted, "
+                      f"{stats['samples_per_evaluation']:.2f} samples/evaluation, {stats['overturned']} overturned")
+
+
+def run_watch_mode(checks_config: str = None, fast_fail: bool = None, interval: float = 2.0):
+    """Evaluate new and changed transcripts as they appear in the recordings directory."""
+    from evaluation.live import LiveEvaluator
+    
+    evaluator = LiveEvaluator(checks_config=checks_config, fast_fail=fast_fail)
+    print(f"Watching recordings/ every {interval:.0f}s (Ctrl+C to stop)...")
+    try:
+        while True:
+            submitted = evaluator.scan("recordings")
+            if submitted:
+                print(f"Queued {submitted} transcripts for evaluation")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print(f"Stopping; waiting for {evaluator.pending} pending evaluations...")
+        evaluator.stop(timeout=60)
+    print("Live evaluation:", json.dumps(evaluator.stats))
+
+
+def run_corpus_metrics_mode(checks_config: str):
+    """Score every threshold check in the config across all transcripts at once."""
+    from evaluation.corpus import TranscriptCorpus, evaluate_corpus_thresholds
+    
+    runner = CheckRunner(checks_config)
+    checks = [check for check in runner.checks if isinstance(check, ThresholdCheck)]
+    if not checks:
+        print(f"No threshold checks found in {checks_config}")
+        return
+    
+    start = time.perf_counter()
+    corpus = TranscriptCorpus.from_directory("recordings")
+    report = evaluate_corpus_thresholds(corpus, checks)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(checks)} threshold checks over {len(corpus)} transcripts in {elapsed:.2f}s")
+    
+    summaries = report.summaries()
+    for name, summary in summaries.items():
+        if summary["count"]:
+            print(f"  {name} ({summary['metric']}): mean={summary['mean']:.1f} "
+                  f"p50={summary['p50']:.1f} p90={summary['p90']:.1f} "
+                  f"pass_rate={summary['pass_rate']*100:.0f}%")
+    
+    if not os.path.exists("reports"):
+        os.makedirs("reports")
+    report_file = "reports/corpus_metrics.json"
+    with open(report_file, "w") as f:
+        json.dump({
+            "summaries": summaries,
+            "calls": {
+                call_id: [r.to_dict() for r in results]
+                for call_id, results in report.check_results().items()
+            },
+        }, f, indent=2)
+    print(f"Report saved to {report_file}")
+
+
+def run_storage_gc_mode():
+    """Apply the storage policies once: drop stale bot audio, bundle finished calls, enforce the budget."""
+    from core.storage import StorageManager
+    
+    storage = StorageManager()
+    stats = storage.collect()
+    print(f"Deleted {stats['bot_audio_deleted']} bot audio files, evicted {stats['cache_evicted']} cached phrases, "
+          f"archived {stats['files_archived']} recordings from {stats['calls_archived']} calls into {storage.archive_dir}")
+    print(f"Freed {stats['bytes_freed'] / 1024 / 1024:.1f} MB")
+
+
+def run_archive_mode(codec: str = "ulaw"):
+    """Convert loose call audio (and older zip bundles) into per-call archives."""
+    from core.call_archive import convert_directories
+    
+    start = time.perf_counter()
+    totals = convert_directories("recordings", "static", codec=codec)
+    elapsed = time.perf_counter() - start
+    print(f"Archived {totals['turns']} turns from {totals['calls']} calls in {elapsed:.2f}s")
+    if totals["archive_bytes"]:
+        print(f"{totals['source_bytes'] / 1024 / 1024:.1f} MB -> {totals['archive_bytes'] / 1024 / 1024:.1f} MB "
+              f"({totals['source_bytes'] / totals['archive_bytes']:.1f}x smaller)")
+
+
+def run_replay_mode(args):
+    """Drive recorded calls through the server pipeline and report per-stage timings."""
+    import tempfile
+    from core.replay import ReplayHarness, find_recorded_calls
+    
+    # Archived calls are unpacked to WAV files here for the duration of the replay
+    with tempfile.TemporaryDirectory(prefix="replay-") as work_dir:
+        calls = find_recorded_calls("recordings", args.calls.split(",") if args.calls else None, work_dir)
+        if not calls:
+            print("No recorded calls with user audio found in recordings/")
+            return
+        harness = ReplayHarness(
+            providers=args.providers, speed=args.speed, out_dir=args.out,
+            stt_latency=args.stt_latency, llm_latency=args.llm_latency, tts_latency=args.tts_latency
+        )
+        print(f"Replaying {len(calls)} calls ({args.providers} providers, "
+              f"{'real time x' + str(args.speed) if args.speed else 'no pacing'})...")
+        summary = harness.run(calls)
+    print(f"Replayed {summary['turns']} turns from {summary['calls']} calls in {summary['wall_s']:.2f}s "
+          f"({summary['hung_up']} reached hangup)")
+    for stage, stats in summary["stages"].items():
+        print(f"  {stage:<12} median={stats['median']:8.1f}  p95={stats['p95']:8.1f}  max={stats['max']:8.1f}  (n={stats['count']})")
+    report_file = os.path.join(args.out, "replay_summary.json")
+    with open(report_file, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Summary saved to {report_file}")
+
+
+def run_reports_query_mode(args):
+    """Query the indexed report store."""
+    reporter = Reporter()
+    store = reporter.store
+    rows = store.query(
+        kind=args.kind, call_id=args.call_id, scenario=args.scenario,
+        since=args.since, until=args.until, check_name=args.check,
+        limit=args.limit, include_payload=False
+    )
+    for row in rows:
+        status = {1: "PASS", 0: "FAIL"}.get(row["passed"], "-")
+        line = f"{row['created_at']}  {row['kind']:<6} {row['call_id']}  {row['scenario'] or '-':<10} {status}  score={row['score']:.1f}"
+        if args.check:
+            check_status = "skipped" if row["check_skipped"] else ("passed" if row["check_passed"] else "failed")
+            line += f"  [{args.check}: {check_status}]"
+        print(line)
+    print(f"\n{len(rows)} report(s)")
+    print("Bug reports:", json.dumps(store.summary("bug"), indent=2))
+    print("Custom evaluations:", json.dumps(store.summary("custom"), indent=2))
+
+
+# Modes that can be run under the sampling profiler with --profile
+PROFILED_MODES = ("evaluate", "custom-eval", "corpus-metrics", "watch")
+
+
+def run_usage_mode(args):
+    """Index the usage recorded in call transcripts, then show usage and cost by group."""
+    from core.usage import COUNTERS
+    from evaluation.transcripts import iter_transcript_files, load_transcript_record
+    
+    store = Reporter().store
+    indexed = 0
+    for call_id, path in iter_transcript_files("recordings"):
+        if not args.force and store.has_call_usage(call_id):
+            continue
+        record = load_transcript_record(path)
+        if record.usage:
+            store.add_call_usage(call_id, record.usage, record.scenario, record.ended_at)
+            indexed += 1
+    if indexed:
+        print(f"Indexed usage from {indexed} call transcripts")
+    
+    rows = store.usage_summary(args.group_by, kind=args.kind, since=args.since, until=args.until)
+    if not rows:
+        print("No usage recorded yet")
+        return
+    print(f"{args.group_by:<24} {'calls':>6} {'requests':>8} {'prompt':>10} {'completion':>10} {'cached':>8} "
+          f"{'audio s':>8} {'chars':>8} {'wait s':>8} {'cost $':>10}")
+    for row in rows:
+        print(f"{str(row['name'] or '-'):<24} {row['calls']:>6} {row['requests']:>8} {row['prompt_tokens']:>10} "
+              f"{row['completion_tokens']:>10} {row['cached_tokens']:>8} {row['audio_seconds']:>8.1f} "
+              f"{row['characters']:>8} {row['latency_s']:>8.1f} {row['cost_usd']:>10.4f}")
+    total = {key: sum(row[key] for row in rows) for key in (*COUNTERS, "cost_usd")}
+    print(f"\nTotal: {total['prompt_tokens'] + total['completion_tokens']} tokens, "
+          f"{total['audio_seconds']:.0f}s transcribed, {total['characters']} characters synthesized, "
+          f"${total['cost_usd']:.4f}")
 
 
 def main():
     parser = argparse.ArgumentParser(description="AI Patient Stress Tester Bot")
-    parser.add_argument("--mode", choices=["call", "evaluate", "custom-eval"], default="call",
-                       help="Mode to run the bot in: call (make test calls), evaluate (bug detection), custom-eval (custom checks)")
-    parser.add_argument("--scenario", type=str, default="scheduling", help="Scenario to run (call mode)")
+    parser.add_argument("--mode", choices=["call", "evaluate", "custom-eval", "corpus-metrics", "reports", "watch", "gc", "archive", "replay", "usage"], default="call",
+                       help="Mode to run the bot in: call (make test calls), evaluate (bug detection), custom-eval (custom checks), "
+                            "corpus-metrics (threshold checks over all transcripts at once), reports (query saved reports), "
+                            "watch (evaluate transcripts as they are saved), gc (clean up audio files now), "
+                            "archive (pack existing call audio into per-call archives), "
+                            "replay (re-run recorded calls through the pipeline offline), "
+                            "usage (provider usage and cost by scenario, config, check or model)")
+    parser.add_argument("--scenario", type=str, help="Scenario to run (call mode, default: scheduling) or filter by (reports mode)")
     parser.add_argument("--number", type=str, default=os.getenv("TARGET_PHONE_NUMBER"), help="Target phone number")
-    parser.add_argument("--checks", type=str, help="Path to custom checks YAML config (for evaluate/custom-eval modes)")
+    parser.add_argument("--checks", type=str, help="Path to custom checks YAML config (for evaluate/custom-eval/watch modes and --live-eval)")
     parser.add_argument("--transcript", type=str, help="Specific transcript file to evaluate (custom-eval mode)")
+    parser.add_argument("--fast-fail", action="store_true", default=None,
+                       help="Run cheap checks first and skip LLM checks once the verdict is decided")
+    parser.add_argument("--force", action="store_true",
+                       help="Re-evaluate transcripts even if unchanged since their last evaluation "
+                            "(usage mode: re-index the usage of every transcript)")
+    parser.add_argument("--live-eval", action="store_true",
+                       help="Evaluate each call in the background as soon as it hangs up (call mode)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Polling interval in seconds (watch mode)")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Worker processes for directory evaluations (evaluate/custom-eval modes)")
+    parser.add_argument("--llm-concurrency", type=int, default=4,
+                       help="Concurrent LLM requests per worker (evaluate/custom-eval modes)")
+    parser.add_argument("--codec", choices=["ulaw", "opus"], default="ulaw",
+                       help="Codec for archived user audio; opus needs ffmpeg (archive mode)")
+    parser.add_argument("--calls", type=str, help="Comma-separated call IDs to replay (replay mode, default: all)")
+    parser.add_argument("--providers", choices=["local", "live"], default="local",
+                       help="Deterministic local stand-ins or the configured APIs (replay mode)")
+    parser.add_argument("--speed", type=float, default=0.0,
+                       help="Pacing relative to real time, e.g. 1 or 10; 0 replays turns back to back (replay mode)")
+    parser.add_argument("--stt-latency", type=float, default=0.0, help="Seconds added by the STT stand-in (replay mode)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds added by the LLM stand-in (replay mode)")
+    parser.add_argument("--tts-latency", type=float, default=0.0, help="Seconds added by the TTS stand-in (replay mode)")
+    parser.add_argument("--out", type=str, default="replays", help="Directory for replay transcripts and summary (replay mode)")
+    parser.add_argument("--kind", choices=["bug", "custom", "call"],
+                       help="Report kind filter (reports mode; usage mode also accepts call)")
+    parser.add_argument("--group-by", choices=["scenario", "config", "check", "model", "kind", "call"], default="scenario",
+                       help="How to break down usage and cost (usage mode)")
+    parser.add_argument("--call-id", type=str, help="Call ID filter (reports mode)")
+    parser.add_argument("--since", type=str, help="Earliest report date, ISO format (reports/usage modes)")
+    parser.add_argument("--until", type=str, help="Latest report date, ISO format (reports/usage modes)")
+    parser.add_argument("--check", type=str, help="Only reports containing this check name (reports mode)")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum rows to show (reports mode)")
+    parser.add_argument("--profile", type=str,
+                       help="Sample the run and write folded stacks for a flame graph to this file "
+                            "(evaluate/custom-eval/corpus-metrics/watch modes)")
+    parser.add_argument("--profile-interval", type=float, default=5.0, help="Sampling interval in ms (--profile)")
     args = parser.parse_args()
 
+    profiler = None
+    if args.profile:
+        if args.mode in PROFILED_MODES:
+            from core.profiling import SamplingProfiler
+            profiler = SamplingProfiler(interval=args.profile_interval / 1000)
+            profiler.start()
+            if args.workers > 1:
+                print("Note: --profile only samples this process, not the --workers processes")
+        else:
+            print(f"Warning: --profile is not supported in {args.mode} mode")
+    try:
+        run_mode(args)
+    finally:
+        if profiler:
+            profiler.stop()
+            profiler.write(args.profile)
+            status = profiler.status()
+            print(f"Profile: {status['samples']} samples over {status['duration_s']:.1f}s written to {args.profile}")
+
+
+def run_mode(args):
+    """Dispatch to the selected mode."""
     if args.mode == "call":
         if not args.number:
             print("Error: Target number not provided in args or .env")
             return
-        start_call_mode(args.scenario, args.number)
+        start_call_mode(args.scenario or "scheduling", args.number, args.live_eval, args.checks, args.fast_fail)
     elif args.mode == "evaluate":
-        run_evaluation_mode(args.checks)
+        run_evaluation_mode(args.checks, args.fast_fail, args.force, args.workers, args.llm_concurrency)
     elif args.mode == "custom-eval":
         if not args.checks:
             print("Error: --checks argument required for custom-eval mode")
             print("Example: python main.py --mode custom-eval --checks checks/scheduling.yaml")
             return
-        run_custom_evaluation_mode(args.checks, args.transcript)
+        run_custom_evaluation_mode(args.checks, args.transcript, args.fast_fail, args.force,
+                                   args.workers, args.llm_concurrency)
+    elif args.mode == "corpus-metrics":
+        if not args.checks:
+            print("Error: --checks argument required for corpus-metrics mode")
+            return
+        run_corpus_metrics_mode(args.checks)
+    elif args.mode == "reports":
+        run_reports_query_mode(args)
+    elif args.mode == "watch":
+        run_watch_mode(args.checks, args.fast_fail, args.interval)
+    elif args.mode == "gc":
+        run_storage_gc_mode()
+    elif args.mode == "archive":
+        run_archive_mode(args.codec)
+    elif args.mode == "replay":
+        run_replay_mode(args)
+    elif args.mode == "usage":
+        run_usage_mode(args)
 
 if __name__ == "__main__":
     main()